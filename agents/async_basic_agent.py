@@ -0,0 +1,250 @@
+import asyncio
+import logging
+
+from agents.basic_agent import BasicAgent
+from agents.memory import ConversationMemory
+from tools.executors import execute_tool, execution_kind, tool_executors
+from tools.tool_cache import tool_result_cache
+from utils import metrics
+from utils.extract_xml import extract_xml
+from utils.logging import log_event
+
+
+class AsyncBasicAgent(BasicAgent):
+    """
+    BasicAgent whose planner, executor and response generator are coroutines.
+
+    LLM calls go through the router's async_call and coroutine tools run on the
+    event loop, other tools on the shared tool pools, so many conversations can share one
+    event loop. Pass a session_id to serve many conversations from a single agent, as with
+    BasicAgent.
+    """
+
+    async def __call__(self, question, session_id: str = None):
+        if session_id is None:
+            return await self._respond(question, self.memory)
+        async with self.session_store.async_lock(session_id):
+            memory = self._load_session(session_id)
+            answer = await self._respond(question, memory)
+            self.session_store.save(session_id, memory.to_dict())
+        return answer
+
+    async def _respond(self, question, memory: ConversationMemory):
+        with metrics.collect() as request_metrics:
+            answer = await self._answer(question, memory)
+        self._finish_request(request_metrics)
+        return answer
+
+    async def _answer(self, question, memory: ConversationMemory):
+        memory.set_system_prompt(self._tool_prompts(question).response_generator_prompt)
+        use_cache = self._uses_semantic_cache(memory)
+        memory.append({"role": "user", "content": question})
+        answer = self._cached_answer(question, memory, use_cache)
+        if answer is not None:
+            await self._compact_memory(memory)
+            return answer
+        failed = False
+        draft = None
+        if self.speculation is not None and self.speculation.should_speculate(question):
+            self.logger.debug("Drafting an answer while planning")
+            draft = asyncio.create_task(self._async_draft(memory.messages()))
+            # Retrieve the outcome so a failed or cancelled draft is not reported as unhandled
+            draft.add_done_callback(lambda task: task.cancelled() or task.exception())
+        plan = await self.planner(question)
+        log_event(self.logger, logging.DEBUG, "plan", plan=plan)
+        if self.speculation is not None:
+            self.speculation.record(plan == "", draft is not None)
+        if plan != "":
+            if draft is not None:
+                draft.cancel()
+            try:
+                answer_without_context = await self.executor(plan, question)
+            except Exception as e:
+                self.logger.error(f"Failed to execute plan: {e}")
+                answer_without_context = "I'm sorry, I couldn't find an answer to your question due to an internal error."
+                failed = True
+            memory.append({"role": "assistant", "content": f"<agent_answer>{answer_without_context}</agent_answer>"})
+            answer = await self.response_generator(memory)
+        else:
+            answer = None
+            if draft is not None:
+                try:
+                    answer = await draft
+                except Exception as e:
+                    self.logger.warning(f"Speculative draft failed, answering normally: {e}")
+            if answer is None:
+                answer = await self.response_generator(memory)
+        memory.append({"role": "assistant", "content": answer})
+        await self._compact_memory(memory)
+        if use_cache and not failed:
+            self.semantic_cache.set(question, self.available_tools, answer)
+        return answer
+
+    async def _async_draft(self, messages: list) -> str:
+        with metrics.stage("speculative_draft"):
+            return await self.router.async_call("speculative_draft", messages=messages)
+
+    async def _compact_memory(self, memory: ConversationMemory):
+        """
+        Async version of memory.compact, summarizing evicted turns without blocking the loop.
+        """
+        evicted = memory.evict()
+        if evicted and memory.summarizer is not None:
+            memory.summary = await self.async_summarize(memory.summary, evicted)
+
+    async def async_summarize(self, summary: str, messages: list) -> str:
+        """
+        Folds messages evicted from memory into the running conversation summary.
+        """
+        with metrics.stage("summarizer"):
+            response = await self.router.async_call("summarizer", self._summarizer_prompt(summary, messages))
+        return extract_xml(response, "summary").strip() or response.strip()
+
+    async def planner(self, question: str):
+        """
+        Generates a plan using the Planner module.
+        """
+        prompts = self._tool_prompts(question)
+        # Plans are keyed on the whole catalog: the tools selected for a question only
+        # change with it, and a per-question key would make the cache drop every plan
+        if self.plan_cache is not None:
+            plan = self.plan_cache.get(question, self.available_tools)
+            if plan is not None:
+                self.logger.debug("Plan cache hit")
+                return plan
+        plan_prompt = prompts.planner_template.render(user_input=question)
+        with metrics.stage("planner"):
+            response = await self.router.async_call("planner", plan_prompt)
+        plan = extract_xml(response, "plan").strip()
+        if self.plan_cache is not None:
+            self.plan_cache.set(question, self.available_tools, plan)
+        return plan
+
+    async def executor(self, plan: str, question: str, max_turns: int = 5):
+        """
+        Executes the given plan, handling Thought, Action, PAUSE, and Observation loops.
+        """
+        if self.native_tools:
+            return await self._native_executor(plan, question, max_turns)
+
+        executor_messages = []
+        executor_messages.append({"role": "system", "content": self._tool_prompts(question).executor_system_prompt})
+        context = self._executor_context()
+
+        next_prompt = f"Question: {question}\nPlan: {plan}"
+
+        for _ in range(max_turns):
+            self.logger.debug("Executing turn %d of %d", _ + 1, max_turns)
+            executor_messages.append({"role": "user", "content": next_prompt})
+            if context is not None:
+                context.collapse(executor_messages)
+            with metrics.stage("executor", turn=_ + 1):
+                response = await self.router.async_call("executor", messages=executor_messages)
+            executor_messages.append({"role": "assistant", "content": response})
+            actions = self._parse_actions(response)
+
+            if actions:
+                observations = await self._run_actions(actions)
+                log_event(self.logger, logging.DEBUG, "observations", observations=observations)
+
+                prompt_observations = self._compact_observations(
+                    context, [action for action, _ in actions], observations
+                )
+                if context is not None:
+                    context.add_turn(len(executor_messages) - 1, [len(executor_messages)], observations)
+                next_prompt = self._format_observation(actions, prompt_observations)
+            else:
+                self.logger.info("No more actions, returning final response")
+                log_event(self.logger, logging.DEBUG, "executor_messages", messages=executor_messages)
+                return response
+        log_event(self.logger, logging.DEBUG, "executor_messages", messages=executor_messages)
+        self.logger.error("Max turns reached without reaching an answer.")
+        raise Exception("Max turns reached without reaching an answer.")
+
+    async def _native_executor(self, plan: str, question: str, max_turns: int = 5):
+        """
+        Async version of the native execution mode loop (see BasicAgent._native_executor_steps).
+        """
+        prompts = self._tool_prompts(question)
+        executor_messages = [
+            {"role": "system", "content": prompts.executor_system_prompt},
+            {"role": "user", "content": f"Question: {question}\nPlan: {plan}"},
+        ]
+        context = self._executor_context()
+
+        for _ in range(max_turns):
+            self.logger.debug("Executing turn %d of %d", _ + 1, max_turns)
+            if context is not None:
+                context.collapse(executor_messages)
+            with metrics.stage("executor", turn=_ + 1):
+                response = await self.router.async_call_with_tools("executor", executor_messages, prompts.tool_schemas)
+            executor_messages.append(response.message())
+
+            if not response.tool_calls:
+                self.logger.info("No more tool calls, returning final response")
+                return response.content
+
+            errors = [self._tool_call_error(call) for call in response.tool_calls]
+            actions = [(call.name, call.arguments) for call, error in zip(response.tool_calls, errors) if error is None]
+            results = iter(await self._run_actions(actions))
+            observations = [
+                {"error": error} if error is not None else next(results)
+                for error in errors
+            ]
+            self._append_tool_messages(executor_messages, context, response.tool_calls, observations)
+        self.logger.error("Max turns reached without reaching an answer.")
+        raise Exception("Max turns reached without reaching an answer.")
+
+    async def _run_actions(self, actions: list):
+        """
+        Runs all the actions of a turn concurrently, at most config.agent.max_tool_workers at a time.
+
+        Coroutine tools are awaited on this loop, sync tools run inline, and thread and
+        process tools on the shared pools. A tool that exceeds its timeout is cancelled and
+        gets an error observation.
+
+        Returns:
+            list: One observation per action, in the same order as the actions.
+        """
+        semaphore = asyncio.Semaphore(self.config.agent.max_tool_workers)
+        loop = asyncio.get_running_loop()
+
+        async def run(action, parameters):
+            tool = self.executor_tools[action]
+            hit, observation = tool_result_cache.lookup(tool, parameters)
+            if hit:
+                self.logger.debug("Tool cache hit for %s", action)
+                return observation
+            async with semaphore:
+                log_event(self.logger, logging.INFO, "tool_call", tool=action, parameters=parameters)
+                kind = execution_kind(tool)
+                if kind == "sync":
+                    observation = tool.execute(**parameters)
+                else:
+                    if kind == "async":
+                        call = tool.execute(**parameters)
+                    elif kind == "thread":
+                        pool = tool_executors.thread_pool(self.config.agent.max_tool_workers)
+                        call = loop.run_in_executor(pool, execute_tool, tool, parameters)
+                    else:
+                        pool = tool_executors.process_pool(self.config.agent.max_process_workers)
+                        call = loop.run_in_executor(pool, execute_tool, tool, parameters)
+                    timeout = self._tool_timeout(action)
+                    try:
+                        observation = await asyncio.wait_for(call, timeout)
+                    except asyncio.TimeoutError:
+                        self.logger.error(f"{action} timed out after {timeout}s")
+                        return {"error": f"{action} timed out after {timeout}s"}
+            tool_result_cache.store(tool, parameters, observation)
+            return observation
+
+        return await asyncio.gather(*(run(action, parameters) for action, parameters in actions))
+
+    async def response_generator(self, memory: ConversationMemory = None):
+        """
+        Generates a response to the user using a language model.
+        """
+        memory = memory if memory is not None else self.memory
+        with metrics.stage("response_generator"):
+            response = await self.router.async_call("response_generator", messages=memory.messages())
+        return response
@@ -1,161 +1,988 @@
+import contextvars
+import copy
 import json
 import logging
-import re
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Optional
 
 from prompt_templates import (
     planner_template,
     executor_template,
-    response_generator_template
+    native_executor_template,
+    response_generator_template,
+    summarizer_template
 )
+from agents.batch import BatchRun
+from agents.events import AgentEvent
+from agents.executor_context import EXPAND_TOOL_NAME, ExecutorContext, ExpandObservationTool, ObservationStore
+from agents.memory import ConversationMemory
+from agents.plan_cache import PlanCache
+from agents.semantic_cache import SemanticCache
+from agents.session_store import SessionStore
+from agents.speculation import SpeculationPolicy
 from llm_providers.base_provider import BaseProvider
-from llm_providers.openai_provider import OpenAIProvider
+from llm_providers.cached_provider import CachedProvider
+from llm_providers.hedged_provider import HedgedProvider
+from llm_providers.registry import create_provider
+from llm_providers.router import LLMRouter
+from tools.base_tool import BaseTool
+from tools.catalog import render_tools_description
+from tools.executors import execution_kind, tool_executors
+from tools.tool_index import ToolIndex
+from tools.tool_cache import tool_result_cache
+from utils import metrics
+from utils.cache import LRUCache
+from utils.action_stream import ActionStreamParser
 from utils.extract_xml import extract_xml
-from utils.logging import setup_logging
+from utils.logging import log_event, setup_logging
+from utils.react_parser import parse_react_response
+from utils.templates import CompiledTemplate, compile_template
 from config.config import Config, load_config
 
 
+@dataclass
+class ToolPrompts:
+    """
+    The prompts rendered for a set of tools: the whole catalog, or the tools selected for a question.
+    """
+    tools: list
+    available_tools: str
+    planner_template: CompiledTemplate
+    executor_system_prompt: str
+    tool_schemas: Optional[list]
+    response_generator_prompt: str
+
+
 class BasicAgent:
-    def __init__(self, tools: list, config: Config = None):
+    def __init__(
+        self,
+        tools: list,
+        config: Config = None,
+        llm_provider: BaseProvider = None,
+        session_store: SessionStore = None
+    ):
         """
         Initialize the BasicAgent with tools and configuration.
+
+        The agent's setup (tools, prompts, provider, caches) is immutable after construction,
+        so one agent can serve many conversations from many threads when each call names its
+        session. Without a session id, calls continue the agent's own conversation.
         
         Args:
             tools (list): List of available tools
             config (Config, optional): Configuration object. If None, loads default config.
+            llm_provider (BaseProvider, optional): Provider to use for LLM calls. If None, the
+                provider named by config.llm.provider is created. Passing one lets several agents
+                share it. Stages routed to other providers in config.llm.routes use those.
+            session_store (SessionStore, optional): Where session conversations are kept. If None,
+                one is created from config.sessions on first use.
         """
         # Initialize configuration
         self.config = config or load_config()
         
         # Setup logging
         self.logger = setup_logging(self.config)
+
+        # Setup metrics sinks
+        metrics.configure(self.config.metrics)
+        self.last_request_metrics = None
         
         # Initialize tools
         self.tools = {tool.name: tool for tool in tools}
+        # Fail now rather than on the first call if a tool declares an invalid execution kind
+        for tool in self.tools.values():
+            execution_kind(tool)
+
+        # Large tool results are kept out of the executor prompt, and the executor gets a
+        # tool to read them back
+        self.observation_store = None
+        self.executor_tools = self.tools
+        context_config = self.config.executor_context
+        if context_config.enabled:
+            self.observation_store = ObservationStore(
+                max_entries=context_config.store_entries,
+                ttl=context_config.store_ttl
+            )
+            expand_tool = ExpandObservationTool(self.observation_store, context_config.max_observation_tokens)
+            self.executor_tools = {**self.tools, EXPAND_TOOL_NAME: expand_tool}
         
         # Initialize LLM provider with config
-        self.llm_provider = OpenAIProvider(
-            api_key=self.config.llm.api_key,
-            temperature=self.config.llm.temperature,
-            max_tokens=self.config.llm.max_tokens
-        )
+        self.llm_provider = self._wrap_provider(llm_provider or create_provider(self.config.llm))
+        # Every LLM call goes through the router, which picks the provider and model per stage
+        self.router = LLMRouter(self.config.llm, self.llm_provider, wrap=self._wrap_provider)
         
-        self.messages = []
+        self.plan_cache = None
+        if self.config.plan_cache.enabled:
+            self.plan_cache = PlanCache(
+                max_entries=self.config.plan_cache.max_entries,
+                fuzzy=self.config.plan_cache.fuzzy,
+                similarity_threshold=self.config.plan_cache.similarity_threshold
+            )
 
-        self.available_tools = self._get_tools_description()
-        self.available_tools_with_params = self._get_tools_description(include_params=True)
+        self.semantic_cache = None
+        semantic_config = self.config.semantic_cache
+        if semantic_config.enabled:
+            if semantic_config.path and os.path.exists(semantic_config.path):
+                self.semantic_cache = SemanticCache.load(
+                    semantic_config.path,
+                    threshold=semantic_config.threshold,
+                    ttl=semantic_config.ttl
+                )
+            else:
+                self.semantic_cache = SemanticCache(
+                    dim=semantic_config.dim,
+                    capacity=semantic_config.capacity,
+                    threshold=semantic_config.threshold,
+                    ttl=semantic_config.ttl
+                )
+
+        self.speculation = None
+        if self.config.speculation.enabled:
+            self.speculation = SpeculationPolicy(
+                self.tools.values(),
+                threshold=self.config.speculation.threshold,
+                tool_word_weight=self.config.speculation.tool_word_weight,
+                prior=self.config.speculation.prior,
+                learning_rate=self.config.speculation.learning_rate
+            )
+
+        execution_mode = self.config.agent.execution_mode
+        if execution_mode not in ("text", "native"):
+            raise Exception(f"Unknown execution mode: {execution_mode}")
+        self.native_tools = execution_mode == "native"
+        if self.native_tools and not self.router.supports_tools("executor"):
+            providers = {type(target.provider).__name__ for target in self.router.routes["executor"]}
+            raise Exception(f"{', '.join(sorted(providers))} does not support native tool calls")
 
         self.planner_prompt = planner_template.prompt
-        self.executor_prompt = executor_template.prompt
+        # In native mode the tools go to the provider as schemas instead of being pasted into the prompt
+        self.executor_prompt = native_executor_template.prompt if self.native_tools else executor_template.prompt
+
+        # With a large catalog, prompts only describe the tools relevant to each question
+        self.tool_index = None
+        if self.config.tool_selection.enabled:
+            self.tool_index = ToolIndex(self.tools.values())
+            self._tool_selections = LRUCache(max_entries=self.config.tool_selection.cache_entries)
+        self._render_prompts()
+        self.memory = self._create_memory()
+
+        # Created on first use, shared by every turn of this agent and its forks
+        self._session_store = session_store
+        self._speculation_pool = None
+        self._lock = threading.Lock()
+
+    def _render_tool_prompts(self, tools) -> ToolPrompts:
+        """
+        Renders the prompts that describe a set of tools.
+        """
+        tools = list(tools)
+        available_tools = render_tools_description(tools)
+        # Tools only the executor uses, such as ExpandObservation, are not shown to the planner
+        executor_tools = tools + [
+            tool for name, tool in self.executor_tools.items() if name not in self.tools
+        ]
+        if self.native_tools:
+            executor_system_prompt = self.executor_prompt
+            tool_schemas = [tool.schema() for tool in executor_tools]
+        else:
+            executor_system_prompt = compile_template(self.executor_prompt).render(
+                available_tools_with_params=render_tools_description(executor_tools, include_params=True)
+            )
+            tool_schemas = None
+        return ToolPrompts(
+            tools=[tool.name for tool in tools],
+            available_tools=available_tools,
+            # Fill in the tools once; only the question changes between calls
+            planner_template=compile_template(self.planner_prompt).partial(available_tools=available_tools),
+            executor_system_prompt=executor_system_prompt,
+            tool_schemas=tool_schemas,
+            response_generator_prompt=compile_template(response_generator_template.prompt).render(
+                available_tools=available_tools
+            ),
+        )
+
+    def _render_prompts(self):
+        """
+        Renders the prompts describing the whole tool catalog.
+        """
+        self._all_tool_prompts = self._render_tool_prompts(self.tools.values())
+        self.available_tools = self._all_tool_prompts.available_tools
+        self.available_tools_with_params = self._get_tools_description(include_params=True)
+        self._planner_template = self._all_tool_prompts.planner_template
+        self.executor_system_prompt = self._all_tool_prompts.executor_system_prompt
+        self.tool_schemas = self._all_tool_prompts.tool_schemas
+        self.response_generator_prompt = self._all_tool_prompts.response_generator_prompt
+
+    def _tool_prompts(self, question: str) -> ToolPrompts:
+        """
+        Returns the prompts for a question: the config.tool_selection.top_k most relevant
+        tools when tool selection is on and the catalog is larger, else the whole catalog.
+        A question sharing no word with any tool also gets the whole catalog, rather than
+        no tools at all. Selections are cached per question until the catalog changes.
+        """
+        top_k = self.config.tool_selection.top_k
+        if self.tool_index is None or len(self.tool_index) <= top_k:
+            return self._all_tool_prompts
+        key = f"{self.tool_index.version}\x00{question}"
+        prompts = self._tool_selections.get(key)
+        if prompts is None:
+            selected = self.tool_index.search(question, top_k)
+            prompts = self._render_tool_prompts(selected) if selected else self._all_tool_prompts
+            self._tool_selections.set(key, prompts)
+        return prompts
+
+    def add_tool(self, tool: BaseTool):
+        """
+        Adds a tool to the agent, or replaces the tool of the same name. The tool index is
+        updated in place; only the whole-catalog prompts are rendered again. Forks made
+        before the call share the tools but keep their prompts.
+        """
+        execution_kind(tool)
+        self.tools[tool.name] = tool
+        if self.executor_tools is not self.tools:
+            self.executor_tools[tool.name] = tool
+        if self.tool_index is not None:
+            self.tool_index.add(tool)
+        if self.speculation is not None:
+            self.speculation.add_tool(tool)
+        self._render_prompts()
+
+    def _wrap_provider(self, provider: BaseProvider) -> BaseProvider:
+        """
+        Adds hedging and the response cache to a provider, as enabled in the config. The cache
+        goes outside so that cache hits do not count in the hedging latencies.
+        """
+        if self.config.hedging.enabled:
+            provider = HedgedProvider.from_config(provider, self.config.hedging)
+        if self.config.cache.enabled:
+            provider = CachedProvider.from_config(provider, self.config.cache)
+        return provider
+
+    @property
+    def messages(self):
+        """
+        The conversation as sent to the response generator.
+        """
+        return self.memory.messages()
+
+    @property
+    def session_store(self) -> SessionStore:
+        with self._lock:
+            if self._session_store is None:
+                self._session_store = SessionStore.from_config(self.config.sessions)
+            return self._session_store
+
+    def _load_session(self, session_id: str) -> ConversationMemory:
+        """
+        Returns the memory of a session, empty if the session is new or was evicted.
+        """
+        memory = self._create_memory()
+        state = self.session_store.load(session_id)
+        if state is not None:
+            memory.load(state)
+        return memory
+
+    def fork(self):
+        """
+        Returns an agent with an empty conversation that shares this agent's config, tools,
+        provider, caches, session store and draft pool. Forks are cheap and can run on other threads.
+        """
+        if self.speculation is not None:
+            self._get_speculation_pool()
+        # Created now so that every fork keeps its sessions in the same store
+        self.session_store
+        forked = copy.copy(self)
+        forked.memory = forked._create_memory()
+        forked.last_request_metrics = None
+        return forked
+
+    def run_batch(
+        self,
+        questions,
+        max_workers: int = 4,
+        ordered: bool = True,
+        checkpoint_path: str = None
+    ) -> BatchRun:
+        """
+        Answers many questions, each in its own conversation, with bounded concurrency.
+
+        Args:
+            questions: A JSONL file path (one question string or {"question": ...} object per
+                line) or an iterable of question strings. Files are read lazily.
+            max_workers (int): Maximum number of questions answered concurrently.
+            ordered (bool): Yield results in input order. If False, yield them as they complete.
+            checkpoint_path (str, optional): JSONL file that receives every result as it
+                finishes. Questions already recorded there are skipped, so rerunning the same
+                call resumes an interrupted job.
+
+        Returns:
+            BatchRun: Iterate over it to run the batch and get BatchResult objects. Its stats
+            attribute reports completed, failed and skipped counts and throughput.
+        """
+        return BatchRun(
+            self,
+            questions,
+            max_workers=max_workers,
+            ordered=ordered,
+            checkpoint_path=checkpoint_path
+        )
+
+    def _create_memory(self):
+        """
+        Creates the conversation memory. Its size is only bounded when config.memory is enabled.
+        """
+        memory_config = self.config.memory
+        if not memory_config.enabled:
+            return ConversationMemory(self.response_generator_prompt)
+        return ConversationMemory(
+            self.response_generator_prompt,
+            max_tokens=memory_config.max_tokens,
+            recent_turns=memory_config.recent_turns,
+            summarizer=self.summarize if memory_config.summarize else None
+        )
+
+    def _summarizer_prompt(self, summary: str, messages: list) -> str:
+        new_messages = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        return compile_template(summarizer_template.prompt).render(
+            max_words=self.config.memory.summary_max_words,
+            summary=summary or "(empty)",
+            new_messages=new_messages
+        )
+
+    def summarize(self, summary: str, messages: list) -> str:
+        """
+        Folds messages evicted from memory into the running conversation summary.
 
-        self.response_generator_prompt = response_generator_template.prompt.format(available_tools=self.available_tools)
-        self.messages.append({"role": "system", "content": self.response_generator_prompt})
+        Args:
+            summary (str): The current summary, empty if there is none yet.
+            messages (list): The evicted messages, oldest first.
 
-        self.action_re = re.compile(r'^Action: ({.*})$')
+        Returns:
+            str: The updated summary.
+        """
+        with metrics.stage("summarizer"):
+            response = self.router.call("summarizer", self._summarizer_prompt(summary, messages))
+        return extract_xml(response, "summary").strip() or response.strip()
     
-    def __call__(self, question):
-        self.messages.append({"role": "user", "content": question})
+    def __call__(self, question, session_id: str = None):
+        """
+        Answers a question.
+
+        Args:
+            question (str): The user question.
+            session_id (str, optional): Conversation to continue. Its state is loaded from the
+                session store and saved back after the answer. Requests of the same session are
+                serialized. Without it, the agent's own conversation is used.
+
+        Returns:
+            str: The answer.
+        """
+        if session_id is None:
+            return self._respond(question, self.memory)
+        with self.session_store.lock(session_id):
+            memory = self._load_session(session_id)
+            answer = self._respond(question, memory)
+            self.session_store.save(session_id, memory.to_dict())
+        return answer
+
+    def _respond(self, question, memory: ConversationMemory):
+        with metrics.collect() as request_metrics:
+            answer = self._answer(question, memory)
+        self._finish_request(request_metrics)
+        return answer
+
+    def _finish_request(self, request_metrics):
+        """
+        Keeps the metrics of the request that just finished and refreshes the Prometheus file.
+        """
+        self.last_request_metrics = request_metrics
+        log_event(self.logger, logging.DEBUG, "request_metrics", totals=request_metrics.totals())
+        if self.config.metrics.prometheus_path:
+            metrics.PrometheusTextExporter().write(self.config.metrics.prometheus_path)
+
+    def _uses_semantic_cache(self, memory: ConversationMemory) -> bool:
+        """
+        Whether the next question of a conversation can be answered from, and stored in,
+        the semantic cache. Must be called before the question is added to the memory.
+        """
+        if self.semantic_cache is None:
+            return False
+        return not (self.config.semantic_cache.standalone_only and (memory.turns or memory.summary))
+
+    def _cached_answer(self, question, memory: ConversationMemory, use_cache: bool):
+        """
+        Returns the semantic cache's answer to a question and records it in the memory, or
+        None on a miss.
+        """
+        if not use_cache:
+            return None
+        answer = self.semantic_cache.get(question, self.available_tools)
+        if answer is not None:
+            self.logger.debug("Semantic cache hit")
+            memory.append({"role": "assistant", "content": answer})
+        return answer
+
+    def _answer(self, question, memory: ConversationMemory):
+        memory.set_system_prompt(self._tool_prompts(question).response_generator_prompt)
+        use_cache = self._uses_semantic_cache(memory)
+        memory.append({"role": "user", "content": question})
+        answer = self._cached_answer(question, memory, use_cache)
+        if answer is not None:
+            memory.compact()
+            return answer
+        failed = False
+        draft = self._start_draft(question, memory)
         plan = self.planner(question)
-        self.logger.debug(f"Plan: {plan}")
+        log_event(self.logger, logging.DEBUG, "plan", plan=plan)
+        if self.speculation is not None:
+            self.speculation.record(plan == "", draft is not None)
         if plan != "":
+            if draft is not None:
+                # The answer needs tools: a draft still queued is dropped, a running one ignored
+                draft.cancel()
             try:
                 answer_without_context = self.executor(plan, question)
             except Exception as e:
                 self.logger.error(f"Failed to execute plan: {e}")
                 answer_without_context = "I'm sorry, I couldn't find an answer to your question due to an internal error."
-            self.messages.append({"role": "assistant", "content": f"<agent_answer>{answer_without_context}</agent_answer>"})
-        answer = self.response_generator()
-        self.messages.append({"role": "assistant", "content": answer})
+                failed = True
+            memory.append({"role": "assistant", "content": f"<agent_answer>{answer_without_context}</agent_answer>"})
+            answer = self.response_generator(memory)
+        else:
+            answer = self._draft_answer(draft) if draft is not None else None
+            if answer is None:
+                answer = self.response_generator(memory)
+        memory.append({"role": "assistant", "content": answer})
+        memory.compact()
+        if use_cache and not failed:
+            self.semantic_cache.set(question, self.available_tools, answer)
         return answer
+
+    def _start_draft(self, question, memory: ConversationMemory):
+        """
+        Starts drafting a tool-free answer in the background if the speculation policy
+        expects an empty plan. With an empty plan the response generator would get exactly
+        these messages, so the draft is the answer.
+
+        Returns:
+            Future: The draft, or None when not speculating.
+        """
+        if self.speculation is None or not self.speculation.should_speculate(question):
+            return None
+        self.logger.debug("Drafting an answer while planning")
+        # Copying the context keeps the draft's LLM call in this request's metrics
+        context = contextvars.copy_context()
+        return self._get_speculation_pool().submit(context.run, self._draft, memory.messages())
+
+    def _draft(self, messages: list) -> str:
+        with metrics.stage("speculative_draft"):
+            return self.router.call("speculative_draft", messages=messages)
+
+    def _draft_answer(self, draft):
+        """
+        Returns the draft's answer, or None if drafting failed.
+        """
+        try:
+            return draft.result()
+        except Exception as e:
+            self.logger.warning(f"Speculative draft failed, answering normally: {e}")
+            return None
+
+    def stream(self, question, session_id: str = None):
+        """
+        Answers the question like __call__, yielding progress as it happens.
+
+        Yields:
+            AgentEvent: plan, then action/observation for every tool call, then the final
+            answer as token events followed by a single answer event.
+        """
+        if session_id is None:
+            yield from self._stream(question, self.memory)
+            return
+        yield from self._stream_session(question, session_id)
+
+    def _stream_session(self, question, session_id: str):
+        """
+        Streams the answer of a session request. The request runs on a thread of its own,
+        which holds the session's lock and hands the events over one at a time: it computes
+        the next event only once the consumer has taken the previous one, and saves the
+        session only once every event was taken. Closing the generator stops the request
+        after its current step, without saving the session.
+
+        Other requests of the session wait until the stream is finished or closed, so close
+        it before making one from the code consuming it.
+        """
+        events = queue.Queue()
+        taken = threading.Semaphore(0)
+        stop = threading.Event()
+
+        def hand_over(event) -> bool:
+            events.put(event)
+            while not taken.acquire(timeout=0.1):
+                if stop.is_set():
+                    return False
+            return True
+
+        def produce():
+            try:
+                with self.session_store.lock(session_id):
+                    memory = self._load_session(session_id)
+                    steps = self._stream(question, memory)
+                    try:
+                        for event in steps:
+                            if not hand_over(event):
+                                return
+                    finally:
+                        steps.close()
+                    if stop.is_set():
+                        return
+                    self.session_store.save(session_id, memory.to_dict())
+            except Exception as e:
+                events.put(e)
+            finally:
+                events.put(None)
+
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(produce,),
+            name="agent-stream",
+            daemon=True
+        ).start()
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    return
+                if isinstance(event, Exception):
+                    raise event
+                taken.release()
+                yield event
+        finally:
+            stop.set()
+
+    def _stream(self, question, memory: ConversationMemory):
+        with metrics.collect() as request_metrics:
+            memory.set_system_prompt(self._tool_prompts(question).response_generator_prompt)
+            memory.append({"role": "user", "content": question})
+            plan = self.planner(question)
+            log_event(self.logger, logging.DEBUG, "plan", plan=plan)
+            if self.speculation is not None:
+                self.speculation.record(plan == "", False)
+            yield AgentEvent("plan", plan)
+            if plan != "":
+                try:
+                    answer_without_context = yield from self._executor_steps(plan, question)
+                except Exception as e:
+                    self.logger.error(f"Failed to execute plan: {e}")
+                    yield AgentEvent("error", str(e))
+                    answer_without_context = "I'm sorry, I couldn't find an answer to your question due to an internal error."
+                memory.append({"role": "assistant", "content": f"<agent_answer>{answer_without_context}</agent_answer>"})
+            chunks = []
+            for chunk in self.response_generator_stream(memory):
+                chunks.append(chunk)
+                yield AgentEvent("token", chunk)
+            answer = "".join(chunks)
+            memory.append({"role": "assistant", "content": answer})
+            memory.compact()
+        self._finish_request(request_metrics)
+        yield AgentEvent("answer", answer)
     
     def _get_tools_description(self, include_params: bool = False):
         """
         Returns a description of the available tools.
         """
-        tools_description = []
-        for tool in self.tools.values():
-            tool_info = tool.info()
-            params = ", ".join([f"{param} ({type_})" for param, type_ in tool_info["input_params"].items()])
-            outputs = ", ".join([f"{field} ({type_})" for field, type_ in tool_info["output_format"].items()])
-            tool_description = f"* {tool_info['name']}:\n  - Description: {tool_info['description']}"
-            if include_params:
-                tool_description += f"\n  - Parameters: {params if params else 'None'}"
-                tool_description += f"\n  - Output Format: {outputs if outputs else 'None'}"
-            tools_description.append(tool_description)
-        return "\n\n".join(tools_description)
+        return render_tools_description(self.tools.values(), include_params=include_params)
+
+    def _parse_actions(self, response: str):
+        """
+        Finds every Action of an executor response, up to PAUSE.
+
+        Returns:
+            list: (tool name, parameters) tuples in the order they appear. Empty if the
+            response has no action.
+        """
+        actions = []
+        for parsed in parse_react_response(response).actions:
+            if parsed.error is not None:
+                self.logger.error(f"Failed to parse action JSON: {parsed.raw}. Error: {parsed.error}")
+                raise Exception(f"Failed to parse action JSON: {parsed.raw}. Error: {parsed.error}")
+            actions.append((self._validate_action(parsed.tool), parsed.parameters))
+        log_event(self.logger, logging.DEBUG, "actions", actions=actions)
+        return actions
+
+    def _decode_action(self, action_json: str):
+        """
+        Parses and validates the JSON of a single Action.
+
+        Returns:
+            tuple: (tool name, parameters).
+        """
+        try:
+            action_data = json.loads(action_json)
+            action = action_data.get("tool")
+            parameters = action_data.get("parameters", {})
+        except json.JSONDecodeError as e:
+            self.logger.error(f"Failed to parse action JSON: {action_json}. Error: {e}")
+            raise Exception(f"Failed to parse action JSON: {action_json}. Error: {e}")
+
+        return self._validate_action(action), parameters
+
+    def _validate_action(self, action: str) -> str:
+        """
+        Returns the tool name of an action, raising if no such tool is available.
+        """
+        if action not in self.executor_tools:
+            self.logger.error(f"Unknown action: {action}")
+            raise Exception(f"Unknown action: {action}")
+        return action
+
+    def _submit_action(self, action: str, parameters: dict) -> Future:
+        """
+        Starts a tool on the shared executor matching its execution kind, or returns its
+        memoized result if the tool is cacheable. Sync tools run before this returns.
+
+        Returns:
+            Future: The pending observation.
+        """
+        tool = self.executor_tools[action]
+        hit, observation = tool_result_cache.lookup(tool, parameters)
+        if hit:
+            self.logger.debug("Tool cache hit for %s", action)
+            future = Future()
+            future.set_result(observation)
+            return future
+
+        log_event(self.logger, logging.INFO, "tool_call", tool=action, parameters=parameters)
+        future = tool_executors.submit(
+            tool,
+            parameters,
+            max_threads=self.config.agent.max_tool_workers,
+            max_processes=self.config.agent.max_process_workers
+        )
+
+        def store(done):
+            if not done.cancelled() and done.exception() is None:
+                tool_result_cache.store(tool, parameters, done.result())
+        future.add_done_callback(store)
+        return future
+
+    def _tool_timeout(self, action: str):
+        """
+        Returns the seconds a tool may run: its own timeout, else config.agent.tool_timeout.
+        """
+        timeout = self.executor_tools[action].timeout
+        return timeout if timeout is not None else self.config.agent.tool_timeout
+
+    def _get_speculation_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._speculation_pool is None:
+                self._speculation_pool = ThreadPoolExecutor(
+                    max_workers=self.config.speculation.max_workers,
+                    thread_name_prefix="agent-draft"
+                )
+            return self._speculation_pool
+
+    def _run_actions(self, actions: list, futures: list = None):
+        """
+        Runs all the actions of a turn concurrently, each on the executor of its kind.
+
+        A tool that exceeds its timeout gets an error observation instead of stalling the
+        turn, and is cancelled if it has not started yet (async tools are cancelled in any
+        case). Other tool errors are raised.
+
+        Args:
+            actions (list): (tool name, parameters) tuples.
+            futures (list, optional): Futures of actions already started with _submit_action.
+
+        Returns:
+            list: One observation per action, in the same order as the actions.
+        """
+        if futures is None:
+            # Sync tools run inline, so start the others first to overlap with them
+            futures = [None] * len(actions)
+            order = sorted(
+                range(len(actions)),
+                key=lambda i: execution_kind(self.executor_tools[actions[i][0]]) == "sync"
+            )
+            for i in order:
+                futures[i] = self._submit_action(*actions[i])
+
+        started = time.monotonic()
+        observations = []
+        for (action, _), future in zip(actions, futures):
+            timeout = self._tool_timeout(action)
+            remaining = None if timeout is None else max(0.0, started + timeout - time.monotonic())
+            try:
+                observations.append(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                future.cancel()
+                self.logger.error(f"{action} timed out after {timeout}s")
+                observations.append({"error": f"{action} timed out after {timeout}s"})
+        return observations
+
+    def _stream_executor_turn(self, executor_messages: list):
+        """
+        Runs one executor turn on a streamed response.
+
+        Each tool starts as soon as its Action line is complete, while the model is still
+        writing, and the stream is closed at PAUSE so no tokens are read past it.
+
+        Returns:
+            tuple: (response text, actions, futures of the started actions).
+        """
+        parser = ActionStreamParser()
+        actions, futures = [], []
+        chunks = self.router.stream("executor", messages=executor_messages)
+        try:
+            for chunk in chunks:
+                for action_json in parser.feed(chunk):
+                    action, parameters = self._decode_action(action_json)
+                    actions.append((action, parameters))
+                    futures.append(self._submit_action(action, parameters))
+                if parser.paused:
+                    self.logger.debug("PAUSE reached, closing the executor stream")
+                    break
+            for action_json in parser.finish():
+                # Never completed: raises like the same response would unstreamed
+                self._decode_action(action_json)
+        finally:
+            chunks.close()
+        log_event(self.logger, logging.DEBUG, "actions", actions=actions)
+        return parser.text, actions, futures
+
+    @staticmethod
+    def _format_observation(actions: list, observations: list) -> str:
+        """
+        Builds the Observation prompt for a turn. A single action keeps the plain tool output,
+        several actions are batched into one ordered list.
+        """
+        if len(actions) == 1:
+            return f"Observation: {json.dumps(observations[0])}"
+        batch = [
+            {"tool": action, "parameters": parameters, "result": observation}
+            for (action, parameters), observation in zip(actions, observations)
+        ]
+        return f"Observation: {json.dumps(batch)}"
+
+    def _executor_context(self) -> Optional[ExecutorContext]:
+        """
+        Returns the context of an executor run, or None when config.executor_context is disabled.
+        """
+        if self.observation_store is None:
+            return None
+        context_config = self.config.executor_context
+        return ExecutorContext(
+            self.observation_store,
+            max_observation_tokens=context_config.max_observation_tokens,
+            preview_chars=context_config.preview_chars,
+            keep_turns=context_config.keep_turns,
+            max_context_tokens=context_config.max_context_tokens
+        )
+
+    @staticmethod
+    def _compact_observations(context: Optional[ExecutorContext], tools: list, observations: list) -> list:
+        """
+        Returns the observations as they go into the executor prompt: large ones are
+        replaced with a preview. ExpandObservation results are already bounded.
+        """
+        if context is None:
+            return observations
+        return [
+            observation if tool == EXPAND_TOOL_NAME else context.compact(observation)
+            for tool, observation in zip(tools, observations)
+        ]
+
+    def close(self):
+        """
+        Releases the draft thread pool and saves the semantic cache to
+        config.semantic_cache.path if it has new answers. Tools run on pools shared by every
+        agent, which stay up until the interpreter exits.
+        """
+        if self.semantic_cache is not None and self.semantic_cache.dirty and self.config.semantic_cache.path:
+            self.semantic_cache.save(self.config.semantic_cache.path)
+        if self._speculation_pool is not None:
+            self._speculation_pool.shutdown(wait=False, cancel_futures=True)
+            self._speculation_pool = None
 
     def planner(self, question: str):
         """
         Generates a plan using the Planner module.
         """
-        plan_prompt = self.planner_prompt.format(available_tools=self.available_tools, user_input=question)
-        response = self.llm_provider.llm_call(plan_prompt, model=self.config.llm.model)
-        plan = extract_xml(response, "plan")
-        return plan.strip()
+        prompts = self._tool_prompts(question)
+        # Plans are keyed on the whole catalog: the tools selected for a question only
+        # change with it, and a per-question key would make the cache drop every plan
+        if self.plan_cache is not None:
+            plan = self.plan_cache.get(question, self.available_tools)
+            if plan is not None:
+                self.logger.debug("Plan cache hit")
+                return plan
+        plan_prompt = prompts.planner_template.render(user_input=question)
+        with metrics.stage("planner"):
+            response = self.router.call("planner", plan_prompt)
+        plan = extract_xml(response, "plan").strip()
+        if self.plan_cache is not None:
+            self.plan_cache.set(question, self.available_tools, plan)
+        return plan
 
     def executor(self, plan: str, question: str, max_turns: int = 5):
         """
         Executes the given plan, handling Thought, Action, PAUSE, and Observation loops.
         """
+        steps = self._executor_steps(plan, question, max_turns)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    def _executor_steps(self, plan: str, question: str, max_turns: int = 5):
+        """
+        Generator behind executor. Yields an action event for every tool call and an
+        observation event for its result, and returns the executor's final response.
+        """
+        if self.native_tools:
+            return (yield from self._native_executor_steps(plan, question, max_turns))
+
         executor_messages = []
-        system_prompt = self.executor_prompt.format(
-            available_tools_with_params=self.available_tools_with_params
-        )
-        executor_messages.append({"role": "system", "content": system_prompt})
+        executor_messages.append({"role": "system", "content": self._tool_prompts(question).executor_system_prompt})
+        context = self._executor_context()
         
         next_prompt = f"Question: {question}\nPlan: {plan}"
 
         for _ in range(max_turns):
-            self.logger.debug(f"Executing turn {_+1} of {max_turns}")
+            self.logger.debug("Executing turn %d of %d", _ + 1, max_turns)
             executor_messages.append({"role": "user", "content": next_prompt})
-            response = self.llm_provider.llm_call(
-                messages=executor_messages,
-                model=self.config.llm.model
-            )
+            if context is not None:
+                context.collapse(executor_messages)
+            with metrics.stage("executor", turn=_ + 1):
+                if self.config.agent.stream_executor:
+                    response, actions, futures = self._stream_executor_turn(executor_messages)
+                else:
+                    response = self.router.call("executor", messages=executor_messages)
+                    actions, futures = self._parse_actions(response), None
             executor_messages.append({"role": "assistant", "content": response})
-            # Match JSON-like Action
-            actions = [
-                self.action_re.match(line.strip())
-                for line in response.split('\n')
-                if self.action_re.match(line.strip())
-            ]
-            self.logger.debug(f"Actions: {actions}")
-            
+
             if actions:
-                # Extract and parse the first action
-                action_json = actions[0].group(1)
-                try:
-                    action_data = json.loads(action_json)
-                    action = action_data.get("tool")
-                    parameters = action_data.get("parameters", {})
-                except json.JSONDecodeError as e:
-                    self.logger.error(f"Failed to parse action JSON: {action_json}. Error: {e}")
-                    raise Exception(f"Failed to parse action JSON: {action_json}. Error: {e}")
-
-                # Validate and execute the action
-                if action not in self.tools:
-                    self.logger.error(f"Unknown action: {action}")
-                    raise Exception(f"Unknown action: {action}")
-
-                self.logger.info(f"Running {action} with parameters {parameters}")
-
-                observation = self.tools[action].execute(**parameters)
-                self.logger.debug(f"Observation: {observation}")                
-                
-                # Update the prompt with the observation
-                next_prompt = f"Observation: {json.dumps(observation)}"
+                for action, parameters in actions:
+                    yield AgentEvent("action", {"tool": action, "parameters": parameters})
+                observations = self._run_actions(actions, futures)
+                log_event(self.logger, logging.DEBUG, "observations", observations=observations)
+                for (action, _), observation in zip(actions, observations):
+                    yield AgentEvent("observation", {"tool": action, "result": observation})
+
+                # Update the prompt with the observations
+                prompt_observations = self._compact_observations(
+                    context, [action for action, _ in actions], observations
+                )
+                if context is not None:
+                    # The observations go into the next user message
+                    context.add_turn(len(executor_messages) - 1, [len(executor_messages)], observations)
+                next_prompt = self._format_observation(actions, prompt_observations)
             else:
                 # If no action, the response might be the final answer
                 self.logger.info("No more actions, returning final response")
-                self.logger.debug(f"Executor messages: {executor_messages}")
+                log_event(self.logger, logging.DEBUG, "executor_messages", messages=executor_messages)
                 return response
-        self.logger.debug(f"Executor messages: {executor_messages}")
+        log_event(self.logger, logging.DEBUG, "executor_messages", messages=executor_messages)
+        self.logger.error("Max turns reached without reaching an answer.")
+        raise Exception("Max turns reached without reaching an answer.")
+
+
+    def _native_executor_steps(self, plan: str, question: str, max_turns: int = 5):
+        """
+        Executor loop of the native execution mode. The model requests tools through the
+        provider's tool calling, several in one response if they are independent, and gets
+        each result back as a tool message. Calls to unknown tools or with malformed
+        arguments get an error result, so the model can correct them on the next turn.
+        """
+        prompts = self._tool_prompts(question)
+        executor_messages = [
+            {"role": "system", "content": prompts.executor_system_prompt},
+            {"role": "user", "content": f"Question: {question}\nPlan: {plan}"},
+        ]
+        context = self._executor_context()
+
+        for _ in range(max_turns):
+            self.logger.debug("Executing turn %d of %d", _ + 1, max_turns)
+            if context is not None:
+                context.collapse(executor_messages)
+            with metrics.stage("executor", turn=_ + 1):
+                response = self.router.call_with_tools("executor", executor_messages, prompts.tool_schemas)
+            executor_messages.append(response.message())
+
+            if not response.tool_calls:
+                self.logger.info("No more tool calls, returning final response")
+                return response.content
+
+            errors = [self._tool_call_error(call) for call in response.tool_calls]
+            actions = [(call.name, call.arguments) for call, error in zip(response.tool_calls, errors) if error is None]
+            for call in response.tool_calls:
+                yield AgentEvent("action", {"tool": call.name, "parameters": call.arguments})
+            results = iter(self._run_actions(actions))
+            observations = []
+            for call, error in zip(response.tool_calls, errors):
+                observation = {"error": error} if error is not None else next(results)
+                observations.append(observation)
+                yield AgentEvent("observation", {"tool": call.name, "result": observation})
+            self._append_tool_messages(executor_messages, context, response.tool_calls, observations)
         self.logger.error("Max turns reached without reaching an answer.")
         raise Exception("Max turns reached without reaching an answer.")
 
+    def _tool_call_error(self, call):
+        """
+        Returns why a native tool call cannot run, or None if it can.
+        """
+        if call.error is not None:
+            self.logger.error(f"Invalid arguments for {call.name}: {call.error}")
+            return call.error
+        if call.name not in self.executor_tools:
+            self.logger.error(f"Unknown action: {call.name}")
+            return f"Unknown tool: {call.name}"
+        return None
+
+    @staticmethod
+    def _tool_message(call, observation) -> dict:
+        return {"role": "tool", "tool_call_id": call.id, "content": json.dumps(observation)}
+
+    def _append_tool_messages(
+        self,
+        executor_messages: list,
+        context: Optional[ExecutorContext],
+        tool_calls: list,
+        observations: list
+    ):
+        """
+        Appends the tool messages of a native turn after its assistant message.
+        """
+        prompt_observations = self._compact_observations(context, [call.name for call in tool_calls], observations)
+        first = len(executor_messages)
+        for call, observation in zip(tool_calls, prompt_observations):
+            executor_messages.append(self._tool_message(call, observation))
+        if context is not None:
+            context.add_turn(first - 1, range(first, len(executor_messages)), observations)
+
     
-    def response_generator(self):
+    def response_generator(self, memory: ConversationMemory = None):
         """
         Generates a response to the user using a language model.
+
+        Args:
+            memory (ConversationMemory, optional): The conversation to answer. Defaults to the agent's own.
+        """
+        memory = memory if memory is not None else self.memory
+        with metrics.stage("response_generator"):
+            response = self.router.call("response_generator", messages=memory.messages())
+        return response
+
+    def response_generator_stream(self, memory: ConversationMemory = None):
+        """
+        Streaming version of response_generator, yielding chunks of the response as they arrive.
         """
-        response = self.llm_provider.llm_call(messages=self.messages.copy(), model=self.config.llm.model)
-        return response
\ No newline at end of file
+        memory = memory if memory is not None else self.memory
+        with metrics.stage("response_generator"):
+            yield from self.router.stream("response_generator", messages=memory.messages())
\ No newline at end of file
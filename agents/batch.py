@@ -0,0 +1,215 @@
+import asyncio
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Iterable, Iterator, Optional, Union
+
+from tools.executors import tool_executors
+
+
+logger = logging.getLogger('agent')
+
+
+@dataclass
+class BatchResult:
+    index: int
+    question: str
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+@dataclass
+class BatchStats:
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """
+        Questions answered per second.
+        """
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+
+def read_questions(source: Union[str, Iterable[str]]) -> Iterator[tuple]:
+    """
+    Lazily reads the questions of a batch.
+
+    Args:
+        source: A path to a JSONL file, where each line is a JSON string or an object with a
+            "question" field, or an iterable of question strings.
+
+    Yields:
+        tuple: (index, question). For files the index is the line number, so it stays stable
+        across runs and can be used to resume.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source) as f:
+            for index, line in enumerate(f):
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                yield index, item["question"] if isinstance(item, dict) else item
+    else:
+        yield from enumerate(source)
+
+
+class BatchRun:
+    """
+    Iterates over the results of a batch, answering each question in its own conversation.
+
+    At most max_workers questions run at a time and only a small window of questions is read
+    ahead, so input files are streamed rather than loaded. With a checkpoint path, every
+    answer is appended to that JSONL file as it finishes and questions already answered
+    there are skipped, so a crashed job can be restarted with the same arguments and retries
+    only the questions that failed or never ran.
+
+    Sync agents answer on a thread pool. Async agents all run on one background event
+    loop, so they share the pooled async HTTP client, whose connections belong to the loop
+    that opened them.
+    """
+    def __init__(
+        self,
+        agent,
+        questions: Union[str, Iterable[str]],
+        max_workers: int = 4,
+        ordered: bool = True,
+        checkpoint_path: Optional[str] = None,
+        log_every: int = 100
+    ):
+        """
+        Args:
+            agent (BasicAgent): The agent whose tools, provider and caches are shared by the batch.
+            questions: A JSONL file path or an iterable of questions (see read_questions).
+            max_workers (int): Maximum number of questions answered concurrently.
+            ordered (bool): Yield results in input order. If False, yield them as they complete.
+            checkpoint_path (str, optional): JSONL file to record results to and resume from.
+            log_every (int): Log progress and throughput every this many results.
+        """
+        self.agent = agent
+        self.questions = questions
+        self.max_workers = max_workers
+        self.ordered = ordered
+        self.checkpoint_path = checkpoint_path
+        self.log_every = log_every
+        self.stats = BatchStats()
+        self._checkpoint_lock = threading.Lock()
+        self._semaphore = None
+
+    def _completed_indices(self) -> set:
+        """
+        Returns the indices answered in the checkpoint. A last line cut short by a crash
+        is dropped from the file, so the next answers start on a line of their own.
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        completed = set()
+        with open(self.checkpoint_path, "rb+") as f:
+            lines = f.read().split(b"\n")
+            if lines[-1].strip():
+                logger.warning(f"Dropping the incomplete last line of {self.checkpoint_path}")
+                f.truncate(f.tell() - len(lines[-1]))
+            for line in lines[:-1]:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping an invalid line of {self.checkpoint_path}")
+                    continue
+                if record.get("error") is None:
+                    completed.add(record["index"])
+        return completed
+
+    def _answer(self, index: int, question: str) -> BatchResult:
+        started = time.monotonic()
+        result = BatchResult(index=index, question=question)
+        try:
+            result.answer = self.agent.fork()(question)
+        except Exception as e:
+            logger.error(f"Batch question {index} failed: {e}")
+            result.error = str(e)
+        return self._finish(result, started)
+
+    async def _async_answer(self, index: int, question: str) -> BatchResult:
+        async with self._semaphore:
+            started = time.monotonic()
+            result = BatchResult(index=index, question=question)
+            try:
+                result.answer = await self.agent.fork()(question)
+            except Exception as e:
+                logger.error(f"Batch question {index} failed: {e}")
+                result.error = str(e)
+            return self._finish(result, started)
+
+    def _finish(self, result: BatchResult, started: float) -> BatchResult:
+        """
+        Sets the elapsed time of a result and checkpoints it if it is an answer. Failed
+        questions are left out, so a resumed run retries them.
+        """
+        result.elapsed = time.monotonic() - started
+        if self.checkpoint_path and result.error is None:
+            line = json.dumps(asdict(result))
+            with self._checkpoint_lock:
+                with open(self.checkpoint_path, "a") as f:
+                    f.write(line + "\n")
+        return result
+
+    def _record(self, result: BatchResult, started: float) -> BatchResult:
+        if result.error is None:
+            self.stats.completed += 1
+        else:
+            self.stats.failed += 1
+        self.stats.elapsed = time.monotonic() - started
+        done = self.stats.completed + self.stats.failed
+        if self.log_every and done % self.log_every == 0:
+            logger.info(f"Batch progress: {done} done, {self.stats.failed} failed, {self.stats.throughput:.2f} questions/s")
+        return result
+
+    def __iter__(self) -> Iterator[BatchResult]:
+        started = time.monotonic()
+        completed = self._completed_indices()
+        window = self.max_workers * 2
+        pending = deque()
+        loop = None
+        if inspect.iscoroutinefunction(type(self.agent).__call__):
+            loop = tool_executors.event_loop()
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent-batch") as pool:
+            for index, question in read_questions(self.questions):
+                if index in completed:
+                    self.stats.skipped += 1
+                    continue
+                if loop is not None:
+                    pending.append(asyncio.run_coroutine_threadsafe(self._async_answer(index, question), loop))
+                else:
+                    pending.append(pool.submit(self._answer, index, question))
+                while len(pending) >= window:
+                    yield self._record(self._next_result(pending), started)
+            while pending:
+                yield self._record(self._next_result(pending), started)
+        self.stats.elapsed = time.monotonic() - started
+        logger.info(
+            f"Batch finished: {self.stats.completed} completed, {self.stats.failed} failed, "
+            f"{self.stats.skipped} skipped, {self.stats.throughput:.2f} questions/s"
+        )
+
+    def _next_result(self, pending: deque) -> BatchResult:
+        """
+        Removes and returns the next result: the oldest one if ordered, else the first to finish.
+        """
+        if self.ordered:
+            return pending.popleft().result()
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        future = next(iter(done))
+        pending.remove(future)
+        return future.result()
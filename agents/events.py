@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class AgentEvent:
+    """
+    Structured event emitted by BasicAgent.stream.
+
+    Types:
+        plan: the planner output (str, empty when no tools are needed).
+        action: a tool call about to run ({"tool": str, "parameters": dict}).
+        observation: the output of a tool call ({"tool": str, "result": Any}).
+        error: the plan could not be executed (str).
+        token: a chunk of the final answer (str).
+        answer: the complete final answer (str), always the last event.
+    """
+    type: str
+    data: Any = None
@@ -0,0 +1,176 @@
+import json
+import uuid
+from dataclasses import dataclass, field
+
+from tools.base_tool import BaseTool
+from utils.cache import LRUCache
+from utils.payload import truncate_payload
+from utils.react_parser import parse_react_response
+from utils.tokens import estimate_messages_tokens, estimate_tokens
+
+
+EXPAND_TOOL_NAME = "ExpandObservation"
+# Characters of a collapsed turn's results kept in its stub
+COLLAPSED_PREVIEW_CHARS = 200
+
+
+class ObservationStore:
+    """
+    Keeps full tool results out of the executor prompt, under short references. Shared by
+    the requests of an agent and bounded, so old results are eventually evicted.
+    """
+    def __init__(self, max_entries: int = 256, ttl: float = 3600):
+        self._cache = LRUCache(max_entries=max_entries, ttl=ttl)
+
+    def put(self, value) -> str:
+        ref = f"obs-{uuid.uuid4().hex[:12]}"
+        self._cache.set(ref, value)
+        return ref
+
+    def get(self, ref: str):
+        return self._cache.get(ref)
+
+
+def _describe_fields(value) -> dict:
+    """
+    Returns the shape of each top-level field, e.g. {"headlines": "list of 120 items"}.
+    """
+    if isinstance(value, list):
+        return {"items": f"list of {len(value)} items"}
+    if not isinstance(value, dict):
+        return {}
+    fields = {}
+    for key, item in value.items():
+        if isinstance(item, (list, dict)):
+            fields[str(key)] = f"{type(item).__name__} of {len(item)} items"
+        else:
+            fields[str(key)] = type(item).__name__
+    return fields
+
+
+class ExpandObservationTool(BaseTool):
+    """
+    Returns part of a tool result that was too large for the executor prompt.
+    """
+    def __init__(self, store: ObservationStore, max_tokens: int = 500):
+        super().__init__(
+            name=EXPAND_TOOL_NAME,
+            description=(
+                "Returns more of a tool result that was truncated. Pass the ref of the truncated "
+                "result, optionally a path to a field (e.g. 'headlines' or 'records.3.title') and, "
+                "for lists, an offset and limit."
+            ),
+            input_params={"ref": "str", "path": "Optional[str]", "offset": "Optional[int]", "limit": "Optional[int]"},
+            output_format={"ref": "str", "path": "str", "value": "Any", "total": "int"},
+            execution="sync"
+        )
+        self.store = store
+        self.max_tokens = max_tokens
+
+    def execute(self, **kwargs):
+        ref = kwargs["ref"]
+        value = self.store.get(ref)
+        if value is None:
+            return {"error": f"Unknown or expired ref: {ref}"}
+        path = kwargs.get("path") or ""
+        for part in filter(None, path.split(".")):
+            try:
+                value = value[int(part)] if isinstance(value, list) else value[part]
+            except (KeyError, IndexError, ValueError, TypeError):
+                return {"error": f"No field {part!r} in {path!r}"}
+
+        result = {"ref": ref, "path": path}
+        if isinstance(value, list):
+            offset = kwargs.get("offset") or 0
+            limit = kwargs.get("limit") or 20
+            result.update(total=len(value), offset=offset)
+            value = value[offset:offset + limit]
+        result["value"] = truncate_payload(value, self.max_tokens * 4)
+        return result
+
+
+@dataclass
+class _Turn:
+    assistant_index: int
+    observation_indices: list
+    ref: str
+    preview: object
+    collapsed: bool = False
+
+
+@dataclass
+class ExecutorContext:
+    """
+    Keeps the executor messages of one run within a token budget.
+
+    Tool results larger than max_observation_tokens are stored out of band and replaced
+    with a preview, the shape of their fields and a ref the model can pass to the
+    ExpandObservation tool. Turns older than the last keep_turns, or every turn but the
+    last while the messages exceed max_context_tokens, are collapsed: the assistant
+    message keeps only its actions and the results become a short stub with a ref.
+    """
+    store: ObservationStore
+    max_observation_tokens: int = 500
+    preview_chars: int = 1000
+    keep_turns: int = 2
+    max_context_tokens: int = 6000
+    turns: list = field(default_factory=list)
+
+    def compact(self, observation):
+        """
+        Returns the observation as is if it fits the budget, else a preview of it.
+        """
+        text = json.dumps(observation, default=str)
+        tokens = estimate_tokens(text)
+        if tokens <= self.max_observation_tokens:
+            return observation
+        return {
+            "truncated": True,
+            "ref": self.store.put(observation),
+            "tokens": tokens,
+            "fields": _describe_fields(observation),
+            "preview": truncate_payload(observation, self.preview_chars),
+            "hint": f"Call {EXPAND_TOOL_NAME} with this ref for more.",
+        }
+
+    def add_turn(self, assistant_index: int, observation_indices: list, observations: list):
+        """
+        Records the messages of a turn: its assistant message and the messages that carry
+        (or will carry, for the next Observation prompt) its results.
+        """
+        self.turns.append(_Turn(
+            assistant_index=assistant_index,
+            observation_indices=list(observation_indices),
+            ref=self.store.put(observations),
+            preview=truncate_payload(observations, COLLAPSED_PREVIEW_CHARS),
+        ))
+
+    def collapse(self, messages: list):
+        """
+        Collapses the turns that are no longer needed in place.
+        """
+        open_turns = [turn for turn in self.turns if not turn.collapsed]
+        for turn in open_turns[:max(0, len(open_turns) - self.keep_turns)]:
+            self._collapse_turn(messages, turn)
+        open_turns = [turn for turn in self.turns if not turn.collapsed]
+        for turn in open_turns[:-1]:
+            if estimate_messages_tokens(messages) <= self.max_context_tokens:
+                break
+            self._collapse_turn(messages, turn)
+
+    @staticmethod
+    def _collapse_turn(messages: list, turn: _Turn):
+        assistant = messages[turn.assistant_index]
+        content = assistant.get("content")
+        if content:
+            actions = parse_react_response(content).actions
+            assistant = {**assistant, "content": "\n".join(f"Action: {action.raw}" for action in actions)}
+            messages[turn.assistant_index] = assistant
+        stub = json.dumps({"collapsed": True, "ref": turn.ref, "preview": turn.preview})
+        for index in turn.observation_indices:
+            if index >= len(messages):
+                continue
+            message = messages[index]
+            content = stub if message["role"] == "tool" else f"Observation: {stub}"
+            messages[index] = {**message, "content": content}
+        turn.collapsed = True
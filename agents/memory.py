@@ -0,0 +1,120 @@
+from typing import Callable, Optional
+
+from utils.tokens import estimate_messages_tokens, estimate_tokens
+
+
+class ConversationMemory:
+    """
+    Conversation history with a bounded prompt size.
+
+    The system prompt is always kept. The most recent turns are kept verbatim, and older
+    turns are folded into a rolling summary: each compaction passes the previous summary and
+    only the newly evicted messages to the summarizer, so the summary is never rebuilt from
+    the full history. A turn starts at a user message and holds everything appended until
+    the next one.
+    """
+    def __init__(
+        self,
+        system_prompt: str,
+        max_tokens: Optional[int] = None,
+        recent_turns: Optional[int] = None,
+        summarizer: Optional[Callable[[str, list], str]] = None
+    ):
+        """
+        Args:
+            system_prompt (str): The system prompt, sent first on every call.
+            max_tokens (int, optional): Token budget for the whole message list. None means no limit.
+            recent_turns (int, optional): Maximum number of turns kept verbatim. None means no limit.
+            summarizer (callable, optional): Called as summarizer(summary, evicted_messages) and
+                returns the updated summary. Without it, evicted turns are dropped.
+        """
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.recent_turns = recent_turns
+        self.summarizer = summarizer
+        self.summary = ""
+        # Each turn is {"messages": [...], "tokens": int}
+        self.turns = []
+        self._system_tokens = estimate_messages_tokens([{"role": "system", "content": system_prompt}])
+
+    def set_system_prompt(self, system_prompt: str):
+        """
+        Replaces the system prompt, e.g. with one describing the tools picked for a question.
+        """
+        if system_prompt is self.system_prompt or system_prompt == self.system_prompt:
+            return
+        self.system_prompt = system_prompt
+        self._system_tokens = estimate_messages_tokens([{"role": "system", "content": system_prompt}])
+
+    def append(self, message: dict):
+        """
+        Adds a message to the history. A user message starts a new turn.
+        """
+        if message["role"] == "user" or not self.turns:
+            self.turns.append({"messages": [], "tokens": 0})
+        turn = self.turns[-1]
+        turn["messages"].append(message)
+        turn["tokens"] += estimate_messages_tokens([message])
+
+    def messages(self) -> list:
+        """
+        Returns the message list to send to the model: system prompt, summary of older
+        turns if any, then the recent turns.
+        """
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        for turn in self.turns:
+            messages.extend(turn["messages"])
+        return messages
+
+    def token_count(self) -> int:
+        """
+        Returns the estimated prompt size of messages().
+        """
+        summary_tokens = estimate_tokens(self.summary) + 4 if self.summary else 0
+        return self._system_tokens + summary_tokens + sum(turn["tokens"] for turn in self.turns)
+
+    def evict(self) -> list:
+        """
+        Removes the oldest turns that exceed recent_turns or the token budget. The latest
+        turn is always kept.
+
+        Returns:
+            list: The messages of the removed turns, oldest first.
+        """
+        evicted = []
+        while len(self.turns) > 1 and (
+            (self.recent_turns is not None and len(self.turns) > self.recent_turns)
+            or (self.max_tokens is not None and self.token_count() > self.max_tokens)
+        ):
+            evicted.extend(self.turns.pop(0)["messages"])
+        return evicted
+
+    def compact(self):
+        """
+        Evicts the turns that no longer fit and folds them into the summary.
+        """
+        evicted = self.evict()
+        if evicted and self.summarizer is not None:
+            self.summary = self.summarizer(self.summary, evicted)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the conversation state (summary and recent turns) as JSON-serializable data.
+        """
+        return {"summary": self.summary, "turns": [list(turn["messages"]) for turn in self.turns]}
+
+    def load(self, state: dict):
+        """
+        Replaces the conversation state with one returned by to_dict.
+        """
+        self.summary = state.get("summary", "")
+        self.turns = [
+            {"messages": list(messages), "tokens": estimate_messages_tokens(messages)}
+            for messages in state.get("turns", [])
+        ]
+
+    def clear(self):
+        self.summary = ""
+        self.turns = []
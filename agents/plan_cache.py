@@ -0,0 +1,139 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+
+class PlanCache:
+    """
+    Bounded LRU cache of planner outputs keyed by the normalized question and a fingerprint
+    of the tool descriptions the plan was made with.
+
+    When the tool set changes, every cached plan is dropped. In fuzzy mode, a question that
+    misses the exact lookup can reuse the plan of the most similar cached question with the
+    same numbers and operators in the same order, measured as the Jaccard similarity of
+    their token sets.
+    """
+    # Numbers, words and the symbols that change what is asked, e.g. "15 - 45" or "-15"
+    _token_re = re.compile(r"\d+(?:\.\d+)?|[^\W\d_]+|[-+*/^%=<>()]")
+
+    def __init__(self, max_entries: int = 512, fuzzy: bool = False, similarity_threshold: float = 0.85):
+        """
+        Args:
+            max_entries (int): Maximum number of plans kept.
+            fuzzy (bool): Whether to fall back to token-set similarity on exact misses.
+            similarity_threshold (float): Minimum similarity, in [0, 1], for a fuzzy hit.
+        """
+        self.max_entries = max_entries
+        self.fuzzy = fuzzy
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        # normalized question -> (token set, numbers and operators, plan)
+        self._entries = OrderedDict()
+        self._fingerprint = None
+        self._tools_description = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def normalize(cls, question: str) -> str:
+        """
+        Lowercases the question and splits it into words, numbers and operators, dropping
+        other punctuation and extra whitespace: "15*45" and "15 * 45?" are the same question,
+        "15 + 45" and "-15 * 45" are not.
+        """
+        return " ".join(cls._token_re.findall(question.lower()))
+
+    @staticmethod
+    def fingerprint(tools_description: str) -> str:
+        """
+        Returns a hash identifying a tool set by its rendered description.
+        """
+        return hashlib.sha256(tools_description.encode("utf-8")).hexdigest()
+
+    def _check_tools(self, tools_description: str):
+        """
+        Drops every cached plan if the tool set differs from the one they were made with.
+        Must be called with the lock held.
+        """
+        if tools_description is self._tools_description:
+            return
+        fingerprint = self.fingerprint(tools_description)
+        if fingerprint != self._fingerprint:
+            self._entries.clear()
+            self._fingerprint = fingerprint
+        self._tools_description = tools_description
+
+    def get(self, question: str, tools_description: str):
+        """
+        Looks up the plan for a question.
+
+        Args:
+            question (str): The user question.
+            tools_description (str): The tool descriptions given to the planner.
+
+        Returns:
+            str: The cached plan, or None on a miss.
+        """
+        key = self.normalize(question)
+        with self._lock:
+            self._check_tools(tools_description)
+            entry = self._entries.get(key)
+            if entry is None and self.fuzzy:
+                key, entry = self._most_similar(key.split())
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, question: str, tools_description: str, plan: str):
+        """
+        Stores the plan made for a question, evicting the least recently used plan when full.
+        """
+        key = self.normalize(question)
+        with self._lock:
+            self._check_tools(tools_description)
+            tokens = key.split()
+            self._entries[key] = (frozenset(tokens), self._operands(tokens), plan)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _operands(tokens: list) -> tuple:
+        """
+        Returns the numbers and operators among the tokens, in order.
+        """
+        return tuple(token for token in tokens if not token.isalpha())
+
+    def _most_similar(self, tokens: list):
+        """
+        Returns (key, entry) of the cached question most similar to the tokens, or (None, None)
+        if none reaches the similarity threshold. Questions whose numbers or operators differ,
+        even only in order, never match. Must be called with the lock held.
+        """
+        operands = self._operands(tokens)
+        tokens = set(tokens)
+        best_key, best_entry, best_score = None, None, self.similarity_threshold
+        for key, entry in self._entries.items():
+            cached_tokens, cached_operands, _ = entry
+            if cached_operands != operands:
+                continue
+            union = len(tokens | cached_tokens)
+            score = len(tokens & cached_tokens) / union if union else 1.0
+            if score >= best_score:
+                best_key, best_entry, best_score = key, entry, score
+        return best_key, best_entry
+
+    def stats(self) -> dict:
+        """
+        Returns the hit and miss counters and the number of cached plans.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
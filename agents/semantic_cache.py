@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the semantic cache is then unavailable
+    np = None
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[-+*/^%=<>]")
+
+# Words that do not change what a question asks for
+STOP_WORDS = frozenset({
+    "a", "about", "an", "at", "be", "can", "could", "do", "does", "for", "how", "i", "in",
+    "is", "it", "like", "me", "now", "of", "on", "please", "tell", "the", "there", "to",
+    "today", "what", "whats", "would", "you",
+})
+# Words that point at the next word's role: "from Paris to London", "not raining"
+DIRECTION_WORDS = {"from": "from", "to": "to", "into": "to", "not": "not", "no": "not"}
+NGRAM = 3
+# Weight of a character n-gram relative to a whole word
+NGRAM_WEIGHT = 0.5
+# Weight of a direction feature: a swapped direction must outweigh the shared words
+DIRECTION_WEIGHT = 1.5
+ENTRIES_FILE = "entries.json"
+FORMAT_VERSION = 1
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The semantic cache needs NumPy, which is listed in requirements.txt: pip install numpy")
+
+
+def question_features(question: str) -> list:
+    """
+    Returns the (feature, weight) pairs a question is embedded from: its words without
+    stop words and the character n-grams of those words, so inflections still match. Word
+    order is dropped, so "London weather" matches "weather in London", except where it
+    changes the meaning: pairs of neighbouring words that involve a number or an operator
+    ("15 - 45" is not "45 - 15") and each direction or negation word with the word it
+    applies to ("from Paris to London" is not "from London to Paris").
+    """
+    tokens = _TOKEN_RE.findall(question.lower().replace("'s", ""))
+    words = [word for word in tokens if word not in STOP_WORDS]
+    features = []
+    for word in words:
+        features.append(("w:" + word, 1.0))
+        if word.isalpha():
+            padded = f"<{word}>"
+            features.extend(("c:" + padded[i:i + NGRAM], NGRAM_WEIGHT) for i in range(len(padded) - NGRAM + 1))
+    features.extend(
+        (f"b:{first} {second}", 1.0)
+        for first, second in zip(words, words[1:])
+        if not (first.isalpha() and second.isalpha())
+    )
+    for i, token in enumerate(tokens):
+        if token not in DIRECTION_WORDS:
+            continue
+        # The next word that carries meaning, e.g. "Paris" in "from the Paris airport"
+        for target in tokens[i + 1:]:
+            if target in DIRECTION_WORDS:
+                break
+            if target not in STOP_WORDS:
+                features.append((f"d:{DIRECTION_WORDS[token]} {target}", DIRECTION_WEIGHT))
+                break
+    return features
+
+
+def embed(question: str, dim: int):
+    """
+    Embeds a question as a unit vector of hashed features. Hashing is deterministic across
+    processes, so saved vectors stay valid, and needs no model or network.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, weight in question_features(question):
+        digest = zlib.crc32(feature.encode("utf-8"))
+        # The top bit picks the sign, so colliding features tend to cancel out
+        vector[digest % dim] += weight if digest >> 31 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """
+    Bounded cache of answers looked up by meaning rather than by exact question.
+
+    Questions are embedded locally (see embed) into the rows of a NumPy matrix, and a
+    lookup returns the answer of the most similar question asked with the same tool set,
+    by cosine similarity, if it reaches the threshold. When full, the least recently used
+    entry is replaced.
+
+    A saved cache is a directory holding the matrix as a .npy file and the answers as
+    JSON. Loading maps the matrix copy-on-write, so worker processes loading the same
+    cache share its pages until they add entries of their own.
+    """
+    def __init__(self, dim: int = 1024, capacity: int = 4096, threshold: float = 0.9, ttl: Optional[float] = None):
+        """
+        Args:
+            dim (int): Size of the question vectors.
+            capacity (int): Maximum number of cached answers.
+            threshold (float): Minimum cosine similarity, in [0, 1], for a hit.
+            ttl (float, optional): Seconds an answer stays valid. None keeps it until evicted.
+        """
+        _require_numpy()
+        self.dim = dim
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._tool_keys = np.zeros(capacity, dtype=np.int64)
+        self._created = np.zeros(capacity, dtype=np.float64)
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._questions = []
+        self._answers = []
+        self._tick = 0
+        # Whether entries were added since the cache was created, loaded or saved
+        self.dirty = False
+        self._tools_description = None
+        self._tool_key = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    @staticmethod
+    def fingerprint(tools_description: str) -> int:
+        """
+        Returns a 64-bit key identifying a tool set by its rendered description.
+        """
+        digest = hashlib.sha256(tools_description.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "little", signed=True)
+
+    def _key(self, tools_description: str) -> int:
+        """
+        Returns the key of a tool set, hashing its description only when it changes.
+        Must be called with the lock held.
+        """
+        if tools_description is not self._tools_description:
+            self._tool_key = self.fingerprint(tools_description)
+            self._tools_description = tools_description
+        return self._tool_key
+
+    def get(self, question: str, tools_description: str) -> Optional[str]:
+        """
+        Looks up the answer to a question or to a question close enough to it.
+
+        Args:
+            question (str): The user question.
+            tools_description (str): The tool descriptions the answer must have been made with.
+
+        Returns:
+            str: The cached answer, or None on a miss.
+        """
+        vector = embed(question, self.dim)
+        with self._lock:
+            count = len(self._answers)
+            if not count or not vector.any():
+                self.misses += 1
+                return None
+            scores = self._vectors[:count] @ vector
+            stale = self._tool_keys[:count] != self._key(tools_description)
+            if self.ttl is not None:
+                stale |= self._created[:count] < time.time() - self.ttl
+            scores[stale] = -1.0
+            row = int(np.argmax(scores))
+            if scores[row] < self.threshold:
+                self.misses += 1
+                return None
+            self._tick += 1
+            self._last_used[row] = self._tick
+            self.hits += 1
+            return self._answers[row]
+
+    def set(self, question: str, tools_description: str, answer: str):
+        """
+        Stores the answer to a question. An entry for a question close enough to this one
+        is replaced; otherwise, when the cache is full, the least recently used entry is.
+        """
+        vector = embed(question, self.dim)
+        if not vector.any():
+            return
+        with self._lock:
+            key = self._key(tools_description)
+            count = len(self._answers)
+            row = None
+            if count:
+                scores = self._vectors[:count] @ vector
+                scores[self._tool_keys[:count] != key] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    row = best
+            if row is None and count < self.capacity:
+                row = count
+                self._questions.append(question)
+                self._answers.append(answer)
+            elif row is None:
+                row = int(np.argmin(self._last_used))
+            self._questions[row] = question
+            self._answers[row] = answer
+            self._vectors[row] = vector
+            self._tool_keys[row] = key
+            self._created[row] = time.time()
+            self._tick += 1
+            self._last_used[row] = self._tick
+            self.dirty = True
+
+    def stats(self) -> dict:
+        """
+        Returns the hit and miss counters and the number of cached answers.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._answers)}
+
+    def clear(self):
+        with self._lock:
+            self._questions.clear()
+            self._answers.clear()
+            self._last_used[:] = 0
+            self.dirty = True
+
+    def save(self, path: str):
+        """
+        Saves the cache to a directory. The matrix is written under a new name and the
+        entries file, which names it, is replaced atomically, so processes loading the
+        cache meanwhile read either the old or the new version.
+        """
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            vectors_file = f"vectors-{uuid.uuid4().hex[:12]}.npy"
+            np.save(os.path.join(path, vectors_file), self._vectors)
+            count = len(self._answers)
+            state = {
+                "version": FORMAT_VERSION,
+                "dim": self.dim,
+                "capacity": self.capacity,
+                "vectors": vectors_file,
+                "tick": self._tick,
+                "entries": [
+                    {
+                        "question": self._questions[row],
+                        "answer": self._answers[row],
+                        "tools": int(self._tool_keys[row]),
+                        "created": float(self._created[row]),
+                        "last_used": int(self._last_used[row]),
+                    }
+                    for row in range(count)
+                ],
+            }
+            self.dirty = False
+        entries_path = os.path.join(path, ENTRIES_FILE)
+        previous = _read_state(entries_path)
+        temporary = f"{entries_path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary, entries_path)
+        if previous is not None and previous.get("vectors") != vectors_file:
+            try:
+                # Processes that already mapped it keep their mapping
+                os.remove(os.path.join(path, previous["vectors"]))
+            except OSError:
+                pass
+
+    @classmethod
+    def load(cls, path: str, threshold: float = 0.9, ttl: Optional[float] = None, mmap: bool = True) -> 'SemanticCache':
+        """
+        Loads a cache saved with save. Its dim and capacity come from the saved files.
+
+        Args:
+            path (str): Directory the cache was saved to.
+            threshold (float): Minimum cosine similarity for a hit.
+            ttl (float, optional): Seconds an answer stays valid, counted from when it was cached.
+            mmap (bool): Map the matrix copy-on-write instead of reading it into memory.
+
+        Returns:
+            SemanticCache: The loaded cache.
+        """
+        _require_numpy()
+        entries_path = os.path.join(path, ENTRIES_FILE)
+        for attempt in range(2):
+            state = _read_state(entries_path)
+            if state is None:
+                raise FileNotFoundError(f"No semantic cache in {path}")
+            if state.get("version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported semantic cache version: {state.get('version')}")
+            try:
+                vectors = np.load(os.path.join(path, state["vectors"]), mmap_mode="c" if mmap else None)
+                break
+            except FileNotFoundError:
+                # The cache was saved again between the two reads
+                if attempt:
+                    raise
+
+        cache = cls(dim=state["dim"], capacity=0, threshold=threshold, ttl=ttl)
+        cache.capacity = state["capacity"]
+        cache._vectors = vectors
+        entries = state["entries"]
+        cache._questions = [entry["question"] for entry in entries]
+        cache._answers = [entry["answer"] for entry in entries]
+        cache._tool_keys = np.zeros(cache.capacity, dtype=np.int64)
+        cache._created = np.zeros(cache.capacity, dtype=np.float64)
+        cache._last_used = np.zeros(cache.capacity, dtype=np.int64)
+        for row, entry in enumerate(entries):
+            cache._tool_keys[row] = entry["tools"]
+            cache._created[row] = entry["created"]
+            cache._last_used[row] = entry["last_used"]
+        cache._tick = state["tick"]
+        return cache
+
+
+def _read_state(entries_path: str):
+    try:
+        with open(entries_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
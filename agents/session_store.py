@@ -0,0 +1,105 @@
+import asyncio
+import contextlib
+import threading
+import weakref
+from typing import Optional
+
+from config.config import SessionConfig
+from utils.cache import LRUCache, SQLiteCache
+
+
+class SessionStore:
+    """
+    Keeps the conversation state of many sessions outside the agent, so one agent can serve
+    them all from any thread.
+
+    State is stored as JSON-serializable dicts in a cache backend: LRUCache keeps sessions
+    in process memory, SQLiteCache in a file shared by worker processes. Both evict the least
+    recently used sessions past max_sessions and sessions idle for longer than idle_ttl.
+    """
+    def __init__(self, backend):
+        """
+        Args:
+            backend: LRUCache, SQLiteCache or any object with the same get/set/delete methods.
+        """
+        self.backend = backend
+        # One lock per session in use; a lock goes away with the last request holding it
+        self._locks = weakref.WeakValueDictionary()
+        self._locks_lock = threading.Lock()
+
+    @classmethod
+    def in_memory(cls, max_sessions: int = 10000, idle_ttl: Optional[float] = None) -> 'SessionStore':
+        return cls(LRUCache(max_entries=max_sessions, ttl=idle_ttl))
+
+    @classmethod
+    def sqlite(cls, path: str, max_sessions: int = 100000, idle_ttl: Optional[float] = None) -> 'SessionStore':
+        return cls(SQLiteCache(path, max_entries=max_sessions, ttl=idle_ttl))
+
+    @classmethod
+    def from_config(cls, session_config: SessionConfig) -> 'SessionStore':
+        if session_config.backend == "memory":
+            return cls.in_memory(session_config.max_sessions, session_config.idle_ttl)
+        if session_config.backend == "sqlite":
+            return cls.sqlite(session_config.path, session_config.max_sessions, session_config.idle_ttl)
+        raise ValueError(f"Unknown session store backend: {session_config.backend}")
+
+    def lock(self, session_id: str) -> threading.Lock:
+        """
+        Returns the lock serializing requests of a session within this process. Requests
+        of other sessions never wait on it.
+        """
+        with self._locks_lock:
+            lock = self._locks.get(session_id)
+            if lock is None:
+                lock = self._locks[session_id] = threading.Lock()
+            return lock
+
+    @contextlib.asynccontextmanager
+    async def async_lock(self, session_id: str):
+        """
+        Holds the lock of a session from a coroutine. It is the lock returned by lock, so
+        sync and async agents sharing the store are serialized too. When the lock is taken,
+        it is waited for on a thread of its own rather than on the event loop or on a pool,
+        whose threads could all end up waiting for the request holding it.
+        """
+        lock = self.lock(session_id)
+        if not lock.acquire(blocking=False):
+            loop = asyncio.get_running_loop()
+            acquired = loop.create_future()
+
+            def hand_over():
+                # A cancelled waiter no longer wants the lock
+                if acquired.cancelled():
+                    lock.release()
+                else:
+                    acquired.set_result(None)
+
+            def wait():
+                lock.acquire()
+                try:
+                    loop.call_soon_threadsafe(hand_over)
+                except RuntimeError:
+                    # The event loop is closed
+                    lock.release()
+
+            threading.Thread(target=wait, name="agent-session-lock", daemon=True).start()
+            await acquired
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def load(self, session_id: str) -> Optional[dict]:
+        """
+        Returns the stored state of a session, or None for a new or evicted session.
+        """
+        return self.backend.get(session_id)
+
+    def save(self, session_id: str, state: dict):
+        self.backend.set(session_id, state)
+
+    def delete(self, session_id: str):
+        self.backend.delete(session_id)
+
+    def __len__(self):
+        return len(self.backend)
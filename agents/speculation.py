@@ -0,0 +1,108 @@
+import re
+import threading
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+# Words too common to tell whether a question is about a tool
+STOPWORDS = frozenset(
+    "a an and are as at be by can could do does for from given how i in is it me my of on or "
+    "please should so that the this to tool use uses using was what when where which who why "
+    "will with would you your based".split()
+)
+
+
+def _words(text: str) -> set:
+    return {word for word in _WORD_RE.findall(text.lower()) if len(word) > 2 and word not in STOPWORDS}
+
+
+class SpeculationPolicy:
+    """
+    Decides when to draft a tool-free answer while the planner runs, and keeps the hit rate.
+
+    The estimated chance that a question needs no tools starts from the empty plan rate seen
+    so far (a moving average, starting at prior) and drops by tool_word_weight for every
+    word the question shares with the tool names and descriptions. Speculation happens when
+    the estimate reaches the threshold: a lower threshold answers more questions early, at
+    the cost of more drafts thrown away.
+    """
+    def __init__(
+        self,
+        tools,
+        threshold: float = 0.5,
+        tool_word_weight: float = 0.5,
+        prior: float = 0.5,
+        learning_rate: float = 0.1
+    ):
+        """
+        Args:
+            tools: The agent's tools, whose names and descriptions signal tool questions.
+            threshold (float): Lowest estimated chance of an empty plan worth a draft.
+            tool_word_weight (float): How much each tool word in the question lowers the estimate.
+            prior (float): Empty plan rate assumed before any plan is seen.
+            learning_rate (float): Weight of each new plan in the empty plan rate.
+        """
+        self.threshold = threshold
+        self.tool_word_weight = tool_word_weight
+        self.learning_rate = learning_rate
+        self.empty_plan_rate = prior
+        self.tool_words = set()
+        for tool in tools:
+            self.add_tool(tool)
+        self.speculated = 0
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def add_tool(self, tool):
+        """
+        Adds the words of a tool's name and description to the tool words.
+        """
+        self.tool_words |= _words(_CAMEL_RE.sub(" ", tool.name))
+        self.tool_words |= _words(tool.description)
+
+    def estimate(self, question: str) -> float:
+        """
+        Returns the estimated chance that the question needs no tools.
+        """
+        tool_words = len(_words(question) & self.tool_words)
+        return self.empty_plan_rate * max(0.0, 1.0 - tool_words * self.tool_word_weight)
+
+    def should_speculate(self, question: str) -> bool:
+        speculate = self.estimate(question) >= self.threshold
+        with self._lock:
+            if speculate:
+                self.speculated += 1
+            else:
+                self.skipped += 1
+        return speculate
+
+    def record(self, plan_empty: bool, speculated: bool):
+        """
+        Records a plan: updates the empty plan rate, and the hit or miss of its draft if any.
+        """
+        with self._lock:
+            self.empty_plan_rate += self.learning_rate * (float(plan_empty) - self.empty_plan_rate)
+            if speculated:
+                if plan_empty:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+    def stats(self) -> dict:
+        """
+        Returns the speculated, hit (draft used), miss (draft discarded) and skipped counters,
+        the hit rate and the current empty plan rate.
+        """
+        with self._lock:
+            decided = self.hits + self.misses
+            return {
+                "speculated": self.speculated,
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "hit_rate": self.hits / decided if decided else 0.0,
+                "empty_plan_rate": self.empty_plan_rate,
+            }
@@ -0,0 +1,56 @@
+"""
+Measures how long it takes to build an agent.
+
+Usage:
+    python benchmarks/bench_construction.py [iterations]
+
+The first construction pays for parsing config.yaml, setting up logging, creating the HTTP
+clients and rendering the prompts. Later ones reuse all of that, which is what matters when a
+server builds an agent per request or a batch forks one per question.
+"""
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+os.chdir(root_dir)
+# No request is sent, but the OpenAI client refuses to start without a key
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from config.config import load_config
+from tools.calculate import CalculateTool
+from agents.basic_agent import BasicAgent
+
+
+def _time(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1e6
+
+
+def _report(name: str, samples: list):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<28} median {statistics.median(samples):9.1f} us   p99 {p99:9.1f} us")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    tools = [CalculateTool()]
+
+    cold = _time(lambda: BasicAgent(tools=tools))
+    print(f"{'first construction':<28} {cold:16.1f} us")
+
+    _report("load_config", [_time(load_config) for _ in range(iterations)])
+    _report("BasicAgent()", [_time(lambda: BasicAgent(tools=tools)) for _ in range(iterations)])
+    config = load_config()
+    _report("BasicAgent(config=...)", [_time(lambda: BasicAgent(tools=tools, config=config)) for _ in range(iterations)])
+    agent = BasicAgent(tools=tools, config=config)
+    _report("agent.fork()", [_time(agent.fork) for _ in range(iterations)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Microbenchmarks of the executor response parsing, which runs on every executor turn.
+
+Usage:
+    python benchmarks/bench_parser.py [iterations]
+
+Compares parse_react_response with the per-line regex scan it replaced, on responses with
+long thoughts and many actions, and extract_xml on a large planner response.
+"""
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from utils.extract_xml import extract_xml
+from utils.react_parser import parse_react_response
+
+
+def line_scan(response: str) -> list:
+    """
+    The previous parser: every line stripped and matched against the Action pattern.
+    """
+    action_re = re.compile(r'^Action: ({.*})$')
+    matches = [action_re.match(line.strip()) for line in response.split('\n')]
+    return [json.loads(match.group(1)) for match in matches if match]
+
+
+def make_response(thought_lines: int, actions: int) -> str:
+    lines = ["Thought: " + "I should think about this carefully. " * 4]
+    lines += ["More reasoning about the problem, step by step, with details. " * 2] * thought_lines
+    for i in range(actions):
+        action = {"tool": "WeatherTool", "parameters": {"city": f"City {i}", "units": "metric"}}
+        lines.append(f"Action: {json.dumps(action)}")
+    lines.append("PAUSE")
+    return "\n".join(lines)
+
+
+def report(name: str, fn, iterations: int):
+    seconds = min(timeit.repeat(fn, number=iterations, repeat=5)) / iterations
+    print(f"{name:<44} {seconds * 1e6:10.1f} us")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for thought_lines, actions in ((5, 1), (200, 10), (2000, 50)):
+        response = make_response(thought_lines, actions)
+        label = f"{len(response) // 1024} KiB, {actions} actions"
+        assert len(parse_react_response(response).actions) == len(line_scan(response)) == actions
+        report(f"line scan ({label})", lambda: line_scan(response), iterations)
+        report(f"parse_react_response ({label})", lambda: parse_react_response(response), iterations)
+
+    plan = "<plan>\n" + "1. Step with a fairly long description.\n" * 500 + "</plan>"
+    report("extract_xml (20 KiB plan)", lambda: extract_xml(plan, "plan"), iterations)
+
+
+if __name__ == "__main__":
+    main()
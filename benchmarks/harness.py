@@ -0,0 +1,159 @@
+"""
+Timing, memory and reporting helpers shared by the benchmark scripts.
+"""
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Callable
+
+from utils import metrics
+
+
+def percentiles(samples: list) -> dict:
+    """
+    Returns the p50, p90, p99, mean and max of samples, in milliseconds.
+    """
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "mean": statistics.fmean(ordered) * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Measurements of one benchmark.
+
+    latency holds percentiles of the wall time per iteration, stages the percentiles of the
+    LLM time per iteration for every stage, plus "overhead": the time spent outside LLM calls,
+    which is the framework's own cost.
+    """
+    name: str
+    iterations: int
+    latency: dict
+    stages: dict = field(default_factory=dict)
+    throughput: float = 0.0
+    peak_memory: int = 0
+
+
+def run_benchmark(name: str, fn: Callable[[], None], iterations: int = 100, warmup: int = 5) -> BenchmarkResult:
+    """
+    Times fn over the given number of iterations, then runs it once more under tracemalloc
+    to measure its peak memory, so the tracing does not distort the timings.
+
+    Args:
+        name (str): The benchmark name.
+        fn (callable): The workload, called without arguments.
+        iterations (int): How many timed calls to make.
+        warmup (int): Untimed calls made first, to fill caches and pools.
+    """
+    for _ in range(warmup):
+        fn()
+
+    sink = metrics.InMemorySink()
+    metrics.metrics_registry.add_sink(sink)
+    wall, stages = [], {}
+    try:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            sink.records.clear()
+            iteration_started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - iteration_started
+            wall.append(elapsed)
+            by_stage = {}
+            for record in sink.records:
+                by_stage[record.stage] = by_stage.get(record.stage, 0.0) + record.latency
+            for stage_name, latency in by_stage.items():
+                stages.setdefault(stage_name, []).append(latency)
+            stages.setdefault("overhead", []).append(max(0.0, elapsed - sum(by_stage.values())))
+        total = time.perf_counter() - started
+    finally:
+        metrics.metrics_registry.remove_sink(sink)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        latency=percentiles(wall),
+        stages={stage_name: percentiles(samples) for stage_name, samples in stages.items()},
+        throughput=iterations / total if total else 0.0,
+        peak_memory=peak_memory,
+    )
+
+
+def save_results(results: list, path: str):
+    """
+    Writes the results to a JSON file, with the interpreter version for context.
+    """
+    data = {
+        "python": platform.python_version(),
+        "timestamp": time.time(),
+        "results": {result.name: asdict(result) for result in results},
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def compare(results: list, baseline_path: str, tolerance: float = 0.2) -> list:
+    """
+    Compares results against a baseline saved by save_results.
+
+    Args:
+        results (list): The BenchmarkResult objects of this run.
+        baseline_path (str): The baseline JSON file.
+        tolerance (float): Allowed slowdown as a fraction, 0.2 means 20% slower.
+
+    Returns:
+        list: (name, metric, baseline, current, change) tuples for every regression beyond
+        the tolerance. Benchmarks missing from the baseline are skipped.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        checks = [
+            ("p50", previous["latency"].get("p50"), result.latency.get("p50")),
+            ("overhead p50", previous["stages"].get("overhead", {}).get("p50"), result.stages.get("overhead", {}).get("p50")),
+            ("peak_memory", previous["peak_memory"], result.peak_memory),
+        ]
+        for metric, before, after in checks:
+            if before and after is not None and after > before * (1 + tolerance):
+                regressions.append((result.name, metric, before, after, after / before - 1))
+    return regressions
+
+
+def print_results(results: list):
+    header = f"{'benchmark':<28}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'overhead':>10}{'ops/s':>10}{'peak KiB':>10}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        overhead = result.stages.get("overhead", {}).get("p50", 0.0)
+        print(
+            f"{result.name:<28}{result.latency['p50']:>10.3f}{result.latency['p90']:>10.3f}"
+            f"{result.latency['p99']:>10.3f}{overhead:>10.3f}{result.throughput:>10.1f}"
+            f"{result.peak_memory / 1024:>10.1f}"
+        )
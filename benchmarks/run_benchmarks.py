@@ -0,0 +1,135 @@
+"""
+Measures the framework's own overhead with a mock LLM, without network access.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--iterations N] [--latency SECONDS]
+                                        [--output results.json] [--baseline baseline.json]
+                                        [--tolerance 0.2] [--only NAME ...]
+
+Every LLM call is answered by MockProvider, so the "overhead" column is the time the agent
+spends outside LLM calls. Save a run with --output and pass it as --baseline to a later run
+to fail (exit code 1) on regressions.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from harness import compare, print_results, run_benchmark, save_results
+from agents.basic_agent import BasicAgent
+from config.config import Config, LLMConfig
+from llm_providers.mock_provider import MockProvider
+from tools.base_tool import BaseTool
+
+
+class EchoTool(BaseTool):
+    def __init__(self, index: int = 0):
+        super().__init__(
+            name=f"EchoTool{index}",
+            description=f"Returns its input unchanged (tool {index})",
+            input_params={"value": "str"},
+            output_format={"value": "str"}
+        )
+
+    def execute(self, **kwargs):
+        return {"value": kwargs["value"]}
+
+
+def scripted_agent(turns: int = 1, actions_per_turn: int = 1, tool_count: int = 1, latency: float = 0.0) -> BasicAgent:
+    """
+    Builds an agent whose mock LLM plans, calls tools for the given number of executor turns
+    (actions_per_turn calls each), then answers.
+    """
+    tools = [EchoTool(i) for i in range(tool_count)]
+    config = Config(llm=LLMConfig(model="mock", api_key="mock"), log_level="WARNING")
+    agent = None
+
+    def responder(messages):
+        if len(messages) == 1:
+            return "<plan>Echo the value with the tools, then answer.</plan>"
+        if messages[0]["content"] == agent.executor_system_prompt:
+            turn = sum(1 for message in messages if message["role"] == "user")
+            if turn > turns:
+                return "Thought: I have everything\nAnswer: done"
+            lines = ["Thought: I need the tools"]
+            for i in range(actions_per_turn):
+                action = {"tool": tools[i % tool_count].name, "parameters": {"value": f"turn {turn} call {i}"}}
+                lines.append(f"Action: {json.dumps(action)}")
+            lines.append("PAUSE")
+            return "\n".join(lines)
+        return "The tools echoed every value."
+
+    agent = BasicAgent(
+        tools=tools,
+        config=config,
+        llm_provider=MockProvider(responder=responder, latency=latency)
+    )
+    return agent
+
+
+def benchmarks(args) -> dict:
+    """
+    Returns the benchmark workloads by name.
+    """
+    config = Config(llm=LLMConfig(model="mock", api_key="mock"), log_level="WARNING")
+    construction_tools = [EchoTool(i) for i in range(10)]
+    provider = MockProvider(responses=[""], loop=True)
+
+    round_trip = scripted_agent(latency=args.latency)
+    # Executor turns in total: the last one gives the answer, the others call a tool
+    turns = {n: scripted_agent(turns=n - 1, latency=args.latency) for n in (1, 3, 5)}
+    tool_heavy = scripted_agent(turns=2, actions_per_turn=8, tool_count=20, latency=args.latency)
+
+    long_history = scripted_agent(latency=args.latency)
+    for i in range(200):
+        long_history.memory.append({"role": "user", "content": f"Earlier question number {i} about something"})
+        long_history.memory.append({"role": "assistant", "content": f"An earlier answer number {i} with a few more words in it"})
+    history = long_history.memory.to_dict()
+
+    def ask_with_history():
+        agent = long_history.fork()
+        agent.memory.load(history)
+        agent("One more question?")
+
+    workloads = {
+        "construction": lambda: BasicAgent(tools=construction_tools, config=config, llm_provider=provider),
+        "round_trip": lambda: round_trip.fork()("Echo something?"),
+        "long_history": ask_with_history,
+        "tool_heavy": lambda: tool_heavy.fork()("Echo a lot?"),
+    }
+    for n, agent in turns.items():
+        workloads[f"executor_{n}_turns"] = (lambda agent=agent: agent.fork()("Echo something?"))
+    return workloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("--output", help="Where to save the results as JSON")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown, as a fraction")
+    parser.add_argument("--only", nargs="*", help="Run only these benchmarks")
+    args = parser.parse_args()
+
+    workloads = benchmarks(args)
+    names = args.only or list(workloads)
+    results = [run_benchmark(name, workloads[name], args.iterations, args.warmup) for name in names]
+    print_results(results)
+
+    if args.output:
+        save_results(results, args.output)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for name, metric, before, after, change in regressions:
+            print(f"REGRESSION {name} {metric}: {before:.3f} -> {after:.3f} (+{change:.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
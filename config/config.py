@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 from typing import Optional
+import copy
 import os
 import yaml
 
@@ -12,11 +13,148 @@ class LLMConfig:
     temperature: float = 0.1
     max_tokens: int = 4096
     api_key: Optional[str] = None
+    base_url: Optional[str] = None
+    timeout: float = 60.0
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 20.0
+    pool_max_connections: int = 100
+    pool_max_keepalive: int = 20
+    pool_keepalive_expiry: float = 30.0
+    requests_per_minute: Optional[float] = None
+    # Settings tried in order when a call fails, each overriding the ones above
+    fallbacks: list = field(default_factory=list)
+    # Settings per stage (planner, executor, response_generator, speculative_draft, summarizer)
+    routes: dict = field(default_factory=dict)
+
+
+@dataclass
+class AgentConfig:
+    max_tool_workers: int = 4
+    max_process_workers: Optional[int] = None  # process pool size for "process" tools, None for the CPU count
+    tool_timeout: Optional[float] = 30.0
+    stream_executor: bool = False
+    execution_mode: str = "text"  # text (Action lines) or native (provider tool calls)
+
+
+@dataclass
+class CacheConfig:
+    enabled: bool = False
+    backend: str = "memory"
+    max_entries: int = 1024
+    max_size_bytes: Optional[int] = None
+    ttl: Optional[float] = 3600
+    path: Optional[str] = ".cache/llm_responses.sqlite"
+    max_temperature: float = 0.5
+
+
+@dataclass
+class PlanCacheConfig:
+    enabled: bool = False
+    max_entries: int = 512
+    fuzzy: bool = False
+    similarity_threshold: float = 0.85
+
+
+@dataclass
+class SemanticCacheConfig:
+    enabled: bool = False
+    threshold: float = 0.9  # minimum cosine similarity between questions for a hit
+    dim: int = 1024
+    capacity: int = 4096
+    ttl: Optional[float] = 3600
+    path: Optional[str] = None  # directory loaded on start and saved on close
+    standalone_only: bool = True  # skip follow-up questions, whose answers depend on earlier turns
+
+
+@dataclass
+class MemoryConfig:
+    enabled: bool = False
+    max_tokens: int = 3000
+    recent_turns: int = 6
+    summarize: bool = True
+    summary_max_words: int = 200
+
+
+@dataclass
+class MetricsConfig:
+    jsonl_path: Optional[str] = None
+    prometheus_path: Optional[str] = None
+
+
+@dataclass
+class SessionConfig:
+    backend: str = "memory"
+    max_sessions: int = 10000
+    idle_ttl: Optional[float] = 3600
+    path: Optional[str] = ".cache/sessions.sqlite"
+
+
+@dataclass
+class SpeculationConfig:
+    enabled: bool = False
+    threshold: float = 0.5
+    tool_word_weight: float = 0.5
+    prior: float = 0.5
+    learning_rate: float = 0.1
+    max_workers: int = 4
+
+
+@dataclass
+class ToolSelectionConfig:
+    enabled: bool = False
+    top_k: int = 8
+    cache_entries: int = 1024
+
+
+@dataclass
+class HedgingConfig:
+    enabled: bool = False
+    percentile: float = 0.9
+    window: int = 200
+    min_samples: int = 20
+    min_delay: float = 0.05
+    max_hedge_ratio: float = 0.1
+    max_workers: int = 8
+
+
+@dataclass
+class ExecutorContextConfig:
+    enabled: bool = False
+    max_observation_tokens: int = 500  # larger tool results are stored and previewed
+    preview_chars: int = 1000
+    keep_turns: int = 2  # older executor turns are collapsed
+    max_context_tokens: int = 6000
+    store_entries: int = 256
+    store_ttl: float = 3600
+
+
+@dataclass
+class LoggingConfig:
+    format: str = "text"  # text or json (one object per line)
+    file: Optional[str] = "debug.log"  # written when debug is on
+    max_bytes: int = 10 * 1024 * 1024
+    backup_count: int = 3
+    max_payload_chars: int = 2000
+    sample_rate: float = 1.0  # share of DEBUG events kept
+    queue_size: int = 10000
 
 
 @dataclass
 class Config:
     llm: LLMConfig = field(default_factory=LLMConfig)
+    agent: AgentConfig = field(default_factory=AgentConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    plan_cache: PlanCacheConfig = field(default_factory=PlanCacheConfig)
+    semantic_cache: SemanticCacheConfig = field(default_factory=SemanticCacheConfig)
+    memory: MemoryConfig = field(default_factory=MemoryConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    sessions: SessionConfig = field(default_factory=SessionConfig)
+    speculation: SpeculationConfig = field(default_factory=SpeculationConfig)
+    tool_selection: ToolSelectionConfig = field(default_factory=ToolSelectionConfig)
+    hedging: HedgingConfig = field(default_factory=HedgingConfig)
+    executor_context: ExecutorContextConfig = field(default_factory=ExecutorContextConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
     debug: bool = False
     log_level: str = "INFO"
 
@@ -29,8 +167,32 @@ class Config:
             config_dict = yaml.safe_load(f)
             
         llm_config = LLMConfig(**config_dict.get('llm', {}))
+        agent_config = AgentConfig(**config_dict.get('agent', {}))
+        cache_config = CacheConfig(**config_dict.get('cache', {}))
+        plan_cache_config = PlanCacheConfig(**config_dict.get('plan_cache', {}))
+        semantic_cache_config = SemanticCacheConfig(**config_dict.get('semantic_cache', {}))
+        memory_config = MemoryConfig(**config_dict.get('memory', {}))
+        metrics_config = MetricsConfig(**config_dict.get('metrics', {}))
+        session_config = SessionConfig(**config_dict.get('sessions', {}))
+        speculation_config = SpeculationConfig(**config_dict.get('speculation', {}))
+        tool_selection_config = ToolSelectionConfig(**config_dict.get('tool_selection', {}))
+        hedging_config = HedgingConfig(**config_dict.get('hedging', {}))
+        executor_context_config = ExecutorContextConfig(**config_dict.get('executor_context', {}))
+        logging_config = LoggingConfig(**config_dict.get('logging', {}))
         return cls(
             llm=llm_config,
+            agent=agent_config,
+            cache=cache_config,
+            plan_cache=plan_cache_config,
+            semantic_cache=semantic_cache_config,
+            memory=memory_config,
+            metrics=metrics_config,
+            sessions=session_config,
+            speculation=speculation_config,
+            tool_selection=tool_selection_config,
+            hedging=hedging_config,
+            executor_context=executor_context_config,
+            logging=logging_config,
             debug=config_dict.get('debug', False),
             log_level=config_dict.get('log_level', "INFO")
         )
@@ -50,11 +212,30 @@ class Config:
             self.log_level = os.getenv("LOG_LEVEL")
 
 
+# Parsed configs by file path, with the file modification time and environment overrides they were built from
+_config_cache = {}
+_ENV_OVERRIDES = ("OPENAI_API_KEY", "LLM_MODEL", "DEBUG", "LOG_LEVEL")
+
+
 def load_config(config_path: Optional[str] = None) -> Config:
-    """Load configuration from file and environment variables"""
+    """Load configuration from file and environment variables
+
+    The YAML file is parsed once and reparsed only when it or the environment overrides
+    change. Each call returns its own copy, so callers can modify it freely.
+    """
     if config_path is None:
         config_path = os.getenv("CONFIG_PATH", "config.yaml")
-    
-    config = Config.from_yaml(config_path)
-    config.update_from_env()
-    return config 
\ No newline at end of file
+
+    try:
+        mtime = os.stat(config_path).st_mtime_ns
+    except OSError:
+        mtime = None
+    path = os.path.abspath(config_path)
+    stamp = (mtime, tuple(os.getenv(name) for name in _ENV_OVERRIDES))
+
+    cached = _config_cache.get(path)
+    if cached is None or cached[0] != stamp:
+        config = Config.from_yaml(config_path)
+        config.update_from_env()
+        cached = _config_cache[path] = (stamp, config)
+    return copy.deepcopy(cached[1]) 
\ No newline at end of file
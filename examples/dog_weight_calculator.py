@@ -16,7 +16,8 @@ class AverageDogWeightTool(BaseTool):
             name="AverageDogWeightTool",
             description="Returns the average weight of a specific dog breed.",
             input_params={"name": "str"},
-            output_format={"weight": "str"}
+            output_format={"weight": "str"},
+            cacheable=True
         )
 
     def execute(self, **kwargs):
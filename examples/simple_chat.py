@@ -32,8 +32,12 @@ def main():
         if question.lower() == 'exit':
             break
             
-        response = agent(question)
-        print(f"Bot: {response}")
+        # Print the answer as it is generated
+        print("Bot: ", end="", flush=True)
+        for event in agent.stream(question):
+            if event.type == "token":
+                print(event.data, end="", flush=True)
+        print()
 
 
 if __name__ == "__main__":
@@ -16,7 +16,10 @@ class WeatherTool(BaseTool):
             name="WeatherTool",
             description="Gets current weather for a given city",
             input_params={"city": "str"},
-            output_format={"temperature": "float", "conditions": "str"}
+            output_format={"temperature": "float", "conditions": "str"},
+            # Weather can be a few minutes stale
+            cacheable=True,
+            cache_ttl=600
         )
         self.api_key = api_key
 
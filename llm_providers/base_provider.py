@@ -1,10 +1,71 @@
+import asyncio
+import json
+import time
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from utils.metrics import record_llm_call
+from utils.tokens import estimate_messages_tokens, estimate_tokens
+
+
+@dataclass
+class ToolCall:
+    """
+    A native tool call requested by the model. When the model wrote arguments that are not
+    a JSON object, arguments is None and error says why.
+    """
+    id: str
+    name: str
+    arguments: Optional[dict] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, id: str, name: str, arguments_json: str) -> 'ToolCall':
+        """
+        Creates a tool call from the JSON arguments string sent by the API.
+        """
+        try:
+            arguments = json.loads(arguments_json or "{}")
+        except json.JSONDecodeError as e:
+            return cls(id, name, error=f"Invalid arguments JSON: {e}")
+        if not isinstance(arguments, dict):
+            return cls(id, name, error="Arguments are not a JSON object")
+        return cls(id, name, arguments)
+
+
+@dataclass
+class ToolCallResponse:
+    """
+    The result of llm_call_with_tools: the text content and the tool calls, if any.
+    """
+    content: str = ""
+    tool_calls: list = field(default_factory=list)
+
+    def message(self) -> dict:
+        """
+        Returns the assistant message to append to the conversation before the tool results.
+        """
+        message = {"role": "assistant", "content": self.content or None}
+        if self.tool_calls:
+            message["tool_calls"] = [
+                {
+                    "id": call.id,
+                    "type": "function",
+                    "function": {"name": call.name, "arguments": json.dumps(call.arguments or {})},
+                }
+                for call in self.tool_calls
+            ]
+        return message
 
 
 class BaseProvider(ABC):
     """
     Abstract base class for providers interacting with LLMs.
     """
+    # Whether llm_call_with_tools is implemented
+    supports_tools = False
+
     def __init__(
         self,
         api_key: str = None,
@@ -40,3 +101,136 @@ class BaseProvider(ABC):
             str: The content of the response from the language model.
         """
         pass
+
+    async def async_llm_call(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> str:
+        """
+        Awaitable version of llm_call. Takes the same arguments.
+
+        The default implementation runs the blocking llm_call in a worker thread
+        so any provider can be used from async code. Providers with a native async
+        client should override it.
+
+        Returns:
+            str: The content of the response from the language model.
+        """
+        return await asyncio.to_thread(
+            self.llm_call,
+            prompt=prompt,
+            system_prompt=system_prompt,
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+
+    def llm_call_stream(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> Iterator[str]:
+        """
+        Streaming version of llm_call. Takes the same arguments.
+
+        The default implementation yields the whole llm_call response as a single chunk.
+        Providers that support token streaming should override it.
+
+        Yields:
+            str: Chunks of the response content as they arrive.
+        """
+        yield self.llm_call(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+
+    def llm_call_with_tools(
+        self,
+        messages: list,
+        tools: list,
+        model: str = None,
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> ToolCallResponse:
+        """
+        Calls the LLM with native tool definitions, letting it request several tool calls at once.
+
+        Args:
+            messages (list): The conversation, including earlier tool calls and "tool" results.
+            tools (list): JSON-schema tool definitions, as returned by BaseTool.schema().
+            model (str, optional): The model to use for the call.
+            max_tokens (int, optional): The maximum number of tokens for the response.
+            temperature (float, optional): The sampling temperature for response diversity.
+
+        Returns:
+            ToolCallResponse: The text content and the requested tool calls.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support native tool calls")
+
+    async def async_llm_call_with_tools(
+        self,
+        messages: list,
+        tools: list,
+        model: str = None,
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> ToolCallResponse:
+        """
+        Awaitable version of llm_call_with_tools. The default implementation runs it in a worker thread.
+        """
+        return await asyncio.to_thread(
+            self.llm_call_with_tools,
+            messages=messages,
+            tools=tools,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+
+    @staticmethod
+    def _build_messages(prompt: str = None, system_prompt: str = None, messages: list = None) -> list:
+        """
+        Returns the message list to send, building it from the prompts when no messages are given.
+        """
+        if messages:
+            return messages
+        if system_prompt:
+            return [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ]
+        return [{"role": "user", "content": prompt}]
+
+    @staticmethod
+    def _record_usage(model: str, started: float, usage=None, messages: list = None, completion: str = None):
+        """
+        Records the usage and wall time of a call in the metrics registry. When the API
+        did not report usage, token counts are estimated from the messages and completion.
+
+        Args:
+            model (str): The model that was called.
+            started (float): time.monotonic() when the call started.
+            usage (optional): Usage object with prompt_tokens and completion_tokens.
+            messages (list, optional): The messages sent, used for estimates.
+            completion (str, optional): The response text, used for estimates.
+        """
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+        else:
+            prompt_tokens = estimate_messages_tokens(messages or [])
+            completion_tokens = estimate_tokens(completion or "")
+        record_llm_call(model, prompt_tokens, completion_tokens, time.monotonic() - started)
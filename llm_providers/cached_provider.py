@@ -0,0 +1,192 @@
+import hashlib
+import json
+import threading
+from typing import Iterator
+
+from config.config import CacheConfig
+from llm_providers.base_provider import BaseProvider, ToolCallResponse
+from utils.cache import create_cache
+
+
+# Cache backends shared by every CachedProvider built from the same settings in this process
+_shared_caches = {}
+_shared_caches_lock = threading.Lock()
+
+
+class CachedProvider(BaseProvider):
+    """
+    Wraps any provider and serves repeated calls from a cache.
+
+    The cache key is a hash of the model, messages, temperature and max_tokens. Calls with a
+    temperature above max_temperature are sampled on purpose and always go to the provider.
+    """
+    def __init__(self, provider: BaseProvider, cache, max_temperature: float = 0.5):
+        """
+        Args:
+            provider (BaseProvider): The provider that answers cache misses.
+            cache: Cache backend (see utils.cache) used to store responses.
+            max_temperature (float, optional): Highest temperature whose responses are cached.
+        """
+        super().__init__(provider.api_key, provider.temperature, provider.max_tokens)
+        self.provider = provider
+        self.cache = cache
+        self.max_temperature = max_temperature
+        self.supports_tools = provider.supports_tools
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, provider: BaseProvider, cache_config: CacheConfig) -> 'CachedProvider':
+        """
+        Wraps a provider with the cache described by the config. Providers built from the same
+        settings share one cache backend.
+        """
+        settings = (
+            cache_config.backend,
+            cache_config.max_entries,
+            cache_config.ttl,
+            cache_config.max_size_bytes,
+            cache_config.path,
+        )
+        with _shared_caches_lock:
+            cache = _shared_caches.get(settings)
+            if cache is None:
+                cache = create_cache(
+                    backend=cache_config.backend,
+                    max_entries=cache_config.max_entries,
+                    ttl=cache_config.ttl,
+                    max_size_bytes=cache_config.max_size_bytes,
+                    path=cache_config.path,
+                )
+                _shared_caches[settings] = cache
+        return cls(provider, cache, max_temperature=cache_config.max_temperature)
+
+    def stats(self) -> dict:
+        """
+        Returns the hit, miss and skipped counters and the hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _cache_key(self, prompt, system_prompt, model, messages, max_tokens, temperature):
+        """
+        Returns the cache key for a call, or None if the call should not be cached.
+        """
+        temperature = temperature if temperature is not None else self.temperature
+        if temperature > self.max_temperature:
+            with self._lock:
+                self.skipped += 1
+            return None
+        payload = json.dumps({
+            "model": model,
+            "messages": self._build_messages(prompt, system_prompt, messages),
+            "temperature": temperature,
+            "max_tokens": max_tokens if max_tokens is not None else self.max_tokens,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        if key is None:
+            return None
+        response = self.cache.get(key)
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def _store(self, key, response):
+        if key is not None and response is not None:
+            self.cache.set(key, response)
+
+    def llm_call(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> str:
+        key = self._cache_key(prompt, system_prompt, model, messages, max_tokens, temperature)
+        response = self._lookup(key)
+        if response is None:
+            response = self.provider.llm_call(prompt, system_prompt, model, messages, max_tokens, temperature)
+            self._store(key, response)
+        return response
+
+    async def async_llm_call(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> str:
+        key = self._cache_key(prompt, system_prompt, model, messages, max_tokens, temperature)
+        response = self._lookup(key)
+        if response is None:
+            response = await self.provider.async_llm_call(prompt, system_prompt, model, messages, max_tokens, temperature)
+            self._store(key, response)
+        return response
+
+    def llm_call_stream(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> Iterator[str]:
+        """
+        Yields a cached response as a single chunk. On a miss, streams from the provider and
+        caches the response only if the stream was read to the end.
+        """
+        key = self._cache_key(prompt, system_prompt, model, messages, max_tokens, temperature)
+        response = self._lookup(key)
+        if response is not None:
+            yield response
+            return
+        chunks = []
+        stream = self.provider.llm_call_stream(prompt, system_prompt, model, messages, max_tokens, temperature)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            stream.close()
+        self._store(key, "".join(chunks))
+
+    def llm_call_with_tools(
+        self,
+        messages: list,
+        tools: list,
+        model: str = None,
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> ToolCallResponse:
+        """
+        Passed through uncached: tool calls carry fresh ids and lead to tool runs.
+        """
+        return self.provider.llm_call_with_tools(messages, tools, model, max_tokens, temperature)
+
+    async def async_llm_call_with_tools(
+        self,
+        messages: list,
+        tools: list,
+        model: str = None,
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> ToolCallResponse:
+        return await self.provider.async_llm_call_with_tools(messages, tools, model, max_tokens, temperature)
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+
+_clients = {}
+# Async clients per event loop, then per settings: their connections belong to the loop
+_async_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_openai_client(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: float = 60.0,
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 30.0,
+) -> OpenAI:
+    """
+    Returns the process-wide OpenAI client for these settings, creating it on first use.
+
+    Every provider built with the same settings shares the client and its HTTP connection
+    pool, so keep-alive connections are reused instead of paying a TLS handshake per agent.
+    The SDK's own retries are disabled: providers retry with their own policy.
+    """
+    settings = (api_key, base_url, timeout, max_connections, max_keepalive_connections, keepalive_expiry)
+    with _clients_lock:
+        client = _clients.get(settings)
+        if client is None:
+            http_client = DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+                timeout=timeout,
+            )
+            client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0, http_client=http_client)
+            _clients[settings] = client
+        return client
+
+
+def get_async_openai_client(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: float = 60.0,
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 30.0,
+) -> AsyncOpenAI:
+    """
+    Async counterpart of get_openai_client, for the running event loop. Pooled connections
+    belong to the loop that opened them, so each loop gets its own client, shared between
+    the providers running on it; clients of closed loops are dropped. Must be called from
+    a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    settings = (api_key, base_url, timeout, max_connections, max_keepalive_connections, keepalive_expiry)
+    with _clients_lock:
+        for closed in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[closed]
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(settings)
+        if client is None:
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+                timeout=timeout,
+            )
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0, http_client=http_client)
+            clients[settings] = client
+        return client
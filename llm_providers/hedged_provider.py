@@ -0,0 +1,311 @@
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Iterator
+
+from config.config import HedgingConfig
+from llm_providers.base_provider import BaseProvider, ToolCallResponse
+from utils import metrics
+
+
+class HedgedProvider(BaseProvider):
+    """
+    Wraps any provider and cuts tail latency by hedging slow calls.
+
+    When a call has not returned after the rolling percentile latency of its stage and
+    model, the same request is sent again; the first response wins and the other request
+    is cancelled (or, for blocking calls already in flight, ignored). At most
+    max_hedge_ratio of the calls are hedged, which caps the extra cost. Streams are passed
+    through without hedging.
+    """
+    def __init__(
+        self,
+        provider: BaseProvider,
+        percentile: float = 0.9,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        max_hedge_ratio: float = 0.1,
+        max_workers: int = 8
+    ):
+        """
+        Args:
+            provider (BaseProvider): The provider whose calls are hedged.
+            percentile (float): Latency percentile, per stage and model, after which a call is hedged.
+            window (int): Number of recent latencies the percentile is computed from.
+            min_samples (int): Latencies needed before a stage and model are hedged.
+            min_delay (float): Shortest wait, in seconds, before hedging.
+            max_hedge_ratio (float): Highest share of calls that may be hedged.
+            max_workers (int): Threads running the hedge requests of blocking calls.
+        """
+        super().__init__(provider.api_key, provider.temperature, provider.max_tokens)
+        self.provider = provider
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.max_workers = max_workers
+        self.supports_tools = provider.supports_tools
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.latency_saved = 0.0
+        self._latencies = {}
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, provider: BaseProvider, hedging_config: HedgingConfig) -> 'HedgedProvider':
+        return cls(
+            provider,
+            percentile=hedging_config.percentile,
+            window=hedging_config.window,
+            min_samples=hedging_config.min_samples,
+            min_delay=hedging_config.min_delay,
+            max_hedge_ratio=hedging_config.max_hedge_ratio,
+            max_workers=hedging_config.max_workers,
+        )
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent-hedge")
+            return self._pool
+
+    @staticmethod
+    def _key(model: str) -> tuple:
+        return metrics.current_stage() or "unknown", model or "default"
+
+    def _observe(self, key: tuple, latency: float):
+        with self._lock:
+            samples = self._latencies.get(key)
+            if samples is None:
+                samples = self._latencies[key] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def _threshold(self, key: tuple):
+        """
+        Returns the rolling percentile latency of a stage and model, or None while there are
+        too few samples to hedge it.
+        """
+        with self._lock:
+            samples = self._latencies.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+        return max(self.min_delay, ordered[index])
+
+    def _delay(self, key: tuple):
+        """
+        Counts a call and returns how long to wait before hedging it, or None if it should not be hedged.
+        """
+        with self._lock:
+            self.calls += 1
+        return self._threshold(key)
+
+    def _has_budget(self) -> bool:
+        with self._lock:
+            return self.hedged + 1 <= self.max_hedge_ratio * self.calls
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.max_hedge_ratio * self.calls:
+                return False
+            self.hedged += 1
+            return True
+
+    def _record_win(self, key: tuple, primary_elapsed: float, latency: float):
+        """
+        Records a call won by its hedge. The primary's latency is unknown, so the saving is
+        estimated from the recent latencies above the time it had already taken.
+        """
+        with self._lock:
+            self.hedge_wins += 1
+            tail = [sample for sample in self._latencies.get(key, ()) if sample > primary_elapsed]
+            if tail:
+                self.latency_saved += max(0.0, sum(tail) / len(tail) - latency)
+
+    def stats(self) -> dict:
+        """
+        Returns the call, hedged and hedge win counters, the hedge rate, the estimated
+        seconds of latency saved and the current hedging delay per stage and model.
+        """
+        with self._lock:
+            keys = list(self._latencies)
+            stats = {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": self.hedged / self.calls if self.calls else 0.0,
+                "latency_saved": self.latency_saved,
+            }
+        stats["delays"] = {"/".join(key): self._threshold(key) for key in keys}
+        return stats
+
+    def _timed(self, key: tuple, call):
+        started = time.monotonic()
+        result = call()
+        self._observe(key, time.monotonic() - started)
+        return result
+
+    def _run_primary(self, future: Future, context: contextvars.Context, key: tuple, call):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(self._timed, key, call))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def _hedged(self, model: str, call):
+        """
+        Runs a blocking call, hedging it when it is slower than usual.
+
+        Calls that cannot be hedged run in the caller's thread. Otherwise the primary
+        request gets a thread of its own, since the caller must be free to return the
+        hedge's response, and only the hedge request uses the pool: a primary queued
+        behind other calls would be slowed down and hedged for no reason.
+        """
+        key = self._key(model)
+        delay = self._delay(key)
+        if delay is None or not self._has_budget():
+            return self._timed(key, call)
+
+        pool = self._get_pool()
+        started = time.monotonic()
+        primary = Future()
+        threading.Thread(
+            target=self._run_primary,
+            args=(primary, contextvars.copy_context(), key, call),
+            name="agent-hedge-primary",
+            daemon=True
+        ).start()
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+        if not self._take_budget():
+            return primary.result()
+
+        primary_elapsed = time.monotonic() - started
+        hedge = pool.submit(contextvars.copy_context().run, self._timed, key, call)
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = primary if primary in done else hedge
+        other = hedge if winner is primary else primary
+        if winner.exception() is not None:
+            # The other request may still succeed
+            return other.result()
+        other.cancel()
+        if winner is hedge:
+            self._record_win(key, primary_elapsed, time.monotonic() - started)
+        return winner.result()
+
+    async def _async_hedged(self, model: str, call):
+        """
+        Awaitable version of _hedged. The losing request is cancelled.
+        """
+        key = self._key(model)
+        delay = self._delay(key)
+
+        async def timed():
+            started = time.monotonic()
+            result = await call()
+            self._observe(key, time.monotonic() - started)
+            return result
+
+        if delay is None:
+            return await timed()
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(timed())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._take_budget():
+                return await primary
+
+            primary_elapsed = time.monotonic() - started
+            hedge = asyncio.ensure_future(timed())
+            tasks.add(hedge)
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            winner = primary if primary in done else hedge
+            if winner.exception() is not None:
+                tasks.discard(winner)
+                return await tasks.pop()
+            if winner is hedge:
+                self._record_win(key, primary_elapsed, time.monotonic() - started)
+            return winner.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def llm_call(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> str:
+        return self._hedged(model, lambda: self.provider.llm_call(
+            prompt, system_prompt, model, messages, max_tokens, temperature
+        ))
+
+    async def async_llm_call(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> str:
+        return await self._async_hedged(model, lambda: self.provider.async_llm_call(
+            prompt, system_prompt, model, messages, max_tokens, temperature
+        ))
+
+    def llm_call_stream(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> Iterator[str]:
+        stream = self.provider.llm_call_stream(prompt, system_prompt, model, messages, max_tokens, temperature)
+        try:
+            yield from stream
+        finally:
+            stream.close()
+
+    def llm_call_with_tools(
+        self,
+        messages: list,
+        tools: list,
+        model: str = None,
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> ToolCallResponse:
+        return self._hedged(model, lambda: self.provider.llm_call_with_tools(
+            messages, tools, model, max_tokens, temperature
+        ))
+
+    async def async_llm_call_with_tools(
+        self,
+        messages: list,
+        tools: list,
+        model: str = None,
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> ToolCallResponse:
+        return await self._async_hedged(model, lambda: self.provider.async_llm_call_with_tools(
+            messages, tools, model, max_tokens, temperature
+        ))
@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from typing import Callable, Iterator
+
+from llm_providers.base_provider import BaseProvider, ToolCall, ToolCallResponse
+from utils.tokens import estimate_tokens
+
+
+class MockProvider(BaseProvider):
+    """
+    Deterministic provider for tests and benchmarks that never touches the network.
+
+    Each call is answered, in order of precedence, by a recorded response for the exact
+    same messages, by the responder function, or by the next scripted response. Simulated
+    latency makes the timings look like a real API without the noise: the same seed always
+    gives the same delays.
+
+    Responses may be ToolCallResponse objects, which llm_call_with_tools returns as they are;
+    plain strings are returned as content without tool calls.
+    """
+    supports_tools = True
+
+    def __init__(
+        self,
+        responses: list = None,
+        responder: Callable[[list], str] = None,
+        recordings: dict = None,
+        loop: bool = False,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        latency_per_token: float = 0.0,
+        seed: int = 0,
+        model: str = "mock"
+    ):
+        """
+        Args:
+            responses (list, optional): Scripted responses, returned in order.
+            responder (callable, optional): Function that takes the message list and returns the response.
+            recordings (dict, optional): Responses keyed by MockProvider.fingerprint(messages).
+            loop (bool): Whether to start over when the scripted responses run out.
+            latency (float): Seconds every call takes before the first token.
+            jitter (float): Up to this many seconds are added to or taken from the latency.
+            latency_per_token (float): Seconds per completion token, to mimic generation time.
+            seed (int): Seed of the jitter, so runs are repeatable.
+            model (str): Model name recorded in the metrics when the caller gives none.
+        """
+        super().__init__(api_key="mock")
+        self.responses = list(responses or [])
+        self.responder = responder
+        self.recordings = dict(recordings or {})
+        self.loop = loop
+        self.latency = latency
+        self.jitter = jitter
+        self.latency_per_token = latency_per_token
+        self.model = model
+        self.call_count = 0
+        self._scripted = itertools.cycle(self.responses) if loop and self.responses else iter(self.responses)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'MockProvider':
+        """
+        Creates a provider that replays a recorded conversation.
+
+        The file holds a JSON list or JSON lines of {"response": ...} entries, where an entry
+        may also have "tool_calls": [{"id", "name", "arguments"}]. Entries that also have
+        "messages" (or "prompt" and an optional "system_prompt") are matched against the
+        request; the others are scripted responses returned in order.
+
+        Args:
+            path (str): Path of the recording.
+            **kwargs: Any other MockProvider argument, such as latency.
+        """
+        with open(path) as f:
+            text = f.read().strip()
+        if text.startswith("["):
+            entries = json.loads(text)
+        else:
+            entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+        responses, recordings = [], {}
+        for entry in entries:
+            response = entry.get("response", "")
+            if entry.get("tool_calls"):
+                response = ToolCallResponse(response, [
+                    ToolCall(call.get("id", f"call_{i}"), call["name"], call.get("arguments", {}))
+                    for i, call in enumerate(entry["tool_calls"])
+                ])
+            if "messages" in entry or "prompt" in entry:
+                messages = cls._build_messages(entry.get("prompt"), entry.get("system_prompt"), entry.get("messages"))
+                recordings[cls.fingerprint(messages)] = response
+            else:
+                responses.append(response)
+        return cls(responses=responses, recordings=recordings, **kwargs)
+
+    @staticmethod
+    def fingerprint(messages: list) -> str:
+        """
+        Returns the key a recorded response for these messages is stored under.
+        """
+        return hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+
+    def _respond(self, messages: list) -> str:
+        if self.recordings:
+            response = self.recordings.get(self.fingerprint(messages))
+            if response is not None:
+                return response
+        if self.responder is not None:
+            return self.responder(messages)
+        with self._lock:
+            try:
+                return next(self._scripted)
+            except StopIteration:
+                raise Exception("MockProvider has no scripted response left")
+
+    def _delays(self, response) -> tuple:
+        """
+        Returns the seconds to wait before the first token and for generating the response.
+        """
+        if isinstance(response, ToolCallResponse):
+            response = response.content + json.dumps(response.message().get("tool_calls", []))
+        with self._lock:
+            self.call_count += 1
+            jitter = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + jitter), self.latency_per_token * estimate_tokens(response)
+
+    def llm_call(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> str:
+        started = time.monotonic()
+        messages = self._build_messages(prompt, system_prompt, messages)
+        response = self._respond(messages)
+        first_token, generation = self._delays(response)
+        if first_token + generation:
+            time.sleep(first_token + generation)
+        self._record_usage(model or self.model, started, messages=messages, completion=response)
+        return response
+
+    async def async_llm_call(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> str:
+        started = time.monotonic()
+        messages = self._build_messages(prompt, system_prompt, messages)
+        response = self._respond(messages)
+        first_token, generation = self._delays(response)
+        if first_token + generation:
+            await asyncio.sleep(first_token + generation)
+        self._record_usage(model or self.model, started, messages=messages, completion=response)
+        return response
+
+    def llm_call_stream(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = None,
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> Iterator[str]:
+        started = time.monotonic()
+        messages = self._build_messages(prompt, system_prompt, messages)
+        response = self._respond(messages)
+        first_token, generation = self._delays(response)
+        chunks = re.findall(r"\S+\s*", response) or [response]
+        if first_token:
+            time.sleep(first_token)
+        for chunk in chunks:
+            if generation:
+                time.sleep(generation / len(chunks))
+            yield chunk
+        self._record_usage(model or self.model, started, messages=messages, completion=response)
+
+    @staticmethod
+    def _as_tool_response(response) -> ToolCallResponse:
+        if isinstance(response, ToolCallResponse):
+            return response
+        return ToolCallResponse(content=response)
+
+    def llm_call_with_tools(
+        self,
+        messages: list,
+        tools: list,
+        model: str = None,
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> ToolCallResponse:
+        started = time.monotonic()
+        response = self._as_tool_response(self._respond(messages))
+        first_token, generation = self._delays(response)
+        if first_token + generation:
+            time.sleep(first_token + generation)
+        self._record_usage(model or self.model, started, messages=messages, completion=response.content)
+        return response
+
+    async def async_llm_call_with_tools(
+        self,
+        messages: list,
+        tools: list,
+        model: str = None,
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> ToolCallResponse:
+        started = time.monotonic()
+        response = self._as_tool_response(self._respond(messages))
+        first_token, generation = self._delays(response)
+        if first_token + generation:
+            await asyncio.sleep(first_token + generation)
+        self._record_usage(model or self.model, started, messages=messages, completion=response.content)
+        return response
@@ -1,16 +1,36 @@
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncOpenAI,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
 import os
+import time
+from typing import Iterator
 
-from llm_providers.base_provider import BaseProvider
+from config.config import LLMConfig
+from llm_providers.base_provider import BaseProvider, ToolCall, ToolCallResponse
+from llm_providers.client_pool import get_async_openai_client, get_openai_client
+from utils.rate_limit import get_rate_limiter
+from utils.retry import RetryPolicy, async_call_with_retry, call_with_retry, parse_retry_after
 
 
 class OpenAIProvider(BaseProvider):
+    supports_tools = True
+
     def __init__(
         self,
         api_key: str = None,
         temperature: float = 0.1,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        client: OpenAI = None,
+        async_client: AsyncOpenAI = None,
+        retry_policy: RetryPolicy = None,
+        requests_per_minute: float = None,
+        pool_settings: dict = None
     ):
         """
         Initialize OpenAI provider.
@@ -19,9 +39,95 @@ class OpenAIProvider(BaseProvider):
             api_key (str, optional): OpenAI API key.
             temperature (float, optional): Sampling temperature.
             max_tokens (int, optional): Maximum tokens for response.
+            client (OpenAI, optional): Client to use, e.g. a shared one from client_pool.
+            async_client (AsyncOpenAI, optional): Async client to use.
+            retry_policy (RetryPolicy, optional): Retries for rate limits, timeouts and server
+                errors. Defaults to no retries on top of the client's own.
+            requests_per_minute (float, optional): Client-side request limit per model.
+            pool_settings (dict, optional): Settings of the shared clients from client_pool.
+                Without an async_client, async calls use the shared client of their event loop.
         """
         super().__init__(api_key, temperature, max_tokens)
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = client or OpenAI(api_key=self.api_key)
+        if async_client is None and pool_settings is None:
+            async_client = AsyncOpenAI(api_key=self.api_key)
+        self.async_client = async_client
+        self.pool_settings = pool_settings
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=0)
+        self.requests_per_minute = requests_per_minute
+
+    @classmethod
+    def from_config(cls, llm_config: LLMConfig) -> 'OpenAIProvider':
+        """
+        Creates a provider on the process-wide clients for the config's connection settings,
+        with its retry policy and rate limit.
+        """
+        pool_settings = dict(
+            api_key=llm_config.api_key,
+            base_url=llm_config.base_url,
+            timeout=llm_config.timeout,
+            max_connections=llm_config.pool_max_connections,
+            max_keepalive_connections=llm_config.pool_max_keepalive,
+            keepalive_expiry=llm_config.pool_keepalive_expiry,
+        )
+        return cls(
+            api_key=llm_config.api_key,
+            temperature=llm_config.temperature,
+            max_tokens=llm_config.max_tokens,
+            client=get_openai_client(**pool_settings),
+            retry_policy=RetryPolicy(
+                max_retries=llm_config.max_retries,
+                backoff_base=llm_config.backoff_base,
+                backoff_max=llm_config.backoff_max,
+            ),
+            requests_per_minute=llm_config.requests_per_minute,
+            pool_settings=pool_settings,
+        )
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        # APIConnectionError includes APITimeoutError
+        return isinstance(error, (RateLimitError, APIConnectionError, InternalServerError))
+
+    @staticmethod
+    def _retry_after(error: Exception):
+        if not isinstance(error, APIStatusError):
+            return None
+        headers = error.response.headers
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000
+            except ValueError:
+                pass
+        return parse_retry_after(headers.get("retry-after"))
+
+    def _create(self, **kwargs):
+        """
+        Creates a chat completion, waiting for the model's rate limit and retrying transient errors.
+        """
+        limiter = get_rate_limiter(kwargs["model"], self.requests_per_minute)
+
+        def attempt():
+            if limiter is not None:
+                limiter.acquire()
+            return self.client.chat.completions.create(**kwargs)
+
+        return call_with_retry(attempt, self.retry_policy, self._is_retryable, self._retry_after)
+
+    async def _async_create(self, **kwargs):
+        """
+        Async version of _create.
+        """
+        limiter = get_rate_limiter(kwargs["model"], self.requests_per_minute)
+        client = self.async_client or get_async_openai_client(**self.pool_settings)
+
+        async def attempt():
+            if limiter is not None:
+                await limiter.async_acquire()
+            return await client.chat.completions.create(**kwargs)
+
+        return await async_call_with_retry(attempt, self.retry_policy, self._is_retryable, self._retry_after)
 
     def llm_call(
         self,
@@ -39,27 +145,142 @@ class OpenAIProvider(BaseProvider):
         max_tokens = max_tokens if max_tokens is not None else self.max_tokens
         temperature = temperature if temperature is not None else self.temperature
 
-        if messages:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-        else:
-            if system_prompt:
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt},
-                ]
-            else:
-                messages = [{"role": "user", "content": prompt}]
-
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
+        started = time.monotonic()
+        response = self._create(
+            model=model,
+            messages=self._build_messages(prompt, system_prompt, messages),
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        self._record_usage(model, started, usage=response.usage)
 
         return response.choices[0].message.content
+
+    async def async_llm_call(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = "gpt-4o-mini",
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> str:
+        """
+        Call OpenAI API with the async client.
+        """
+        max_tokens = max_tokens if max_tokens is not None else self.max_tokens
+        temperature = temperature if temperature is not None else self.temperature
+
+        started = time.monotonic()
+        response = await self._async_create(
+            model=model,
+            messages=self._build_messages(prompt, system_prompt, messages),
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        self._record_usage(model, started, usage=response.usage)
+
+        return response.choices[0].message.content
+
+    def llm_call_stream(
+        self,
+        prompt: str = None,
+        system_prompt: str = None,
+        model: str = "gpt-4o-mini",
+        messages: list = [],
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> Iterator[str]:
+        """
+        Call OpenAI API with streaming, yielding content chunks as they arrive.
+        """
+        max_tokens = max_tokens if max_tokens is not None else self.max_tokens
+        temperature = temperature if temperature is not None else self.temperature
+
+        messages = self._build_messages(prompt, system_prompt, messages)
+        started = time.monotonic()
+        # Only opening the stream is retried, a stream that fails midway is not replayed
+        stream = self._create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        chunks, usage = [], None
+        try:
+            for chunk in stream:
+                # The last chunk carries the usage and no choices
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    chunks.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing early (e.g. the consumer stopped reading) releases the connection
+            stream.close()
+            self._record_usage(model, started, usage=usage, messages=messages, completion="".join(chunks))
+
+    @staticmethod
+    def _tool_call_response(response) -> ToolCallResponse:
+        message = response.choices[0].message
+        return ToolCallResponse(
+            content=message.content or "",
+            tool_calls=[
+                ToolCall.from_json(call.id, call.function.name, call.function.arguments)
+                for call in message.tool_calls or []
+            ],
+        )
+
+    def llm_call_with_tools(
+        self,
+        messages: list,
+        tools: list,
+        model: str = "gpt-4o-mini",
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> ToolCallResponse:
+        """
+        Call OpenAI API with native tools, allowing parallel tool calls.
+        """
+        max_tokens = max_tokens if max_tokens is not None else self.max_tokens
+        temperature = temperature if temperature is not None else self.temperature
+
+        started = time.monotonic()
+        response = self._create(
+            model=model,
+            messages=messages,
+            tools=tools,
+            parallel_tool_calls=True,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        self._record_usage(model, started, usage=response.usage)
+        return self._tool_call_response(response)
+
+    async def async_llm_call_with_tools(
+        self,
+        messages: list,
+        tools: list,
+        model: str = "gpt-4o-mini",
+        max_tokens: int = None,
+        temperature: float = None,
+    ) -> ToolCallResponse:
+        """
+        Call OpenAI API with native tools and the async client.
+        """
+        max_tokens = max_tokens if max_tokens is not None else self.max_tokens
+        temperature = temperature if temperature is not None else self.temperature
+
+        started = time.monotonic()
+        response = await self._async_create(
+            model=model,
+            messages=messages,
+            tools=tools,
+            parallel_tool_calls=True,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        self._record_usage(model, started, usage=response.usage)
+        return self._tool_call_response(response)
@@ -0,0 +1,46 @@
+import threading
+from typing import Callable
+
+from config.config import LLMConfig
+from llm_providers.base_provider import BaseProvider
+from llm_providers.openai_provider import OpenAIProvider
+
+
+# Provider factories by the name used in LLMConfig.provider
+_factories = {
+    "openai": OpenAIProvider.from_config,
+}
+_lock = threading.Lock()
+
+
+def register_provider(name: str, factory: Callable[[LLMConfig], BaseProvider]):
+    """
+    Makes a provider available to configs, e.g. llm.provider or a stage route.
+
+    Args:
+        name (str): Name to use in the config.
+        factory (callable): Function building the provider from an LLMConfig.
+    """
+    with _lock:
+        _factories[name] = factory
+
+
+def available_providers() -> list:
+    with _lock:
+        return sorted(_factories)
+
+
+def create_provider(llm_config: LLMConfig) -> BaseProvider:
+    """
+    Creates the provider named by llm_config.provider.
+
+    Raises:
+        ValueError: No provider is registered under that name.
+    """
+    with _lock:
+        factory = _factories.get(llm_config.provider)
+    if factory is None:
+        raise ValueError(
+            f"Unknown LLM provider: {llm_config.provider}. Available: {', '.join(available_providers())}"
+        )
+    return factory(llm_config)
@@ -0,0 +1,240 @@
+import asyncio
+import dataclasses
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+from config.config import LLMConfig
+from llm_providers.base_provider import BaseProvider, ToolCallResponse
+from llm_providers.registry import create_provider
+
+
+# The agent stages whose LLM calls can be routed, named as in the metrics
+ROUTE_STAGES = ("planner", "executor", "response_generator", "speculative_draft", "summarizer")
+# Stages without a route of their own that follow another stage's route
+_INHERITED_ROUTES = {"speculative_draft": "response_generator"}
+# Settings sent with each request; changing any other setting needs its own provider
+_REQUEST_SETTINGS = ("model", "temperature", "max_tokens")
+_LLM_SETTINGS = {f.name for f in dataclasses.fields(LLMConfig)} - {"routes", "fallbacks"}
+
+logger = logging.getLogger('agent')
+
+
+@dataclass
+class RouteTarget:
+    """
+    A provider and model a stage can be sent to. temperature and max_tokens are None when
+    the provider defaults apply. timeout is only set when the route asks for one.
+    """
+    provider: BaseProvider
+    model: str
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    timeout: Optional[float] = None
+
+
+class LLMRouter:
+    """
+    Sends each stage's LLM calls to the provider and model configured for it, trying the
+    stage's fallbacks in order when a call fails or times out.
+
+    Routes come from llm.routes, keyed by stage. A route overrides any llm setting and may
+    list its own fallbacks, each overriding the route's settings in turn; without one the
+    stage uses llm.fallbacks. Routes that only change the model, temperature or max_tokens
+    share the default provider, others get a provider from the registry.
+    """
+    def __init__(
+        self,
+        llm_config: LLMConfig,
+        default_provider: BaseProvider = None,
+        wrap: Callable[[BaseProvider], BaseProvider] = None
+    ):
+        """
+        Args:
+            llm_config (LLMConfig): The llm section of the config, with its routes and fallbacks.
+            default_provider (BaseProvider, optional): Provider for the default connection
+                settings. If None, it is created from the registry.
+            wrap (callable, optional): Applied to every provider the router creates, e.g. to
+                add a cache.
+        """
+        unknown = set(llm_config.routes) - set(ROUTE_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown stages in llm.routes: {', '.join(sorted(unknown))}")
+        self.llm_config = llm_config
+        self.wrap = wrap
+        self.default_provider = default_provider or self._create(llm_config)
+        self._providers = {}
+        self.fallbacks = {stage: 0 for stage in ROUTE_STAGES}
+        self._lock = threading.Lock()
+        self.routes = {stage: self._resolve(stage) for stage in ROUTE_STAGES}
+
+    def _create(self, llm_config: LLMConfig) -> BaseProvider:
+        provider = create_provider(llm_config)
+        return self.wrap(provider) if self.wrap is not None else provider
+
+    @staticmethod
+    def _connection(llm_config: LLMConfig) -> tuple:
+        return tuple(
+            (name, getattr(llm_config, name))
+            for name in sorted(_LLM_SETTINGS) if name not in _REQUEST_SETTINGS
+        )
+
+    def _resolve(self, stage: str) -> list:
+        """
+        Returns the targets of a stage: its route, then its fallbacks.
+        """
+        routes = self.llm_config.routes
+        route = routes.get(stage)
+        if route is None:
+            route = routes.get(_INHERITED_ROUTES.get(stage), {})
+        route = dict(route or {})
+        fallbacks = route.pop("fallbacks", self.llm_config.fallbacks)
+
+        primary_config, primary = self._target(self.llm_config, route, stage)
+        targets = [primary]
+        for overrides in fallbacks or []:
+            targets.append(self._target(primary_config, overrides, stage)[1])
+        return targets
+
+    def _target(self, base: LLMConfig, overrides: dict, stage: str) -> tuple:
+        unknown = set(overrides) - _LLM_SETTINGS
+        if unknown:
+            raise ValueError(f"Unknown settings in the {stage} route: {', '.join(sorted(unknown))}")
+        llm_config = dataclasses.replace(base, **overrides)
+
+        connection = self._connection(llm_config)
+        if connection == self._connection(self.llm_config):
+            provider = self.default_provider
+        else:
+            provider = self._providers.get(connection)
+            if provider is None:
+                provider = self._providers[connection] = self._create(llm_config)
+
+        root = self.llm_config
+        return llm_config, RouteTarget(
+            provider=provider,
+            model=llm_config.model,
+            temperature=llm_config.temperature if llm_config.temperature != root.temperature else None,
+            max_tokens=llm_config.max_tokens if llm_config.max_tokens != root.max_tokens else None,
+            timeout=llm_config.timeout if "timeout" in overrides else None,
+        )
+
+    def supports_tools(self, stage: str) -> bool:
+        """
+        Returns whether every target of the stage supports native tool calls.
+        """
+        return all(target.provider.supports_tools for target in self.routes[stage])
+
+    def stats(self) -> dict:
+        """
+        Returns the number of fallbacks taken per stage.
+        """
+        with self._lock:
+            return dict(self.fallbacks)
+
+    def _fall_back(self, stage: str, failed: RouteTarget, next_target: RouteTarget, error: Exception):
+        with self._lock:
+            self.fallbacks[stage] += 1
+        logger.warning(
+            f"{stage} call to {failed.model} failed ({type(error).__name__}: {error}), "
+            f"falling back to {next_target.model}"
+        )
+
+    def _first_success(self, stage: str, call: Callable[[RouteTarget], object]):
+        targets = self.routes[stage]
+        for i, target in enumerate(targets):
+            try:
+                return call(target)
+            except Exception as e:
+                if i == len(targets) - 1:
+                    raise
+                self._fall_back(stage, target, targets[i + 1], e)
+
+    async def _async_first_success(self, stage: str, call):
+        targets = self.routes[stage]
+        for i, target in enumerate(targets):
+            try:
+                return await asyncio.wait_for(call(target), target.timeout)
+            except Exception as e:
+                if i == len(targets) - 1:
+                    raise
+                self._fall_back(stage, target, targets[i + 1], e)
+
+    def call(self, stage: str, prompt: str = None, system_prompt: str = None, messages: list = None) -> str:
+        """
+        Calls the LLM for a stage. Takes the same arguments as BaseProvider.llm_call, the
+        model and sampling settings coming from the route.
+        """
+        return self._first_success(stage, lambda target: target.provider.llm_call(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            model=target.model,
+            messages=messages or [],
+            max_tokens=target.max_tokens,
+            temperature=target.temperature,
+        ))
+
+    async def async_call(self, stage: str, prompt: str = None, system_prompt: str = None, messages: list = None) -> str:
+        """
+        Awaitable version of call. Fallbacks also apply when a target exceeds its route timeout.
+        """
+        return await self._async_first_success(stage, lambda target: target.provider.async_llm_call(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            model=target.model,
+            messages=messages or [],
+            max_tokens=target.max_tokens,
+            temperature=target.temperature,
+        ))
+
+    def stream(self, stage: str, prompt: str = None, system_prompt: str = None, messages: list = None) -> Iterator[str]:
+        """
+        Streaming version of call. A target can only fall back before its first chunk.
+        """
+        targets = self.routes[stage]
+        for i, target in enumerate(targets):
+            chunks = target.provider.llm_call_stream(
+                prompt=prompt,
+                system_prompt=system_prompt,
+                model=target.model,
+                messages=messages or [],
+                max_tokens=target.max_tokens,
+                temperature=target.temperature,
+            )
+            started = False
+            try:
+                for chunk in chunks:
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or i == len(targets) - 1:
+                    raise
+                self._fall_back(stage, target, targets[i + 1], e)
+            finally:
+                chunks.close()
+
+    def call_with_tools(self, stage: str, messages: list, tools: list) -> ToolCallResponse:
+        """
+        Calls the LLM for a stage with native tool definitions (see BaseProvider.llm_call_with_tools).
+        """
+        return self._first_success(stage, lambda target: target.provider.llm_call_with_tools(
+            messages=messages,
+            tools=tools,
+            model=target.model,
+            max_tokens=target.max_tokens,
+            temperature=target.temperature,
+        ))
+
+    async def async_call_with_tools(self, stage: str, messages: list, tools: list) -> ToolCallResponse:
+        """
+        Awaitable version of call_with_tools.
+        """
+        return await self._async_first_success(stage, lambda target: target.provider.async_llm_call_with_tools(
+            messages=messages,
+            tools=tools,
+            model=target.model,
+            max_tokens=target.max_tokens,
+            temperature=target.temperature,
+        ))
@@ -4,7 +4,8 @@ At the end of the loop you output an Answer.
 The plan provided serves as a guide for your thought process, helping you interpret the task and decide the appropriate actions to take.
 Use Thought to describe your thoughts about the question you have been asked.
 Use Action to run one of the actions available to you - then return PAUSE.
-Observation will be the result of running those actions.
+If several actions do not depend on each other, write one Action line for each before PAUSE; they run together.
+Observation will be the result of running those actions. For several actions it is a list with one entry per action, in order.
 
 Your available actions are:
 {available_tools_with_params}
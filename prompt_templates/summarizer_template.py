@@ -0,0 +1,17 @@
+prompt = """
+<instructions>
+Update the running summary of a conversation between a user and an AI assistant.
+Merge the new messages into the current summary.
+Keep facts, numbers, names, user preferences and tool results that may matter later in the conversation. Drop greetings and filler.
+Keep the summary under {max_words} words.
+Output only the updated summary inside <summary></summary> tags.
+</instructions>
+
+<current_summary>
+{summary}
+</current_summary>
+
+<new_messages>
+{new_messages}
+</new_messages>
+"""
@@ -1,5 +1,56 @@
+import random
+import re
+import threading
+import time
+
 import pytest
 from config.config import Config, LLMConfig
+from llm_providers.base_provider import BaseProvider
+
+
+class ScriptedProvider(BaseProvider):
+    """
+    Provider that returns queued responses in order and records every call.
+    """
+    def __init__(self, responses):
+        super().__init__(api_key="test-key")
+        self.responses = list(responses)
+        self.calls = []
+
+    def llm_call(self, prompt=None, system_prompt=None, model=None, messages=[], max_tokens=None, temperature=None):
+        started = time.monotonic()
+        self.calls.append({"prompt": prompt, "model": model, "messages": list(messages)})
+        response = self.responses.pop(0)
+        self._record_usage(model, started, messages=self._build_messages(prompt, system_prompt, messages), completion=response)
+        return response
+
+    def llm_call_stream(self, prompt=None, system_prompt=None, model=None, messages=[], max_tokens=None, temperature=None):
+        response = self.llm_call(prompt, system_prompt, model, messages, max_tokens, temperature)
+        yield from re.findall(r"\S+\s*", response)
+
+
+class EchoProvider(BaseProvider):
+    """
+    Thread-safe provider: plans nothing and answers with the questions seen in the conversation.
+    """
+    def __init__(self, fail_on=None, delay=0.0):
+        super().__init__(api_key="test-key")
+        self.fail_on = fail_on
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def llm_call(self, prompt=None, system_prompt=None, model=None, messages=[], max_tokens=None, temperature=None):
+        with self.lock:
+            self.calls += 1
+        if prompt is not None:
+            return "<plan></plan>"
+        questions = [message["content"] for message in messages if message["role"] == "user"]
+        if self.fail_on in questions:
+            raise RuntimeError("provider failure")
+        time.sleep(random.uniform(0, self.delay))
+        return "answer to " + " + ".join(questions)
+
 
 @pytest.fixture
 def mock_config():
@@ -13,4 +64,23 @@ def mock_config():
         ),
         debug=True,
         log_level="DEBUG"
-    ) 
\ No newline at end of file
+    )
+
+
+@pytest.fixture
+def agent_config():
+    return Config(
+        llm=LLMConfig(model="test-model", api_key="test-key"),
+        debug=False,
+        log_level="WARNING"
+    )
+
+
+@pytest.fixture
+def scripted_provider():
+    return ScriptedProvider
+
+
+@pytest.fixture
+def echo_provider():
+    return EchoProvider
@@ -0,0 +1,68 @@
+import json
+
+from utils.action_stream import ActionStreamParser
+from utils.react_parser import parse_react_response
+
+
+def feed_all(parser, chunks):
+    actions = []
+    for chunk in chunks:
+        actions.extend(parser.feed(chunk))
+    return actions
+
+
+class TestActionStreamParser:
+    def test_action_detected_when_json_closes(self):
+        parser = ActionStreamParser()
+        assert parser.feed('Thought: calc\nAction: {"tool": "CalculateTool", ') == []
+        assert parser.feed('"parameters": {"expression": "1 + 1"}') == []
+        # Detected on the closing brace, before the newline arrives
+        assert parser.feed('}') == ['{"tool": "CalculateTool", "parameters": {"expression": "1 + 1"}}']
+        assert parser.feed('\nPAUSE') == []
+        assert parser.paused
+
+    def test_braces_inside_strings(self):
+        parser = ActionStreamParser()
+        action = 'Action: {"tool": "EchoTool", "parameters": {"text": "a } and a {"}}'
+        actions = feed_all(parser, [action[i:i + 3] for i in range(0, len(action), 3)])
+        assert [json.loads(a)["parameters"]["text"] for a in actions] == ["a } and a {"]
+
+    def test_multiple_actions_and_pause_stops_reading(self):
+        parser = ActionStreamParser()
+        chunks = [
+            'Action: {"tool": "A", "parameters": {}}\n',
+            'Action: {"tool": "B", "parameters": {}}\nPAU',
+            'SE\nObservation: made up by the model',
+        ]
+        actions = feed_all(parser, chunks)
+        assert [json.loads(a)["tool"] for a in actions] == ["A", "B"]
+        assert parser.paused
+        assert parser.text.endswith("PAUSE")
+        assert parser.feed("more text") == []
+
+    def test_final_answer_has_no_actions(self):
+        parser = ActionStreamParser()
+        assert feed_all(parser, ["Answer: ", "42", "\n"]) == []
+        assert not parser.paused
+        assert parser.text == "Answer: 42\n"
+
+    def test_multi_line_action_is_parsed_like_the_complete_response(self):
+        response = (
+            'Thought: calc\nAction: {\n  "tool": "CalculateTool",\n'
+            '  "parameters": {"expression": "1 + 1"}\n}\nPAUSE'
+        )
+        parser = ActionStreamParser()
+        actions = feed_all(parser, [response[i:i + 4] for i in range(0, len(response), 4)])
+
+        assert [json.loads(a) for a in actions] == [
+            {"tool": action.tool, "parameters": action.parameters}
+            for action in parse_react_response(response).actions
+        ]
+        assert parser.paused
+
+    def test_invalid_action_is_reported_when_the_next_section_starts(self):
+        parser = ActionStreamParser()
+        assert feed_all(parser, ['Action: {"tool": A}\n', 'Action: {"tool": "B"}\n']) == ['{"tool": A}', '{"tool": "B"}']
+        parser = ActionStreamParser()
+        assert feed_all(parser, ['Action: {"tool": "A"']) == []
+        assert parser.finish() == ['{"tool": "A"']
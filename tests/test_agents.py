@@ -0,0 +1,397 @@
+import asyncio
+import json
+import os
+import time
+
+from agents.async_basic_agent import AsyncBasicAgent
+from agents.basic_agent import BasicAgent
+from llm_providers.base_provider import ToolCall, ToolCallResponse
+from llm_providers.mock_provider import MockProvider
+from tools.base_tool import BaseTool
+from tools.calculate import CalculateTool
+
+
+PLAN = "<plan>Use CalculateTool to compute the product.</plan>"
+ACTION = 'Thought: I should calculate\nAction: {"tool": "CalculateTool", "parameters": {"expression": "15 * 45"}}\nPAUSE'
+MULTI_ACTION = (
+    'Thought: I need three cities\n'
+    'Action: {"tool": "SleepyTool", "parameters": {"city": "London", "delay": 0.2}}\n'
+    'Action: {"tool": "SleepyTool", "parameters": {"city": "Tokyo", "delay": 0.2}}\n'
+    'Action: {"tool": "SleepyTool", "parameters": {"city": "Paris", "delay": 0.2}}\n'
+    'PAUSE'
+)
+
+
+class SleepyTool(BaseTool):
+    def __init__(self):
+        super().__init__(
+            name="SleepyTool",
+            description="Sleeps, then echoes the city",
+            input_params={"city": "str", "delay": "float"},
+            output_format={"city": "str"}
+        )
+
+    def execute(self, **kwargs):
+        time.sleep(kwargs["delay"])
+        return {"city": kwargs["city"]}
+
+
+class AsyncSleepyTool(SleepyTool):
+    async def execute(self, **kwargs):
+        await asyncio.sleep(kwargs["delay"])
+        return {"city": kwargs["city"]}
+
+
+class ProcessSleepyTool(SleepyTool):
+    """SleepyTool run in the process pool, reporting the process it ran in."""
+    def __init__(self):
+        super().__init__()
+        self.execution = "process"
+
+    def execute(self, **kwargs):
+        return {**super().execute(**kwargs), "pid": os.getpid()}
+
+
+def observed_cities(provider, call_index):
+    observation = provider.calls[call_index]["messages"][-1]["content"]
+    batch = json.loads(observation[len("Observation: "):])
+    return [entry["result"].get("city", entry["result"].get("error")) for entry in batch]
+
+
+class TestBasicAgent:
+    def test_executes_plan_and_answers(self, agent_config, scripted_provider):
+        provider = scripted_provider([PLAN, ACTION, "Answer: 675", "15 * 45 is 675."])
+        agent = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+        assert agent("What is 15 * 45?") == "15 * 45 is 675."
+        # The observation from the tool is fed back to the executor
+        assert provider.calls[2]["messages"][-1]["content"] == 'Observation: {"result": 675}'
+        assert agent.messages[-2]["content"] == "<agent_answer>Answer: 675</agent_answer>"
+
+    def test_repeated_construction_reuses_logging_and_prompts(self, agent_config, scripted_provider):
+        first = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=scripted_provider([]))
+        handlers = list(first.logger.handlers)
+        second = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=scripted_provider([]))
+
+        assert second.logger.handlers == handlers
+        assert second.available_tools is first.available_tools
+        assert "CalculateTool" in second.executor_system_prompt
+
+    def test_routes_each_stage_to_its_model(self, agent_config, scripted_provider):
+        agent_config.llm.routes = {"planner": {"model": "small-model"}, "response_generator": {"model": "large-model"}}
+        provider = scripted_provider([PLAN, ACTION, "Answer: 675", "15 * 45 is 675."])
+        agent = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+        agent("What is 15 * 45?")
+        assert [call["model"] for call in provider.calls] == ["small-model", "test-model", "test-model", "large-model"]
+
+    def test_empty_plan_skips_executor(self, agent_config, scripted_provider):
+        provider = scripted_provider(["<plan></plan>", "Brasilia."])
+        agent = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+        assert agent("What is the capital of Brazil?") == "Brasilia."
+        assert len(provider.calls) == 2
+
+
+    def test_runs_all_actions_of_a_turn_in_parallel(self, agent_config, scripted_provider):
+        provider = scripted_provider([PLAN, MULTI_ACTION, "Answer: done", "Done."])
+        agent = BasicAgent(tools=[SleepyTool()], config=agent_config, llm_provider=provider)
+
+        started = time.monotonic()
+        agent("Weather in three cities?")
+        assert time.monotonic() - started < 0.5
+        assert observed_cities(provider, 2) == ["London", "Tokyo", "Paris"]
+
+    def test_slow_tool_times_out(self, agent_config, scripted_provider):
+        agent_config.agent.tool_timeout = 0.1
+        slow_action = MULTI_ACTION.replace('"Tokyo", "delay": 0.2', '"Tokyo", "delay": 1').replace("0.2", "0.01")
+        provider = scripted_provider([PLAN, slow_action, "Answer: done", "Done."])
+        agent = BasicAgent(tools=[SleepyTool()], config=agent_config, llm_provider=provider)
+
+        agent("Weather in three cities?")
+        assert observed_cities(provider, 2) == ["London", "SleepyTool timed out after 0.1s", "Paris"]
+        agent.close()
+
+    def test_runs_cpu_bound_tools_in_processes(self, agent_config, scripted_provider):
+        provider = scripted_provider([PLAN, MULTI_ACTION, "Answer: done", "Done."])
+        agent = BasicAgent(tools=[ProcessSleepyTool()], config=agent_config, llm_provider=provider)
+
+        agent("Weather in three cities?")
+        assert observed_cities(provider, 2) == ["London", "Tokyo", "Paris"]
+        batch = json.loads(provider.calls[2]["messages"][-1]["content"][len("Observation: "):])
+        assert os.getpid() not in {entry["result"]["pid"] for entry in batch}
+
+    def test_tool_timeout_cancels_async_tool(self, agent_config, scripted_provider):
+        cancelled = []
+
+        class CancellableTool(AsyncSleepyTool):
+            async def execute(self, **kwargs):
+                try:
+                    return await super().execute(**kwargs)
+                except asyncio.CancelledError:
+                    cancelled.append(kwargs["city"])
+                    raise
+
+        tool = CancellableTool()
+        tool.timeout = 0.1  # overrides the agent's tool_timeout
+        slow_action = MULTI_ACTION.replace('"Tokyo", "delay": 0.2', '"Tokyo", "delay": 1').replace("0.2", "0.01")
+        provider = scripted_provider([PLAN, slow_action, "Answer: done", "Done."])
+        agent = BasicAgent(tools=[tool], config=agent_config, llm_provider=provider)
+
+        agent("Weather in three cities?")
+        assert observed_cities(provider, 2) == ["London", "SleepyTool timed out after 0.1s", "Paris"]
+        time.sleep(0.05)
+        assert cancelled == ["Tokyo"]
+
+
+    def test_stream_emits_events_and_tokens(self, agent_config, scripted_provider):
+        provider = scripted_provider([PLAN, ACTION, "Answer: 675", "15 * 45 is 675."])
+        agent = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+        events = list(agent.stream("What is 15 * 45?"))
+        types = [event.type for event in events]
+        assert types == ["plan", "action", "observation"] + ["token"] * 5 + ["answer"]
+        assert events[1].data == {"tool": "CalculateTool", "parameters": {"expression": "15 * 45"}}
+        assert events[2].data == {"tool": "CalculateTool", "result": {"result": 675}}
+        assert "".join(event.data for event in events if event.type == "token") == "15 * 45 is 675."
+        assert events[-1].data == agent.messages[-1]["content"] == "15 * 45 is 675."
+
+    def test_stream_reports_executor_errors(self, agent_config, scripted_provider):
+        bad_action = 'Action: {"tool": "MissingTool", "parameters": {}}\nPAUSE'
+        provider = scripted_provider([PLAN, bad_action, "Sorry."])
+        agent = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+        events = list(agent.stream("What is 15 * 45?"))
+        assert [event.type for event in events] == ["plan", "error", "token", "answer"]
+        assert "internal error" in agent.messages[-2]["content"]
+
+
+    def test_stream_executor_starts_tools_early_and_stops_at_pause(self, agent_config, scripted_provider):
+        agent_config.agent.stream_executor = True
+        provider = scripted_provider([PLAN, ACTION + "\nObservation: hallucinated", "Answer: 675", "15 * 45 is 675."])
+        agent = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+        assert agent("What is 15 * 45?") == "15 * 45 is 675."
+        executor_reply = provider.calls[2]["messages"][-2]["content"]
+        assert executor_reply.endswith("PAUSE")
+        assert "hallucinated" not in executor_reply
+        assert provider.calls[2]["messages"][-1]["content"] == 'Observation: {"result": 675}'
+
+    def test_stream_executor_runs_multi_line_actions(self, agent_config, scripted_provider):
+        agent_config.agent.stream_executor = True
+        action = 'Thought: I should calculate\nAction: {\n  "tool": "CalculateTool",\n  "parameters": {"expression": "15 * 45"}\n}\nPAUSE'
+        provider = scripted_provider([PLAN, action, "Answer: 675", "15 * 45 is 675."])
+        agent = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+        assert agent("What is 15 * 45?") == "15 * 45 is 675."
+        assert provider.calls[2]["messages"][-1]["content"] == 'Observation: {"result": 675}'
+
+
+class TestAsyncBasicAgent:
+    def test_executes_plan_and_answers(self, agent_config, scripted_provider):
+        provider = scripted_provider([PLAN, ACTION, "Answer: 675", "15 * 45 is 675."])
+        agent = AsyncBasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+        assert asyncio.run(agent("What is 15 * 45?")) == "15 * 45 is 675."
+        assert provider.calls[2]["messages"][-1]["content"] == 'Observation: {"result": 675}'
+
+    def test_runs_async_tools_in_parallel(self, agent_config, scripted_provider):
+        provider = scripted_provider([PLAN, MULTI_ACTION, "Answer: done", "Done."])
+        agent = AsyncBasicAgent(tools=[AsyncSleepyTool()], config=agent_config, llm_provider=provider)
+
+        started = time.monotonic()
+        asyncio.run(agent("Weather in three cities?"))
+        assert time.monotonic() - started < 0.5
+        assert observed_cities(provider, 2) == ["London", "Tokyo", "Paris"]
+
+    def test_concurrent_conversations(self, agent_config, scripted_provider):
+        async def ask(i):
+            provider = scripted_provider(["<plan></plan>", f"answer {i}"])
+            agent = AsyncBasicAgent(tools=[], config=agent_config, llm_provider=provider)
+            return await agent(f"question {i}")
+
+        async def main():
+            return await asyncio.gather(*(ask(i) for i in range(20)))
+
+        assert asyncio.run(main()) == [f"answer {i}" for i in range(20)]
+
+
+class TestNativeToolCalls:
+    def native_agent(self, agent_config, tools, responses):
+        agent_config.agent.execution_mode = "native"
+        calls = []
+
+        def responder(messages):
+            calls.append(list(messages))
+            return responses.pop(0)
+
+        return BasicAgent(tools=tools, config=agent_config, llm_provider=MockProvider(responder=responder)), calls
+
+    def test_parallel_tool_calls_and_errors_are_returned_as_tool_messages(self, agent_config):
+        tool_calls = ToolCallResponse(tool_calls=[
+            ToolCall("call_1", "SleepyTool", {"city": "London", "delay": 0.2}),
+            ToolCall("call_2", "SleepyTool", {"city": "Tokyo", "delay": 0.2}),
+            ToolCall("call_3", "WeatherTool", {"city": "Paris"}),
+            ToolCall.from_json("call_4", "SleepyTool", '{"city": '),
+        ])
+        agent, calls = self.native_agent(agent_config, [SleepyTool()], [PLAN, tool_calls, "London and Tokyo.", "Done."])
+
+        started = time.monotonic()
+        assert agent("Weather?") == "Done."
+        assert time.monotonic() - started < 0.4
+
+        executor = calls[2]
+        # The tool list is not pasted into the prompt, the provider gets the schemas
+        assert "SleepyTool" not in executor[0]["content"]
+        assert agent.tool_schemas[0]["function"]["parameters"]["required"] == ["city", "delay"]
+        assert [message["tool_call_id"] for message in executor[3:]] == ["call_1", "call_2", "call_3", "call_4"]
+        results = [json.loads(message["content"]) for message in executor[3:]]
+        assert results[:2] == [{"city": "London"}, {"city": "Tokyo"}]
+        assert results[2] == {"error": "Unknown tool: WeatherTool"}
+        assert "Invalid arguments JSON" in results[3]["error"]
+
+    def test_async_agent(self, agent_config):
+        tool_calls = ToolCallResponse(tool_calls=[ToolCall("call_1", "CalculateTool", {"expression": "15 * 45"})])
+        agent_config.agent.execution_mode = "native"
+        provider = MockProvider(responses=[PLAN, tool_calls, "675", "15 * 45 is 675."])
+        agent = AsyncBasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+        assert asyncio.run(agent("What is 15 * 45?")) == "15 * 45 is 675."
+        assert agent.messages[-2]["content"] == "<agent_answer>675</agent_answer>"
+
+
+class TestSpeculation:
+    def speculative_agent(self, agent_config, plan, agent_class=BasicAgent):
+        agent_config.speculation.enabled = True
+
+        def responder(messages):
+            if len(messages) == 1:
+                return plan
+            if messages[0]["content"].startswith("\nYou run in a loop"):
+                return "Answer: 675"
+            return "draft" if messages[-1]["role"] == "user" else "final"
+
+        provider = MockProvider(responder=responder, latency=0.2)
+        return agent_class(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+    def test_empty_plan_returns_draft(self, agent_config):
+        agent = self.speculative_agent(agent_config, "<plan></plan>")
+
+        started = time.monotonic()
+        assert agent("Who wrote Hamlet?") == "draft"
+        # Planner and draft ran at the same time
+        assert time.monotonic() - started < 0.35
+        assert agent.speculation.stats()["hits"] == 1
+        assert "speculative_draft" in agent.last_request_metrics.totals()["by_stage"]
+
+    def test_plan_with_tools_discards_draft(self, agent_config):
+        agent = self.speculative_agent(agent_config, PLAN)
+
+        assert agent("What is 15 * 45?") == "final"
+        assert agent.speculation.stats()["misses"] == 1
+        assert asyncio.run(self.speculative_agent(agent_config, PLAN, AsyncBasicAgent)("What is 15 * 45?")) == "final"
+
+    def test_tool_words_prevent_speculation(self, agent_config):
+        agent = self.speculative_agent(agent_config, PLAN)
+
+        assert agent.speculation.estimate("Please calculate this expression") < agent.speculation.threshold
+        assert agent.speculation.should_speculate("Who wrote Hamlet?")
+
+
+class TestToolSelection:
+    @staticmethod
+    def named_tool(name, description):
+        tool = SleepyTool()
+        tool.name, tool.description = name, description
+        return tool
+
+    def test_prompts_describe_only_the_selected_tools(self, agent_config, scripted_provider):
+        agent_config.tool_selection.enabled = True
+        agent_config.tool_selection.top_k = 2
+        fillers = [self.named_tool(f"Filler{i}Tool", f"Manages filler records, batch {i}.") for i in range(30)]
+        provider = scripted_provider([PLAN, ACTION, "Answer: 675", "15 * 45 is 675.", "<plan></plan>", "Sunny."])
+        agent = BasicAgent(tools=fillers + [CalculateTool()], config=agent_config, llm_provider=provider)
+
+        agent("Calculate 15 * 45")
+        planner_prompt, executor_prompt = provider.calls[0]["prompt"], provider.calls[1]["messages"][0]["content"]
+        assert "CalculateTool" in planner_prompt and "Filler" not in planner_prompt
+        assert "CalculateTool" in executor_prompt and "Filler" not in executor_prompt
+        assert len(executor_prompt) < len(agent.executor_system_prompt) / 3
+        assert "Filler" not in provider.calls[3]["messages"][0]["content"]
+
+        agent.add_tool(self.named_tool("WeatherTool", "Gets the weather of a city."))
+        agent("What's the weather in Paris?")
+        assert "WeatherTool" in provider.calls[4]["prompt"]
+
+    def test_unmatched_questions_get_the_whole_catalog(self, agent_config, scripted_provider):
+        agent_config.tool_selection.enabled = True
+        agent_config.tool_selection.top_k = 1
+        tools = [self.named_tool("WeatherTool", "Gets the weather of a city."), CalculateTool(), SleepyTool()]
+        provider = scripted_provider(["<plan></plan>", "Hi."])
+        agent = BasicAgent(tools=tools, config=agent_config, llm_provider=provider)
+
+        agent("Hello!")
+        assert all(tool.name in provider.calls[0]["prompt"] for tool in tools)
+
+    def test_plan_cache_survives_changing_selections(self, agent_config, scripted_provider):
+        agent_config.tool_selection.enabled = True
+        agent_config.tool_selection.top_k = 1
+        agent_config.plan_cache.enabled = True
+        tools = [self.named_tool("WeatherTool", "Gets the weather of a city."), CalculateTool(), SleepyTool()]
+        provider = scripted_provider(["<plan></plan>", "Sunny.", "<plan></plan>", "675.", "Sunny."])
+        agent = BasicAgent(tools=tools, config=agent_config, llm_provider=provider)
+
+        for question in ["What's the weather in Paris?", "Calculate 15 * 45", "What's the weather in Paris?"]:
+            agent(question)
+        assert agent.plan_cache.stats() == {"hits": 1, "misses": 2, "size": 2}
+
+class HeadlinesTool(BaseTool):
+    def __init__(self):
+        super().__init__(
+            name="HeadlinesTool",
+            description="Gets today's headlines",
+            input_params={},
+            output_format={"headlines": "list"}
+        )
+
+    def execute(self, **kwargs):
+        return {"headlines": [f"Headline number {i} of today's news" for i in range(300)]}
+
+
+class TestExecutorContext:
+    def test_large_observations_are_previewed_expanded_and_collapsed(self, agent_config):
+        agent_config.executor_context.enabled = True
+        agent_config.executor_context.keep_turns = 1
+        calls = []
+
+        def responder(messages):
+            calls.append(list(messages))
+            if len(calls) == 1:
+                return "<plan>Use HeadlinesTool.</plan>"
+            if len(calls) == 2:
+                return 'Thought: fetch\nAction: {"tool": "HeadlinesTool", "parameters": {}}\nPAUSE'
+            if len(calls) == 3:
+                ref = json.loads(messages[-1]["content"][len("Observation: "):])["ref"]
+                parameters = {"ref": ref, "path": "headlines", "offset": 10, "limit": 2}
+                return f'Action: {json.dumps({"tool": "ExpandObservation", "parameters": parameters})}\nPAUSE'
+            if len(calls) == 4:
+                return "Answer: done"
+            return "Done."
+
+        agent = BasicAgent(tools=[HeadlinesTool()], config=agent_config, llm_provider=MockProvider(responder=responder))
+        events = list(agent.stream("What are the headlines?"))
+
+        assert "ExpandObservation" in calls[1][0]["content"]
+        assert "ExpandObservation" not in agent.available_tools
+        preview = json.loads(calls[2][-1]["content"][len("Observation: "):])
+        assert preview["truncated"] and preview["fields"] == {"headlines": "list of 300 items"}
+        assert len(calls[2][-1]["content"]) < 1500
+        expanded = json.loads(calls[3][-1]["content"][len("Observation: "):])
+        assert expanded["total"] == 300
+        assert expanded["value"] == ["Headline number 10 of today's news", "Headline number 11 of today's news"]
+        # The first turn was collapsed to its action and a stub of its result
+        assert calls[3][2]["content"] == 'Action: {"tool": "HeadlinesTool", "parameters": {}}'
+        assert json.loads(calls[3][3]["content"][len("Observation: "):])["collapsed"]
+        # Events still carry the full results
+        observation = next(event for event in events if event.type == "observation")
+        assert len(observation.data["result"]["headlines"]) == 300
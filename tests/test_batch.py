@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from agents.async_basic_agent import AsyncBasicAgent
+from agents.basic_agent import BasicAgent
+from tests.test_providers import MockOpenAIServer, provider_for
+
+
+@pytest.fixture
+def make_agent(echo_provider):
+    def make(agent_config, **provider_options):
+        return BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider(**provider_options))
+    return make
+
+
+class TestRunBatch:
+    def test_ordered_results_with_isolated_conversations(self, agent_config, make_agent):
+        agent = make_agent(agent_config, delay=0.01)
+        questions = [f"q{i}" for i in range(20)]
+
+        batch = agent.run_batch(iter(questions), max_workers=4)
+        results = list(batch)
+
+        assert [result.answer for result in results] == [f"answer to q{i}" for i in range(20)]
+        assert batch.stats.completed == 20
+        assert batch.stats.throughput > 0
+        # The parent agent's conversation is untouched
+        assert len(agent.messages) == 1
+
+    def test_unordered_results(self, agent_config, make_agent):
+        agent = make_agent(agent_config, delay=0.01)
+        results = list(agent.run_batch([f"q{i}" for i in range(10)], max_workers=4, ordered=False))
+        assert sorted(result.index for result in results) == list(range(10))
+
+    def test_errors_are_reported_per_question(self, agent_config, make_agent):
+        agent = make_agent(agent_config, fail_on="bad")
+        batch = agent.run_batch(["good", "bad", "good again"])
+        results = list(batch)
+
+        assert results[1].error == "provider failure"
+        assert results[2].answer == "answer to good again"
+        assert (batch.stats.completed, batch.stats.failed) == (2, 1)
+
+    def test_jsonl_input_and_resume_from_checkpoint(self, agent_config, make_agent, tmp_path):
+        source = tmp_path / "questions.jsonl"
+        source.write_text("\n".join(json.dumps({"question": f"q{i}"}) for i in range(6)) + "\n")
+        checkpoint = tmp_path / "answers.jsonl"
+        # A previous run finished the first two questions, failed the third and crashed writing the fourth
+        checkpoint.write_text(
+            "".join(json.dumps({"index": i, "question": f"q{i}", "answer": "old"}) + "\n" for i in range(2))
+            + json.dumps({"index": 2, "question": "q2", "error": "provider failure"}) + "\n"
+            + '{"index": 3, "quest'
+        )
+
+        agent = make_agent(agent_config)
+        batch = agent.run_batch(str(source), checkpoint_path=str(checkpoint))
+        results = list(batch)
+
+        assert [result.index for result in results] == [2, 3, 4, 5]
+        assert batch.stats.skipped == 2
+        recorded = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+        assert sorted(record["index"] for record in recorded if record.get("error") is None) == list(range(6))
+        # planner and response generator for each new question only
+        assert agent.llm_provider.calls == 8
+
+    def test_failures_are_not_checkpointed(self, agent_config, make_agent, tmp_path):
+        checkpoint = tmp_path / "answers.jsonl"
+        list(make_agent(agent_config, fail_on="bad").run_batch(["good", "bad"], checkpoint_path=str(checkpoint)))
+
+        results = list(make_agent(agent_config).run_batch(["good", "bad"], checkpoint_path=str(checkpoint)))
+        assert [result.answer for result in results] == ["answer to bad"]
+
+    def test_async_agents_share_one_event_loop(self, agent_config):
+        server = MockOpenAIServer()
+        try:
+            agent = AsyncBasicAgent(tools=[], config=agent_config, llm_provider=provider_for(server))
+            results = list(agent.run_batch([f"q{i}" for i in range(12)], max_workers=4))
+        finally:
+            server.close()
+
+        assert [result.answer for result in results] == ["hello"] * 12
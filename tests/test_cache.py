@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from config.config import CacheConfig
+from llm_providers.cached_provider import CachedProvider
+from utils.cache import LRUCache, SQLiteCache, create_cache
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+    def test_ttl_expiry(self):
+        cache = LRUCache(ttl=0.05)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        time.sleep(0.1)
+        assert cache.get("a", "missing") == "missing"
+
+    def test_size_based_eviction(self):
+        cache = LRUCache(max_entries=100, max_size_bytes=3000)
+        for i in range(5):
+            cache.set(str(i), "x" * 1000)
+        assert len(cache) < 5
+        assert cache.get("4") is not None
+
+
+class TestSQLiteCache:
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "cache" / "responses.sqlite")
+        SQLiteCache(path).set("key", {"answer": 42})
+        assert SQLiteCache(path).get("key") == {"answer": 42}
+
+    def test_max_entries_and_ttl(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "responses.sqlite"), max_entries=2, ttl=60)
+        for key in "abc":
+            cache.set(key, key)
+        assert len(cache) == 2
+        assert cache.get("c") == "c"
+
+        expired = SQLiteCache(str(tmp_path / "expired.sqlite"), ttl=0)
+        expired.set("a", "a")
+        time.sleep(0.01)
+        assert expired.get("a") is None
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            create_cache("redis")
+
+
+class TestCachedProvider:
+    def test_hits_and_misses(self, scripted_provider):
+        inner = scripted_provider(["first", "second"])
+        provider = CachedProvider(inner, LRUCache())
+
+        assert provider.llm_call("hello", model="m") == "first"
+        assert provider.llm_call("hello", model="m") == "first"
+        assert provider.llm_call("hello", model="other") == "second"
+        assert len(inner.calls) == 2
+        assert provider.stats()["hits"] == 1
+        assert provider.stats()["misses"] == 2
+
+    def test_skips_high_temperature(self, scripted_provider):
+        inner = scripted_provider(["first", "second"])
+        provider = CachedProvider(inner, LRUCache(), max_temperature=0.5)
+
+        assert provider.llm_call("hello", temperature=0.9) == "first"
+        assert provider.llm_call("hello", temperature=0.9) == "second"
+        assert provider.stats()["skipped"] == 2
+
+    def test_stream_is_cached_when_read_fully(self, scripted_provider):
+        inner = scripted_provider(["streamed answer"])
+        provider = CachedProvider(inner, LRUCache())
+
+        assert "".join(provider.llm_call_stream("hello")) == "streamed answer"
+        assert list(provider.llm_call_stream("hello")) == ["streamed answer"]
+        assert provider.llm_call("hello") == "streamed answer"
+
+    def test_from_config_shares_backend(self, scripted_provider, tmp_path):
+        cache_config = CacheConfig(enabled=True, backend="sqlite", path=str(tmp_path / "shared.sqlite"))
+        first = CachedProvider.from_config(scripted_provider(["cached"]), cache_config)
+        second = CachedProvider.from_config(scripted_provider([]), cache_config)
+
+        assert first.llm_call("hello") == "cached"
+        assert second.llm_call("hello") == "cached"
+        assert first.cache is second.cache
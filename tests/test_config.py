@@ -8,6 +8,9 @@ def test_config_from_yaml(tmp_path):
         provider: openai
         model: test-model
         temperature: 0.5
+    agent:
+        max_tool_workers: 8
+        tool_timeout: 2.5
     debug: true
     log_level: DEBUG
     """
@@ -17,6 +20,8 @@ def test_config_from_yaml(tmp_path):
     config = Config.from_yaml(str(config_file))
     assert config.llm.model == "test-model"
     assert config.llm.temperature == 0.5
+    assert config.agent.max_tool_workers == 8
+    assert config.agent.tool_timeout == 2.5
     assert config.debug is True
 
 def test_config_from_env():
@@ -29,4 +34,17 @@ def test_config_from_env():
     
     assert config.llm.api_key == "test-key"
     assert config.llm.model == "env-model"
-    assert config.debug is True 
\ No newline at end of file
+    assert config.debug is True 
+
+def test_load_config_reparses_only_on_change(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("llm:\n    temperature: 0.5\n")
+
+    first = load_config(str(config_file))
+    first.llm.temperature = 0.9
+    # Copies are independent of the cached config
+    assert load_config(str(config_file)).llm.temperature == 0.5
+
+    config_file.write_text("llm:\n    temperature: 0.7\n")
+    os.utime(config_file, ns=(0, 10**18))
+    assert load_config(str(config_file)).llm.temperature == 0.7
@@ -0,0 +1,42 @@
+import json
+import logging
+import time
+
+from config.config import Config, LoggingConfig
+from utils.logging import log_event, setup_logging
+from utils.payload import truncate_payload
+
+
+class Unprintable:
+    def __repr__(self):
+        raise AssertionError("payload built although the level is disabled")
+
+
+def test_truncate_payload_is_bounded():
+    messages = [{"role": "user", "content": "x" * 10000} for _ in range(1000)]
+    payload = truncate_payload(messages, 100)
+
+    assert len(json.dumps(payload)) < 300
+    assert payload[0]["content"].endswith("... (10000 chars)")
+    assert payload[-1] == "... 999 more"
+
+
+def test_events_are_lazy_and_written_as_json(tmp_path):
+    log_file = tmp_path / "agent.log"
+    config = Config(
+        debug=True,
+        log_level="INFO",
+        logging=LoggingConfig(format="json", file=str(log_file), max_payload_chars=50)
+    )
+    logger = setup_logging(config)
+
+    log_event(logger, logging.DEBUG, "executor_messages", messages=Unprintable())
+    log_event(logger, logging.INFO, "tool_call", tool="CalculateTool", parameters={"expression": "1" * 100})
+
+    deadline = time.monotonic() + 2
+    while not log_file.read_text() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    entry = json.loads(log_file.read_text())
+    assert entry["message"] == "tool_call"
+    assert entry["tool"] == "CalculateTool"
+    assert entry["parameters"]["expression"].endswith("... (100 chars)")
@@ -0,0 +1,64 @@
+from agents.basic_agent import BasicAgent
+from agents.memory import ConversationMemory
+
+
+def add_turn(memory, i, size=10):
+    memory.append({"role": "user", "content": f"question {i} " + "x" * size})
+    memory.append({"role": "assistant", "content": f"answer {i} " + "y" * size})
+
+
+class TestConversationMemory:
+    def test_unbounded_by_default(self):
+        memory = ConversationMemory("system")
+        for i in range(10):
+            add_turn(memory, i)
+        memory.compact()
+        assert len(memory.messages()) == 21
+
+    def test_keeps_recent_turns_and_summarizes_incrementally(self):
+        calls = []
+
+        def summarizer(summary, messages):
+            calls.append((summary, [m["content"].split()[1] for m in messages if m["role"] == "user"]))
+            return f"{summary}+{len(messages)}"
+
+        memory = ConversationMemory("system", recent_turns=2, summarizer=summarizer)
+        for i in range(4):
+            add_turn(memory, i)
+            memory.compact()
+
+        # Only the newly evicted turn is sent with the previous summary
+        assert calls == [("", ["0"]), ("+2", ["1"])]
+        messages = memory.messages()
+        assert messages[0] == {"role": "system", "content": "system"}
+        assert messages[1]["content"].endswith("+2+2")
+        assert [m["content"].split()[1] for m in messages[2:]] == ["2", "2", "3", "3"]
+
+    def test_token_budget_stays_flat(self):
+        memory = ConversationMemory("system", max_tokens=200)
+        for i in range(50):
+            add_turn(memory, i, size=100)
+            memory.compact()
+            assert memory.token_count() <= 200
+        assert memory.messages()[-1]["content"].startswith("answer 49")
+
+    def test_latest_turn_is_always_kept(self):
+        memory = ConversationMemory("system", max_tokens=10)
+        add_turn(memory, 0, size=1000)
+        memory.compact()
+        assert len(memory.messages()) == 3
+
+
+def test_agent_folds_old_turns(agent_config, scripted_provider):
+    agent_config.memory.enabled = True
+    agent_config.memory.recent_turns = 1
+    provider = scripted_provider([
+        "<plan></plan>", "first answer",
+        "<plan></plan>", "second answer", "<summary>User asked a first question.</summary>",
+    ])
+    agent = BasicAgent(tools=[], config=agent_config, llm_provider=provider)
+
+    agent("first question")
+    agent("second question")
+    assert agent.memory.summary == "User asked a first question."
+    assert [m["content"] for m in agent.messages[2:]] == ["second question", "second answer"]
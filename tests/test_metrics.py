@@ -0,0 +1,85 @@
+import json
+from types import SimpleNamespace
+
+from agents.basic_agent import BasicAgent
+from llm_providers.openai_provider import OpenAIProvider
+from tools.calculate import CalculateTool
+from utils import metrics
+from utils.metrics import CallRecord, JSONLinesSink, MetricsRegistry, PrometheusTextExporter
+
+
+def make_record(stage="planner", latency=0.3):
+    return CallRecord(stage=stage, model="m", prompt_tokens=100, completion_tokens=20, latency=latency)
+
+
+class TestMetricsRegistry:
+    def test_aggregates_by_stage_and_model(self):
+        registry = MetricsRegistry()
+        registry.record(make_record(latency=0.05))
+        registry.record(make_record(latency=3))
+        registry.record(make_record(stage="executor"))
+
+        planner = registry.snapshot()[("planner", "m")]
+        assert planner["calls"] == 2
+        assert planner["prompt_tokens"] == 200
+        assert planner["latency_buckets"][0] == 1
+        assert registry.snapshot()[("executor", "m")]["calls"] == 1
+
+    def test_prometheus_text(self):
+        registry = MetricsRegistry()
+        registry.record(make_record(latency=0.2))
+        text = PrometheusTextExporter(registry).render()
+
+        assert 'agent_llm_calls_total{stage="planner",model="m"} 1' in text
+        assert 'agent_llm_prompt_tokens_total{stage="planner",model="m"} 100' in text
+        assert 'agent_llm_latency_seconds_bucket{stage="planner",model="m",le="0.1"} 0' in text
+        assert 'agent_llm_latency_seconds_bucket{stage="planner",model="m",le="0.25"} 1' in text
+        assert 'agent_llm_latency_seconds_bucket{stage="planner",model="m",le="+Inf"} 1' in text
+
+    def test_jsonl_sink(self, tmp_path):
+        path = tmp_path / "calls.jsonl"
+        registry = MetricsRegistry()
+        registry.add_sink(JSONLinesSink(str(path)))
+        registry.record(make_record())
+        registry.record(make_record(stage="executor"))
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["stage"] for line in lines] == ["planner", "executor"]
+        assert lines[0]["prompt_tokens"] == 100
+
+
+def test_agent_collects_records_per_stage(agent_config, scripted_provider, tmp_path):
+    agent_config.metrics.prometheus_path = str(tmp_path / "agent.prom")
+    provider = scripted_provider([
+        "<plan>Use CalculateTool</plan>",
+        'Action: {"tool": "CalculateTool", "parameters": {"expression": "2 + 2"}}\nPAUSE',
+        "Answer: 4",
+        "It is 4.",
+    ])
+    agent = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+    agent("What is 2 + 2?")
+
+    records = agent.last_request_metrics.records
+    assert [(record.stage, record.turn) for record in records] == [
+        ("planner", None), ("executor", 1), ("executor", 2), ("response_generator", None)
+    ]
+    totals = agent.last_request_metrics.totals()
+    assert totals["calls"] == 4
+    assert totals["by_stage"]["executor"]["calls"] == 2
+    assert totals["prompt_tokens"] > 0
+    assert 'stage="response_generator",model="test-model"' in (tmp_path / "agent.prom").read_text()
+
+
+def test_openai_provider_records_usage(monkeypatch):
+    provider = OpenAIProvider(api_key="test-key")
+    response = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="hi"))],
+        usage=SimpleNamespace(prompt_tokens=12, completion_tokens=3),
+    )
+    monkeypatch.setattr(provider.client.chat.completions, "create", lambda **kwargs: response)
+
+    with metrics.collect() as request_metrics, metrics.stage("planner"):
+        assert provider.llm_call("hello", model="gpt-4o-mini") == "hi"
+
+    record = request_metrics.records[0]
+    assert (record.stage, record.model, record.prompt_tokens, record.completion_tokens) == ("planner", "gpt-4o-mini", 12, 3)
@@ -0,0 +1,64 @@
+from agents.basic_agent import BasicAgent
+from agents.plan_cache import PlanCache
+from tools.calculate import CalculateTool
+
+
+TOOLS = "* CalculateTool:\n  - Description: Performs calculations"
+
+
+class TestPlanCache:
+    def test_exact_match_on_normalized_question(self):
+        cache = PlanCache()
+        cache.set("What is 15 * 45?", TOOLS, "Use CalculateTool")
+        assert cache.get("  what is 15*45 ", TOOLS) == "Use CalculateTool"
+        assert cache.get("What is 16 * 45?", TOOLS) is None
+        assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    def test_operators_and_signs_are_part_of_the_question(self):
+        cache = PlanCache()
+        cache.set("What is 15 * 45?", TOOLS, "15 * 45")
+        cache.set("What is 1.5 * 45?", TOOLS, "1.5 * 45")
+        for question in ["What is 15 + 45?", "what is 15 - 45", "What is -15 * 45?", "What is 15 ** 45?", "What is 15 * 4.5?"]:
+            assert cache.get(question, TOOLS) is None
+        assert cache.get("what is 1.5*45.", TOOLS) == "1.5 * 45"
+
+    def test_fuzzy_match_keeps_numbers_and_operators(self):
+        cache = PlanCache(fuzzy=True, similarity_threshold=0.5)
+        cache.set("Please compute 15 - 45 for me", TOOLS, "15 - 45")
+        assert cache.get("compute 15 - 45 please", TOOLS) == "15 - 45"
+        for question in ["Please compute 45 - 15 for me", "Please compute 15 + 45 for me", "Please compute -15 - 45 for me"]:
+            assert cache.get(question, TOOLS) is None
+
+    def test_empty_plan_is_cached(self):
+        cache = PlanCache()
+        cache.set("What is the capital of Brazil?", TOOLS, "")
+        assert cache.get("what is the capital of brazil", TOOLS) == ""
+
+    def test_fuzzy_match(self):
+        cache = PlanCache(fuzzy=True, similarity_threshold=0.7)
+        cache.set("what is the weather in London today", TOOLS, "Use WeatherTool")
+        assert cache.get("what is the weather today in London", TOOLS) == "Use WeatherTool"
+        assert cache.get("what is the weather in Paris", TOOLS) is None
+
+    def test_tool_change_invalidates(self):
+        cache = PlanCache()
+        cache.set("What is 15 * 45?", TOOLS, "Use CalculateTool")
+        assert cache.get("What is 15 * 45?", TOOLS + "\n* NewTool") is None
+        assert cache.get("What is 15 * 45?", TOOLS) is None
+
+    def test_eviction(self):
+        cache = PlanCache(max_entries=2)
+        for question in ["a", "b", "c"]:
+            cache.set(question, TOOLS, question)
+        assert cache.get("a", TOOLS) is None
+        assert cache.get("c", TOOLS) == "c"
+
+
+def test_agent_reuses_cached_plan(agent_config, scripted_provider):
+    agent_config.plan_cache.enabled = True
+    provider = scripted_provider(["<plan></plan>", "first answer", "second answer"])
+    agent = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+    agent("What is the capital of Brazil?")
+    assert agent("what is the capital of Brazil") == "second answer"
+    assert len(provider.calls) == 3
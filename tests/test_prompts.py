@@ -0,0 +1,35 @@
+import pytest
+
+from prompt_templates import planner_template, executor_template
+from tools.calculate import CalculateTool
+from tools.catalog import render_tools_description
+from utils.templates import CompiledTemplate, compile_template
+
+
+def test_compiled_template_matches_str_format():
+    for template in (planner_template.prompt, executor_template.prompt):
+        compiled = compile_template(template)
+        values = {field: "{value}" for field in compiled.fields}
+        assert compiled.render(**values) == template.format(**values)
+
+
+def test_partial_fills_fields_ahead_of_time():
+    template = CompiledTemplate("Tools: {available_tools} {{literal}}\nQuestion: {user_input}")
+    partial = template.partial(available_tools="CalculateTool")
+
+    assert partial.fields == {"user_input"}
+    assert partial.render(user_input="2 + 2?") == "Tools: CalculateTool {literal}\nQuestion: 2 + 2?"
+
+
+def test_compile_template_is_cached():
+    assert compile_template(planner_template.prompt) is compile_template(planner_template.prompt)
+    with pytest.raises(ValueError):
+        CompiledTemplate("{value!r}")
+
+
+def test_tool_descriptions_follow_replaced_attributes():
+    tool = CalculateTool()
+    assert render_tools_description([tool]) is render_tools_description([CalculateTool()])
+
+    tool.description = "Adds numbers."
+    assert render_tools_description([tool]) == "* CalculateTool:\n  - Description: Adds numbers."
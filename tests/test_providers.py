@@ -0,0 +1,347 @@
+import asyncio
+import dataclasses
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from config.config import LLMConfig
+from llm_providers.base_provider import BaseProvider, ToolCall
+from llm_providers.hedged_provider import HedgedProvider
+from llm_providers.mock_provider import MockProvider
+from llm_providers.openai_provider import OpenAIProvider
+from llm_providers.registry import register_provider
+from llm_providers.router import LLMRouter
+from tools.calculate import CalculateTool
+from utils import metrics
+from utils.rate_limit import TokenBucket
+from utils.retry import RetryPolicy, parse_retry_after
+
+
+COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "test-model",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "hello"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+}
+
+
+class MockOpenAIServer:
+    """
+    Local HTTP server speaking the chat completions endpoint. Queued error responses are
+    returned first, then successful completions.
+    """
+    def __init__(self):
+        self.errors = []
+        self.requests = []
+        self.completion = COMPLETION
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                server.requests.append({"time": time.monotonic(), "client": self.client_address, "body": json.loads(body)})
+                status, headers = server.errors.pop(0) if server.errors else (200, {})
+                payload = json.dumps(server.completion if status == 200 else {"error": {"message": "error"}}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = MockOpenAIServer()
+    yield server
+    server.close()
+
+
+def provider_for(server, **overrides):
+    settings = dict(api_key="test-key", base_url=server.base_url, model="test-model", backoff_base=0.01, timeout=5)
+    settings.update(overrides)
+    return OpenAIProvider.from_config(LLMConfig(**settings))
+
+
+class TestOpenAIProvider:
+    def test_retries_rate_limit_honouring_retry_after(self, server):
+        server.errors = [(429, {"Retry-After": "0.3"}), (503, {})]
+        provider = provider_for(server)
+
+        assert provider.llm_call("hi", model="test-model") == "hello"
+        assert len(server.requests) == 3
+        assert server.requests[1]["time"] - server.requests[0]["time"] >= 0.3
+
+    def test_gives_up_after_max_retries(self, server):
+        server.errors = [(429, {"Retry-After": "0"})] * 3
+        provider = provider_for(server, max_retries=2)
+
+        with pytest.raises(openai.RateLimitError):
+            provider.llm_call("hi", model="test-model")
+        assert len(server.requests) == 3
+
+    def test_client_errors_are_not_retried(self, server):
+        server.errors = [(400, {})]
+        provider = provider_for(server)
+
+        with pytest.raises(openai.BadRequestError):
+            provider.llm_call("hi", model="test-model")
+        assert len(server.requests) == 1
+
+    def test_providers_share_pooled_connection(self, server):
+        first = provider_for(server)
+        second = provider_for(server)
+
+        assert first.client is second.client
+        first.llm_call("hi", model="test-model")
+        second.llm_call("hi", model="test-model")
+        # Both requests went over the same keep-alive connection
+        assert server.requests[0]["client"] == server.requests[1]["client"]
+
+    def test_async_calls_on_successive_event_loops(self, server):
+        provider = provider_for(server)
+
+        for expected in (1, 2, 3):
+            assert asyncio.run(provider.async_llm_call("hi", model="test-model")) == "hello"
+            # One request per call: no connection left over from a closed loop fails and is retried
+            assert len(server.requests) == expected
+
+    def test_rate_limit_per_model(self, server):
+        provider = provider_for(server, requests_per_minute=600)
+        started = time.monotonic()
+        for _ in range(13):
+            provider.llm_call("hi", model="rate-limited-model")
+        # Burst of 10 then 10 requests per second
+        assert time.monotonic() - started >= 0.25
+
+
+    def test_native_tool_calls(self, server):
+        message = {"role": "assistant", "content": None, "tool_calls": [
+            {"id": "call_1", "type": "function", "function": {"name": "CalculateTool", "arguments": '{"expression": "1 + 1"}'}},
+            {"id": "call_2", "type": "function", "function": {"name": "CalculateTool", "arguments": '{"expression"'}},
+        ]}
+        server.completion = dict(COMPLETION, choices=[{"index": 0, "message": message, "finish_reason": "tool_calls"}])
+        schema = CalculateTool().schema()
+
+        response = provider_for(server).llm_call_with_tools([{"role": "user", "content": "1 + 1?"}], [schema], model="test-model")
+
+        assert server.requests[0]["body"]["tools"] == [schema]
+        assert server.requests[0]["body"]["parallel_tool_calls"] is True
+        assert response.tool_calls[0] == ToolCall("call_1", "CalculateTool", {"expression": "1 + 1"})
+        assert response.tool_calls[1].error
+        assert response.message()["tool_calls"][0]["function"]["arguments"] == '{"expression": "1 + 1"}'
+
+
+class TestRetryHelpers:
+    def test_backoff_is_jittered_and_capped(self):
+        policy = RetryPolicy(backoff_base=1, backoff_max=4)
+        delays = [policy.delay(10) for _ in range(50)]
+        assert all(0 <= delay <= 4 for delay in delays)
+        assert len(set(delays)) > 1
+        assert policy.delay(10, retry_after=3) == 3
+        assert policy.delay(10, retry_after=3600) == 4
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after("2.5") == 2.5
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        assert time.monotonic() - started >= 0.15
+
+
+class TestMockProvider:
+    def test_replays_recordings_then_scripted_responses(self, tmp_path):
+        recording = tmp_path / "recording.jsonl"
+        recording.write_text(
+            json.dumps({"prompt": "plan this", "response": "<plan>recorded</plan>"}) + "\n"
+            + json.dumps({"response": "first"}) + "\n"
+            + json.dumps({"response": "second"}) + "\n"
+        )
+        provider = MockProvider.from_file(str(recording))
+
+        assert provider.llm_call("plan this") == "<plan>recorded</plan>"
+        assert provider.llm_call("anything") == "first"
+        assert "".join(provider.llm_call_stream("anything")) == "second"
+        with pytest.raises(Exception):
+            provider.llm_call("anything")
+
+    def test_simulated_latency_is_repeatable(self):
+        def timed(provider):
+            started = time.monotonic()
+            asyncio.run(provider.async_llm_call("hi"))
+            return time.monotonic() - started
+
+        provider = MockProvider(responses=["ok"], loop=True, latency=0.05, jitter=0.02, seed=1)
+        assert 0.03 <= timed(provider) <= 0.1
+        delays = [MockProvider(latency=0.05, jitter=0.02, seed=1)._delays("ok") for _ in range(2)]
+        assert delays[0] == delays[1]
+
+
+class ModelProvider(BaseProvider):
+    """
+    Answers with the model name after that model's delay, or raises for models set to fail.
+    """
+    def __init__(self, delays=None, failing=()):
+        super().__init__(api_key="test-key")
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.models = []
+
+    def llm_call(self, prompt=None, system_prompt=None, model=None, messages=[], max_tokens=None, temperature=None):
+        self.models.append(model)
+        if model in self.failing:
+            raise RuntimeError(f"{model} is down")
+        time.sleep(self.delays.get(model, 0))
+        return model
+
+    async def async_llm_call(self, prompt=None, system_prompt=None, model=None, messages=[], max_tokens=None, temperature=None):
+        self.models.append(model)
+        await asyncio.sleep(self.delays.get(model, 0))
+        return model
+
+
+class TestLLMRouter:
+    def test_routes_stages_and_falls_back_on_errors(self):
+        llm_config = LLMConfig(
+            model="base",
+            fallbacks=[{"model": "backup"}],
+            routes={"planner": {"model": "small"}, "response_generator": {"model": "down", "max_tokens": 100}}
+        )
+        provider = ModelProvider(failing={"down"})
+        router = LLMRouter(llm_config, provider)
+
+        assert router.call("planner", "plan this") == "small"
+        assert router.call("executor", "run this") == "base"
+        # The draft follows the response generator's route
+        assert router.routes["speculative_draft"][0].max_tokens == 100
+        assert router.call("response_generator", "answer") == "backup"
+        assert provider.models == ["small", "base", "down", "backup"]
+        assert router.stats()["response_generator"] == 1
+
+    def test_async_call_falls_back_on_timeout(self):
+        llm_config = LLMConfig(
+            model="base",
+            routes={"executor": {"model": "slow", "timeout": 0.05, "fallbacks": [{"model": "fast", "timeout": None}]}}
+        )
+        provider = ModelProvider(delays={"slow": 1})
+        # Changing the timeout needs a provider of its own, built from the registry
+        register_provider("test-models", lambda llm_config: provider)
+        router = LLMRouter(dataclasses.replace(llm_config, provider="test-models"))
+
+        assert asyncio.run(router.async_call("executor", "run this")) == "fast"
+        assert provider.models == ["slow", "fast"]
+
+    def test_rejects_unknown_stages_and_providers(self):
+        with pytest.raises(ValueError, match="Unknown stages"):
+            LLMRouter(LLMConfig(routes={"critic": {"model": "x"}}), ModelProvider())
+        with pytest.raises(ValueError, match="Unknown LLM provider"):
+            LLMRouter(LLMConfig(routes={"planner": {"provider": "nowhere"}}), ModelProvider())
+
+
+class DelayedProvider(BaseProvider):
+    """
+    Answers with the call number after the next scripted delay, 0.01s once they run out.
+    """
+    def __init__(self, delays=()):
+        super().__init__(api_key="test-key")
+        self.delays = list(delays)
+        self.count = 0
+        self.cancelled = 0
+        self.lock = threading.Lock()
+
+    def _next(self):
+        with self.lock:
+            self.count += 1
+            return self.count, self.delays.pop(0) if self.delays else 0.01
+
+    def llm_call(self, prompt=None, system_prompt=None, model=None, messages=[], max_tokens=None, temperature=None):
+        number, delay = self._next()
+        time.sleep(delay)
+        return f"call {number}"
+
+    async def async_llm_call(self, prompt=None, system_prompt=None, model=None, messages=[], max_tokens=None, temperature=None):
+        number, delay = self._next()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"call {number}"
+
+
+class TestHedgedProvider:
+    def test_hedges_slow_calls_within_budget(self):
+        provider = DelayedProvider()
+        hedged = HedgedProvider(provider, min_samples=5, max_hedge_ratio=0.1)
+        with metrics.stage("planner"):
+            for _ in range(10):
+                hedged.llm_call("warm up")
+            provider.delays = [1.0, 0.01]
+            started = time.monotonic()
+            assert hedged.llm_call("slow") == "call 12"
+            assert time.monotonic() - started < 0.5
+            # 1 hedge in 11 calls already uses the 10% budget
+            provider.delays = [0.3]
+            assert hedged.llm_call("slow") == "call 13"
+
+        stats = hedged.stats()
+        assert (stats["calls"], stats["hedged"], stats["hedge_wins"]) == (12, 1, 1)
+        assert stats["delays"]["planner/default"] >= hedged.min_delay
+
+    def test_primary_requests_do_not_queue_for_hedge_threads(self):
+        provider = DelayedProvider()
+        hedged = HedgedProvider(provider, min_samples=5, max_hedge_ratio=0.1, max_workers=2)
+        with metrics.stage("planner"):
+            for _ in range(5):
+                hedged.llm_call("warm up")
+        provider.delays = [0.3] * 32
+
+        def call():
+            with metrics.stage("planner"):
+                return hedged.llm_call("concurrent")
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            list(pool.map(lambda _: call(), range(32)))
+        assert time.monotonic() - started < 0.6
+
+    def test_async_hedge_cancels_the_loser(self):
+        provider = DelayedProvider()
+        hedged = HedgedProvider(provider, min_samples=5, max_hedge_ratio=0.5)
+
+        async def run():
+            with metrics.stage("executor"):
+                for _ in range(5):
+                    await hedged.async_llm_call("warm up", model="m")
+                provider.delays = [1.0, 0.01]
+                return await hedged.async_llm_call("slow", model="m")
+
+        assert asyncio.run(run()) == "call 7"
+        assert provider.cancelled == 1
+        assert hedged.stats()["hedge_wins"] == 1
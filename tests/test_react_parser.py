@@ -0,0 +1,44 @@
+from utils.extract_xml import extract_xml
+from utils.react_parser import parse_react_response
+
+
+class TestReActParser:
+    def test_parses_thoughts_actions_and_pause(self):
+        response = (
+            "Thought: I need two cities\n"
+            "and their weather\n"
+            'Action: {"tool": "WeatherTool", "parameters": {"city": "London"}}\n'
+            "Action: {\n"
+            '  "tool": "WeatherTool",\n'
+            '  "parameters": {"city": "Answer: Paris"}\n'
+            "}\n"
+            "PAUSE\n"
+            'Action: {"tool": "WeatherTool", "parameters": {"city": "Hallucinated"}}\n'
+        )
+        parsed = parse_react_response(response)
+
+        assert parsed.thoughts == ["I need two cities\nand their weather"]
+        assert [(action.tool, action.parameters) for action in parsed.actions] == [
+            ("WeatherTool", {"city": "London"}),
+            ("WeatherTool", {"city": "Answer: Paris"}),
+        ]
+        assert parsed.pause is True
+        assert parsed.answer is None
+
+    def test_parses_final_answer(self):
+        parsed = parse_react_response("Thought: I know it\nAnswer: 675\nbecause 15 * 45 = 675")
+
+        assert parsed.actions == []
+        assert parsed.pause is False
+        assert parsed.answer == "675\nbecause 15 * 45 = 675"
+
+    def test_invalid_action_json_is_reported(self):
+        parsed = parse_react_response('Action: {"tool": "CalculateTool", \nPAUSE')
+
+        assert parsed.actions[0].tool is None
+        assert parsed.actions[0].error
+        assert parsed.actions[0].raw == '{"tool": "CalculateTool",'
+
+    def test_extract_xml(self):
+        assert extract_xml("<plan>\nstep 1\n</plan>", "plan") == "\nstep 1\n"
+        assert extract_xml("no plan here", "plan") == ""
@@ -0,0 +1,76 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from agents.basic_agent import BasicAgent
+from agents.semantic_cache import SemanticCache
+from tools.calculate import CalculateTool
+
+
+TOOLS = "* WeatherTool:\n  - Description: Gets the weather of a city"
+
+
+class TestSemanticCache:
+    def test_paraphrases_hit_within_the_same_tool_set(self):
+        cache = SemanticCache(dim=256, capacity=8)
+        cache.set("weather in London?", TOOLS, "Rainy, 12°C")
+        cache.set("What is 15 - 45?", TOOLS, "-30")
+
+        assert cache.get("what's London's weather like", TOOLS) == "Rainy, 12°C"
+        assert cache.get("weather in Paris?", TOOLS) is None
+        assert cache.get("What is 45 - 15?", TOOLS) is None
+        assert cache.get("weather in London?", "* OtherTool") is None
+        assert cache.stats() == {"hits": 1, "misses": 3, "size": 2}
+
+    def test_swapped_directions_and_negations_miss(self):
+        cache = SemanticCache(dim=256, capacity=8)
+        pairs = [
+            ("Flights from Paris to London", "Flights from London to Paris"),
+            ("Translate hello from English to Spanish", "Translate hello from Spanish to English"),
+            ("Convert 250 USD to EUR", "Convert 250 EUR to USD"),
+            ("Is it raining in London?", "Is it not raining in London?"),
+        ]
+        for cached, _ in pairs:
+            cache.set(cached, TOOLS, cached)
+
+        for cached, other in pairs:
+            assert cache.get(other, TOOLS) is None
+        assert cache.get("Convert 250 USD into EUR", TOOLS) == "Convert 250 USD to EUR"
+
+    def test_evicts_least_recently_used_when_full(self):
+        cache = SemanticCache(dim=256, capacity=2)
+        cache.set("weather in London", TOOLS, "London")
+        cache.set("weather in Tokyo", TOOLS, "Tokyo")
+        cache.get("weather in London", TOOLS)
+        cache.set("weather in Paris", TOOLS, "Paris")
+
+        assert len(cache) == 2
+        assert cache.get("weather in Tokyo", TOOLS) is None
+        assert cache.get("weather in London", TOOLS) == "London"
+
+    def test_saved_cache_is_memory_mapped(self, tmp_path):
+        cache = SemanticCache(dim=256, capacity=4)
+        cache.set("weather in London", TOOLS, "London")
+        cache.save(str(tmp_path))
+        cache.set("weather in Tokyo", TOOLS, "Tokyo")
+        cache.save(str(tmp_path))
+
+        loaded = SemanticCache.load(str(tmp_path))
+        assert isinstance(loaded._vectors, np.memmap)
+        assert len(list(tmp_path.glob("vectors-*.npy"))) == 1
+        assert loaded.get("London weather", TOOLS) == "London"
+        loaded.set("weather in Paris", TOOLS, "Paris")
+        assert loaded.get("weather in Paris", TOOLS) == "Paris"
+        # Copy-on-write: the saved file is unchanged
+        assert len(SemanticCache.load(str(tmp_path))) == 2
+
+
+def test_agent_answers_paraphrases_from_cache(agent_config, scripted_provider):
+    agent_config.semantic_cache.enabled = True
+    provider = scripted_provider(["<plan></plan>", "Paris."])
+    agent = BasicAgent(tools=[CalculateTool()], config=agent_config, llm_provider=provider)
+
+    assert agent("What is the capital of France?", session_id="a") == "Paris."
+    assert agent("capital of france", session_id="b") == "Paris."
+    assert len(provider.calls) == 2
+    assert agent.semantic_cache.stats()["hits"] == 1
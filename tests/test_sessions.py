@@ -0,0 +1,116 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.async_basic_agent import AsyncBasicAgent
+from agents.basic_agent import BasicAgent
+from agents.session_store import SessionStore
+
+
+class TestSessions:
+    def test_sessions_are_isolated_and_persisted(self, agent_config, echo_provider):
+        agent = BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider())
+
+        assert agent("a1", session_id="alice") == "answer to a1"
+        assert agent("b1", session_id="bob") == "answer to b1"
+        assert agent("a2", session_id="alice") == "answer to a1 + a2"
+        # The agent's own conversation is not touched
+        assert len(agent.messages) == 1
+
+    def test_many_sessions_across_threads(self, agent_config, echo_provider):
+        agent = BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider(delay=0.005))
+
+        def converse(user):
+            return [agent(f"{user}-{turn}", session_id=user) for turn in range(3)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            transcripts = list(pool.map(converse, [f"user{i}" for i in range(16)]))
+
+        for i, answers in enumerate(transcripts):
+            assert answers[-1] == f"answer to user{i}-0 + user{i}-1 + user{i}-2"
+
+    def test_sqlite_store_is_shared_between_agents(self, agent_config, echo_provider, tmp_path):
+        agent_config.sessions.backend = "sqlite"
+        agent_config.sessions.path = str(tmp_path / "sessions.sqlite")
+        first = BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider())
+        second = BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider())
+
+        first("hello", session_id="alice")
+        assert second("again", session_id="alice") == "answer to hello + again"
+
+    def test_inactive_sessions_are_evicted(self, agent_config, echo_provider):
+        store = SessionStore.in_memory(max_sessions=2)
+        agent = BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider(), session_store=store)
+
+        for user in ["alice", "bob", "carol"]:
+            agent("hi", session_id=user)
+        assert len(store) == 2
+        assert store.load("alice") is None
+        assert agent("back", session_id="alice") == "answer to back"
+
+    def test_stream_with_session(self, agent_config, echo_provider):
+        agent = BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider())
+        agent("first", session_id="alice")
+
+        events = list(agent.stream("second", session_id="alice"))
+        assert events[-1].data == "answer to first + second"
+        assert len(agent.session_store.load("alice")["turns"]) == 2
+
+    def test_stream_closed_early_is_not_saved(self, agent_config, echo_provider):
+        agent = BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider())
+        events = agent.stream("first", session_id="alice")
+
+        next(events)
+        events.close()
+        # Closing the stream releases the session's lock and drops its turn
+        assert agent("second", session_id="alice") == "answer to second"
+        assert list(agent.stream("third", session_id="alice"))[-1].data == "answer to second + third"
+        assert agent.session_store.lock("alice") is not agent.session_store.lock("bob")
+
+    def test_session_requests_wait_for_a_stream(self, agent_config, echo_provider):
+        agent = BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider())
+        events = agent.stream("first", session_id="alice")
+        next(events)
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            second = pool.submit(agent, "second", session_id="alice")
+            assert list(events)[-1].data == "answer to first"
+            assert second.result(timeout=5) == "answer to first + second"
+
+    def test_forks_share_sessions(self, agent_config, echo_provider):
+        agent = BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider())
+        first, second = agent.fork(), agent.fork()
+
+        first("hello", session_id="alice")
+        assert second("again", session_id="alice") == "answer to hello + again"
+
+
+def test_async_sessions(agent_config, echo_provider):
+    agent = AsyncBasicAgent(tools=[], config=agent_config, llm_provider=echo_provider())
+
+    async def converse(user):
+        for turn in range(3):
+            answer = await agent(f"{user}-{turn}", session_id=user)
+        return answer
+
+    async def main():
+        return await asyncio.gather(*(converse(f"user{i}") for i in range(10)))
+
+    answers = asyncio.run(main())
+    assert answers[3] == "answer to user3-0 + user3-1 + user3-2"
+
+
+def test_sync_and_async_agents_share_session_locks(agent_config, echo_provider):
+    store = SessionStore.in_memory()
+    sync_agent = BasicAgent(tools=[], config=agent_config, llm_provider=echo_provider(delay=0.005), session_store=store)
+    async_agent = AsyncBasicAgent(tools=[], config=agent_config, llm_provider=echo_provider(delay=0.005), session_store=store)
+
+    async def main(pool):
+        loop = asyncio.get_running_loop()
+        requests = [async_agent(f"async-{i}", session_id="alice") for i in range(4)]
+        requests += [loop.run_in_executor(pool, sync_agent, f"sync-{i}", "alice") for i in range(4)]
+        await asyncio.gather(*requests)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        asyncio.run(main(pool))
+    # Requests of the session ran one at a time, so none overwrote another's turn
+    assert len(store.load("alice")["turns"]) == 8
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from tools.base_tool import BaseTool
+from tools.calculate import CalculateTool
+from tools.tool_cache import ToolResultCache, tool_result_cache
+
+
+class CountingTool(BaseTool):
+    def __init__(self, **cache_options):
+        super().__init__(
+            name="CountingTool",
+            description="Counts its calls",
+            input_params={"value": "int"},
+            output_format={"calls": "int"},
+            **cache_options
+        )
+        self.calls = 0
+
+    def execute(self, **kwargs):
+        self.calls += 1
+        return {"calls": self.calls}
+
+
+class TestToolResultCache:
+    def test_memoizes_on_canonical_parameters(self):
+        cache = ToolResultCache()
+        tool = CountingTool(cacheable=True)
+
+        assert cache.call(tool, {"a": 1, "b": 2}, tool.execute) == {"calls": 1}
+        assert cache.call(tool, {"b": 2, "a": 1}, tool.execute) == {"calls": 1}
+        assert cache.call(tool, {"a": 2, "b": 2}, tool.execute) == {"calls": 2}
+        assert cache.stats() == {"CountingTool": {"hits": 1, "misses": 2}}
+
+    def test_non_cacheable_tool_always_runs(self):
+        cache = ToolResultCache()
+        tool = CountingTool()
+
+        cache.call(tool, {"value": 1}, tool.execute)
+        assert cache.call(tool, {"value": 1}, tool.execute) == {"calls": 2}
+
+    def test_ttl_and_max_entries(self):
+        cache = ToolResultCache()
+        tool = CountingTool(cacheable=True, cache_ttl=0.05, cache_max_entries=1)
+
+        cache.call(tool, {"value": 1}, tool.execute)
+        time.sleep(0.1)
+        assert cache.call(tool, {"value": 1}, tool.execute) == {"calls": 2}
+        cache.call(tool, {"value": 2}, tool.execute)
+        assert cache.call(tool, {"value": 1}, tool.execute) == {"calls": 4}
+
+    def test_errors_are_not_cached(self):
+        cache = ToolResultCache()
+        tool = CalculateTool()
+        with pytest.raises(ValueError):
+            cache.call(tool, {"expression": "1/0"}, tool.execute)
+        assert cache.lookup(tool, {"expression": "1/0"}) == (False, None)
+
+
+def test_cache_is_shared_between_agents(agent_config, scripted_provider):
+    from agents.basic_agent import BasicAgent
+
+    tool_result_cache.clear()
+    tool = CountingTool(cacheable=True)
+    action = 'Action: {"tool": "CountingTool", "parameters": {"value": 1}}\nPAUSE'
+    for _ in range(2):
+        provider = scripted_provider(["<plan>Count</plan>", action, "Answer: done", "Done."])
+        BasicAgent(tools=[tool], config=agent_config, llm_provider=provider)("Count")
+    assert tool.calls == 1
+    assert tool_result_cache.stats()["CountingTool"] == {"hits": 1, "misses": 1}
@@ -1,5 +1,10 @@
+import time
+
 import pytest
+from tools.base_tool import BaseTool
 from tools.calculate import CalculateTool
+from tools.safe_math import compile_expression
+from tools.tool_index import ToolIndex
 
 
 class TestCalculateTool:
@@ -52,4 +57,96 @@ class TestCalculateTool:
         result = calculator.execute(expression="2 + 2")
         assert isinstance(result, dict)
         assert "result" in result
-        assert isinstance(result["result"], (int, float)) 
\ No newline at end of file
+        assert isinstance(result["result"], (int, float)) 
+
+    def test_rejects_unsafe_expressions(self, calculator):
+        """Test that only arithmetic is evaluated"""
+        for expression in ["__import__('os').getcwd()", "().__class__", "open('x')", "[1] * 3", "sqrt"]:
+            with pytest.raises(ValueError):
+                calculator.execute(expression=expression)
+
+    def test_pathological_inputs_are_bounded(self, calculator):
+        """Test that huge results fail fast instead of hanging the worker"""
+        for expression in ["9**9**9", "10**5000 * 10**5000", "factorial(100000)", "2.0 ** 5000"]:
+            with pytest.raises(ValueError):
+                calculator.execute(expression=expression)
+        with pytest.raises(ValueError, match="time budget"):
+            compile_expression("factorial(x)").evaluate({"x": [900] * 50000}, time_budget=0.01)
+
+    def test_single_calls_are_bounded(self, calculator):
+        """Test that one builtin call cannot run past the time budget"""
+        started = time.monotonic()
+        for expression in ["round(7, -99999999)", "round(10**3000, -100000000)", "round(2.5, 1e300)"]:
+            with pytest.raises(ValueError):
+                calculator.execute(expression=expression)
+        assert time.monotonic() - started < 1
+        assert calculator.execute(expression="round(1234, -2)")["result"] == 1200
+
+    def test_functions_variables_and_vectors(self, calculator):
+        """Test math functions, variables and lists of values"""
+        assert calculator.execute(expression="sqrt(16) + round(2.567, 2)")["result"] == pytest.approx(6.57)
+        assert calculator.execute(expression="x * 2 + y", variables={"x": [1, 2, 3], "y": 1})["result"] == [3, 5, 7]
+        assert calculator.execute(expression="factorial(n)", variables={"n": [3, 4]})["result"] == [6, 24]
+        with pytest.raises(ValueError):
+            calculator.execute(expression="1 / x", variables={"x": [1, 0]})
+        assert compile_expression("x * 2 + y") is compile_expression("x * 2 + y")
+
+class TestToolSchema:
+    def test_schema_maps_types(self):
+        class LookupTool(BaseTool):
+            def __init__(self):
+                super().__init__(
+                    name="LookupTool",
+                    description="Looks things up.",
+                    input_params={"query": "str", "limit": "int", "score": "float", "tags": "list",
+                                  "filters": "dict", "exact": "bool", "lang": "Optional[str]"},
+                    output_format={"items": "list"}
+                )
+
+            def execute(self, **kwargs):
+                return {"items": []}
+
+        function = LookupTool().schema()["function"]
+        properties = function["parameters"]["properties"]
+        assert [properties[name]["type"] for name in properties] == [
+            "string", "integer", "number", "array", "object", "boolean", "string"
+        ]
+        assert "lang" not in function["parameters"]["required"]
+        assert function["description"] == "Looks things up. Returns: items (list)."
+
+
+class CatalogTool(BaseTool):
+    def __init__(self, name, description, input_params=None):
+        super().__init__(name=name, description=description, input_params=input_params or {}, output_format={})
+
+    def execute(self, **kwargs):
+        return {}
+
+
+def catalog(size):
+    topics = ["invoice", "shipment", "payroll", "ticket", "inventory", "calendar", "forecast", "contract"]
+    return [
+        CatalogTool(f"{topics[i % len(topics)].title()}Tool{i}", f"Manages {topics[i % len(topics)]} records, batch {i}.")
+        for i in range(size)
+    ]
+
+
+class TestToolIndex:
+    def test_ranks_relevant_tools_first(self):
+        weather = CatalogTool("WeatherLookupTool", "Gets the current weather of a city.", {"city": "str"})
+        index = ToolIndex(catalog(200) + [weather, CalculateTool()])
+
+        assert index.search("What's the weather in Tokyo?", 3)[0] is weather
+        assert index.search("calculate 15 * 45", 3)[0].name == "CalculateTool"
+        assert index.search("tell me a joke", 3) == []
+
+    def test_updates_incrementally(self):
+        index = ToolIndex(catalog(20))
+        version = index.version
+        index.add(CatalogTool("WeatherLookupTool", "Gets the weather of a city."))
+        assert index.version > version
+        assert index.search("weather in Paris", 1)[0].name == "WeatherLookupTool"
+
+        index.remove("WeatherLookupTool")
+        assert "WeatherLookupTool" not in index
+        assert index.search("weather in Paris", 1) == []
@@ -1,11 +1,33 @@
 from abc import ABC, abstractmethod
 
 
+# JSON schema types of the Python type names used in input_params
+JSON_SCHEMA_TYPES = {
+    "str": "string",
+    "int": "integer",
+    "float": "number",
+    "bool": "boolean",
+    "list": "array",
+    "dict": "object",
+}
+
+
 class BaseTool(ABC):
     """
     Base class for all tools in the system.
     """
-    def __init__(self, name: str, description: str, input_params: dict, output_format: dict):
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        input_params: dict,
+        output_format: dict,
+        cacheable: bool = False,
+        cache_ttl: float = None,
+        cache_max_entries: int = 256,
+        execution: str = None,
+        timeout: float = None
+    ):
         """
         Initializes the tool with its properties.
 
@@ -13,11 +35,24 @@ class BaseTool(ABC):
         :param description: Description of the tool's functionality.
         :param input_params: Expected input parameters (format: {"param": "type"}).
         :param output_format: Expected output format (format: {"field": "type"}).
+        :param cacheable: Whether results can be reused for identical parameters. Set it for
+            deterministic tools, or with a cache_ttl for tools that can serve slightly stale data.
+        :param cache_ttl: Seconds a cached result stays valid. None keeps it until evicted.
+        :param cache_max_entries: Maximum number of cached results for this tool.
+        :param execution: How the tool runs: "sync" (inline, for trivial tools), "async"
+            (coroutine execute methods), "thread" (blocking I/O) or "process" (CPU-bound work,
+            the tool must be picklable). None picks async for coroutines and thread otherwise.
+        :param timeout: Seconds a call may take, overriding the agent's tool_timeout.
         """
         self.name = name
         self.description = description
         self.input_params = input_params
         self.output_format = output_format
+        self.cacheable = cacheable
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self.execution = execution
+        self.timeout = timeout
 
     @abstractmethod
     def execute(self, **kwargs):
@@ -39,4 +74,36 @@ class BaseTool(ABC):
             "description": self.description,
             "input_params": self.input_params,
             "output_format": self.output_format
-        }
\ No newline at end of file
+        }
+
+    def schema(self) -> dict:
+        """
+        Returns the tool as a JSON-schema function definition for native tool calling.
+
+        Parameters are required unless their type is marked optional, e.g. "Optional[str]"
+        or "str (optional)". Unknown types are left unconstrained.
+        """
+        properties, required = {}, []
+        for param, type_ in self.input_params.items():
+            type_name = str(type_).strip()
+            optional = "optional" in type_name.lower()
+            if type_name.startswith("Optional[") and type_name.endswith("]"):
+                type_name = type_name[len("Optional["):-1]
+            type_name = type_name.split("(")[0].split("[")[0].strip().lower()
+            json_type = JSON_SCHEMA_TYPES.get(type_name)
+            properties[param] = {"type": json_type} if json_type else {}
+            if not optional:
+                required.append(param)
+
+        description = self.description
+        if self.output_format:
+            outputs = ", ".join(f"{field} ({type_})" for field, type_ in self.output_format.items())
+            description += f" Returns: {outputs}."
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": description,
+                "parameters": {"type": "object", "properties": properties, "required": required},
+            },
+        }
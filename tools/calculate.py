@@ -1,33 +1,53 @@
 from tools.base_tool import BaseTool
+from tools.safe_math import DEFAULT_TIME_BUDGET, compile_expression
 
 class CalculateTool(BaseTool):
-    def __init__(self):
+    def __init__(self, time_budget: float = DEFAULT_TIME_BUDGET):
+        """
+        Args:
+            time_budget (float, optional): Seconds of CPU time a single calculation may use.
+        """
         super().__init__(
             name="CalculateTool",
-            description="Performs mathematical calculations based on a given expression. The expression uses Python syntax.",
-            input_params={"expression": "str"},
-            output_format={"result": "float or int"}
+            description=(
+                "Performs mathematical calculations based on a given expression. The expression uses Python "
+                "arithmetic syntax (+, -, *, /, //, %, **) and math functions such as sqrt, log, sin and round. "
+                "Names in the expression are read from variables; a list of values gives a list of results."
+            ),
+            input_params={"expression": "str", "variables": "Optional[dict]"},
+            output_format={"result": "float or int or list"},
+            cacheable=True
         )
+        self.time_budget = time_budget
 
     def execute(self, **kwargs):
         expression = kwargs.get("expression", "")
         if not isinstance(expression, str):
             raise ValueError("The 'expression' parameter must be a string.")
+        variables = kwargs.get("variables") or {}
+        if not isinstance(variables, dict):
+            raise ValueError("The 'variables' parameter must be an object.")
         
-        result = self._calculate(expression)
+        result = self._calculate(expression, variables, self.time_budget)
         
         return {"result": result}
 
     @staticmethod
-    def _calculate(expression):
+    def _calculate(expression, variables=None, time_budget=DEFAULT_TIME_BUDGET):
         """
         Safely evaluates a mathematical expression.
+
+        Only arithmetic and whitelisted math functions are allowed, operand sizes and CPU
+        time are capped, and compiled expressions are cached (see tools.safe_math).
+
         Args:
             expression (str): The mathematical expression to evaluate.
+            variables (dict, optional): Values of the names in the expression, numbers or lists.
+            time_budget (float, optional): Seconds of CPU time the calculation may use.
         Returns:
             The result of the calculation.
         """
         try:
-            return eval(expression)
-        except Exception as e:
-            raise ValueError(f"Invalid mathematical expression: {expression}. Error: {e}")
\ No newline at end of file
+            return compile_expression(expression).evaluate(variables, time_budget)
+        except ValueError as e:
+            raise ValueError(f"Invalid mathematical expression: {expression}. Error: {e}")
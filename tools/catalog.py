@@ -0,0 +1,51 @@
+from utils.cache import LRUCache
+
+
+# Rendered descriptions shared by every agent, so agents built with equal tools get the
+# very same string (and hit the caches keyed on it)
+_rendered = LRUCache(max_entries=256)
+
+
+def _describe(tool_info: dict, include_params: bool) -> str:
+    tool_description = f"* {tool_info['name']}:\n  - Description: {tool_info['description']}"
+    if include_params:
+        params = ", ".join([f"{param} ({type_})" for param, type_ in tool_info["input_params"].items()])
+        outputs = ", ".join([f"{field} ({type_})" for field, type_ in tool_info["output_format"].items()])
+        tool_description += f"\n  - Parameters: {params if params else 'None'}"
+        tool_description += f"\n  - Output Format: {outputs if outputs else 'None'}"
+    return tool_description
+
+
+def _tool_description(tool, include_params: bool) -> str:
+    """
+    Returns the rendered line of a tool, kept on the tool and rendered again only when one
+    of its attributes was replaced. Dicts changed in place are not noticed: assign new ones.
+    """
+    fields = (tool.name, tool.description, tool.input_params, tool.output_format)
+    lines = tool.__dict__.get("_catalog_lines")
+    if lines is None:
+        lines = tool._catalog_lines = {}
+    cached = lines.get(include_params)
+    # The fields usually are the very same objects, which tuple comparison checks first
+    if cached is not None and cached[0] == fields:
+        return cached[1]
+    line = _describe(tool.info(), include_params)
+    lines[include_params] = (fields, line)
+    return line
+
+
+def render_tools_description(tools, include_params: bool = False) -> str:
+    """
+    Returns the description of the tools used in prompts. Each tool's line is cached on
+    the tool, so describing a catalog again only joins the lines.
+
+    Args:
+        tools: The tools to describe, in order.
+        include_params (bool): Whether to list parameters and output format.
+    """
+    rendered = "\n\n".join([_tool_description(tool, include_params) for tool in tools])
+    shared = _rendered.get(rendered)
+    if shared is None:
+        _rendered.set(rendered, rendered)
+        return rendered
+    return shared
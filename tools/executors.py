@@ -0,0 +1,147 @@
+import asyncio
+import atexit
+import inspect
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# How a tool runs:
+#   sync     in the calling thread, for tools cheap enough not to be worth a hand-off
+#   async    as a coroutine, on the caller's event loop or on a shared background loop
+#   thread   on a shared thread pool, for blocking I/O
+#   process  on a shared process pool, for CPU-bound work (the tool must be picklable)
+EXECUTION_KINDS = ("sync", "async", "thread", "process")
+
+
+def execution_kind(tool) -> str:
+    """
+    Returns how a tool runs: its declared execution, else async for coroutine tools and
+    thread for the others.
+    """
+    kind = tool.execution
+    if kind is None:
+        kind = "async" if inspect.iscoroutinefunction(tool.execute) else "thread"
+    if kind not in EXECUTION_KINDS:
+        raise ValueError(f"Unknown execution kind for {tool.name}: {kind}")
+    if kind == "async" and not inspect.iscoroutinefunction(tool.execute):
+        raise ValueError(f"{tool.name} is declared async but its execute method is not a coroutine")
+    return kind
+
+
+def execute_tool(tool, parameters: dict):
+    """
+    Runs a tool to completion in the current thread, or process, driving coroutine tools
+    on their own event loop.
+    """
+    if inspect.iscoroutinefunction(tool.execute):
+        return asyncio.run(tool.execute(**parameters))
+    return tool.execute(**parameters)
+
+
+class ToolExecutors:
+    """
+    The process-wide pools tools run on: thread and process pools keyed by size, and one
+    background event loop for coroutine tools called from synchronous code. Pools are
+    created on first use and shared by every agent.
+    """
+    def __init__(self):
+        self._thread_pools = {}
+        self._process_pools = {}
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def thread_pool(self, max_workers: int) -> ThreadPoolExecutor:
+        with self._lock:
+            pool = self._thread_pools.get(max_workers)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-tool")
+                self._thread_pools[max_workers] = pool
+            return pool
+
+    def process_pool(self, max_workers: int = None) -> ProcessPoolExecutor:
+        max_workers = max_workers or os.cpu_count() or 1
+        with self._lock:
+            pool = self._process_pools.get(max_workers)
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=max_workers)
+                self._process_pools[max_workers] = pool
+            return pool
+
+    def _replace_process_pool(self, max_workers: int, broken: ProcessPoolExecutor):
+        """
+        Drops a pool whose worker died, so the next call gets a fresh one.
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        with self._lock:
+            if self._process_pools.get(max_workers) is broken:
+                del self._process_pools[max_workers]
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def event_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Returns the background event loop that runs coroutine tools for synchronous callers,
+        and the async agents of a batch.
+        """
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="agent-tool-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, tool, parameters: dict, max_threads: int = 4, max_processes: int = None) -> Future:
+        """
+        Starts a tool on the executor matching its execution kind.
+
+        Cancelling the returned future cancels async tools outright, and thread or process
+        tools that have not started yet.
+
+        Args:
+            tool (BaseTool): The tool to run.
+            parameters (dict): Its parameters.
+            max_threads (int): Size of the thread pool used by thread tools.
+            max_processes (int, optional): Size of the process pool. Defaults to the CPU count.
+
+        Returns:
+            Future: The tool's result.
+        """
+        kind = execution_kind(tool)
+        if kind == "async":
+            return asyncio.run_coroutine_threadsafe(tool.execute(**parameters), self.event_loop())
+        if kind == "thread":
+            return self.thread_pool(max_threads).submit(execute_tool, tool, parameters)
+        if kind == "process":
+            pool = self.process_pool(max_processes)
+            try:
+                return pool.submit(execute_tool, tool, parameters)
+            except BrokenProcessPool:
+                self._replace_process_pool(max_processes, pool)
+                return self.process_pool(max_processes).submit(execute_tool, tool, parameters)
+
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(execute_tool(tool, parameters))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self):
+        """
+        Stops every pool and the background loop. Running tools are not waited for.
+        """
+        with self._lock:
+            pools = list(self._thread_pools.values()) + list(self._process_pools.values())
+            self._thread_pools.clear()
+            self._process_pools.clear()
+            loop, self._loop = self._loop, None
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+
+
+tool_executors = ToolExecutors()
+atexit.register(tool_executors.shutdown)
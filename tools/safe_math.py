@@ -0,0 +1,320 @@
+import ast
+import functools
+import math
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, lists are then evaluated element by element
+    np = None
+
+
+# Limits that keep a single evaluation cheap whatever the input
+MAX_EXPRESSION_LENGTH = 2000
+MAX_NODES = 500
+MAX_RESULT_BITS = 10000      # about 3000 decimal digits
+MAX_FACTORIAL = 1000
+MAX_ROUND_DIGITS = 308       # beyond this, rounding a float gives 0 or the number itself
+MAX_VECTOR_LENGTH = 100000
+DEFAULT_TIME_BUDGET = 0.1    # seconds of CPU time per evaluation
+
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau, "inf": math.inf}
+
+FUNCTIONS = {
+    "abs": abs,
+    "round": None,  # bounded version below
+    "min": min,
+    "max": max,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "log2": math.log2,
+    "log10": math.log10,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "atan2": math.atan2,
+    "sinh": math.sinh,
+    "cosh": math.cosh,
+    "tanh": math.tanh,
+    "hypot": math.hypot,
+    "degrees": math.degrees,
+    "radians": math.radians,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "factorial": None,  # bounded version below
+}
+
+# NumPy equivalents used for vectorized evaluation. Expressions calling other functions
+# are evaluated element by element.
+NUMPY_FUNCTIONS = {} if np is None else {
+    "abs": np.abs,
+    "min": np.minimum,
+    "max": np.maximum,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "log2": np.log2,
+    "log10": np.log10,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "asin": np.arcsin,
+    "acos": np.arccos,
+    "atan": np.arctan,
+    "atan2": np.arctan2,
+    "sinh": np.sinh,
+    "cosh": np.cosh,
+    "tanh": np.tanh,
+    "hypot": np.hypot,
+    "degrees": np.degrees,
+    "radians": np.radians,
+    "floor": np.floor,
+    "ceil": np.ceil,
+}
+
+_BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+_budget = threading.local()
+
+
+def _check_budget():
+    deadline = getattr(_budget, "deadline", None)
+    if deadline is not None and time.thread_time() > deadline:
+        raise ValueError("Calculation exceeded its time budget")
+
+
+def _is_vector(value) -> bool:
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def _pow(base, exponent):
+    _check_budget()
+    if _is_vector(base) or _is_vector(exponent):
+        return np.power(base, exponent)
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        if math.log2(abs(base)) * exponent > MAX_RESULT_BITS:
+            raise ValueError("Result of the power is too large")
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise ValueError("Result is a complex number")
+    return result
+
+
+def _mul(left, right):
+    _check_budget()
+    if isinstance(left, int) and isinstance(right, int):
+        if left.bit_length() + right.bit_length() > MAX_RESULT_BITS:
+            raise ValueError("Result of the multiplication is too large")
+    return left * right
+
+
+def _factorial(n):
+    if isinstance(n, float) and n.is_integer():
+        n = int(n)
+    if not isinstance(n, int) or n < 0:
+        raise ValueError("factorial() needs a non-negative integer")
+    if n > MAX_FACTORIAL:
+        raise ValueError(f"factorial() is limited to {MAX_FACTORIAL}")
+    return math.factorial(n)
+
+
+def _round(number, ndigits=None):
+    if ndigits is None:
+        return round(number)
+    if isinstance(ndigits, float) and ndigits.is_integer():
+        ndigits = int(ndigits)
+    if not isinstance(ndigits, int):
+        raise ValueError("round() needs an integer number of digits")
+    # Rounding an integer to -n digits computes 10**n, which could run for hours
+    if abs(ndigits) > MAX_ROUND_DIGITS:
+        raise ValueError(f"round() is limited to {MAX_ROUND_DIGITS} digits")
+    return round(number, ndigits)
+
+
+def _call(function):
+    """
+    Wraps a whitelisted function so every call is checked against the time budget, and
+    integer arguments against the size limit: the budget is only checked between calls,
+    so a single call must stay cheap.
+    """
+    @functools.wraps(function)
+    def call(*args):
+        _check_budget()
+        for arg in args:
+            if isinstance(arg, int) and arg.bit_length() > MAX_RESULT_BITS:
+                raise ValueError(f"Argument of {function.__name__}() is too large")
+        return function(*args)
+    return call
+
+
+_SCALAR_NAMESPACE = {name: _call(function) for name, function in FUNCTIONS.items() if function is not None}
+_SCALAR_NAMESPACE["factorial"] = _call(_factorial)
+_SCALAR_NAMESPACE["round"] = _call(_round)
+_VECTOR_NAMESPACE = {name: _call(function) for name, function in NUMPY_FUNCTIONS.items()}
+
+
+class _Rewriter(ast.NodeTransformer):
+    """
+    Routes ** and * through the bounded helpers.
+    """
+    HELPERS = {ast.Pow: "__pow", ast.Mult: "__mul"}
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        helper = self.HELPERS.get(type(node.op))
+        if helper is None:
+            return node
+        return ast.copy_location(
+            ast.Call(func=ast.Name(id=helper, ctx=ast.Load()), args=[node.left, node.right], keywords=[]),
+            node
+        )
+
+
+class CompiledExpression:
+    """
+    An arithmetic expression checked against the whitelist and compiled to bytecode once.
+    """
+    def __init__(self, expression: str):
+        if len(expression) > MAX_EXPRESSION_LENGTH:
+            raise ValueError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except (SyntaxError, ValueError, RecursionError) as e:
+            raise ValueError(f"Invalid syntax: {e}")
+
+        self.names = set()
+        self.functions = set()
+        nodes = list(ast.walk(tree))
+        if len(nodes) > MAX_NODES:
+            raise ValueError(f"Expression has more than {MAX_NODES} elements")
+        self._called = {id(node.func) for node in nodes if isinstance(node, ast.Call)}
+        for node in nodes:
+            self._check(node)
+
+        tree = ast.fix_missing_locations(_Rewriter().visit(tree))
+        self.code = compile(tree, "<expression>", "eval")
+
+    def _check(self, node):
+        if isinstance(node, (ast.Expression, ast.Load) + _BINARY_OPERATORS + _UNARY_OPERATORS):
+            return
+        if isinstance(node, ast.BinOp):
+            if not isinstance(node.op, _BINARY_OPERATORS):
+                raise ValueError(f"Operator not allowed: {type(node.op).__name__}")
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, _UNARY_OPERATORS):
+                raise ValueError(f"Operator not allowed: {type(node.op).__name__}")
+        elif isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise ValueError(f"Only numbers are allowed, got {node.value!r}")
+            if isinstance(node.value, int) and node.value.bit_length() > MAX_RESULT_BITS:
+                raise ValueError("Number is too large")
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ValueError(f"Function not allowed: {ast.unparse(node.func)}")
+            self.functions.add(node.func.id)
+        elif isinstance(node, ast.Name):
+            if node.id in FUNCTIONS:
+                if id(node) not in self._called:
+                    raise ValueError(f"Function used without being called: {node.id}")
+            elif node.id.startswith("_"):
+                raise ValueError(f"Name not allowed: {node.id}")
+            else:
+                self.names.add(node.id)
+        else:
+            raise ValueError(f"Syntax not allowed: {type(node).__name__}")
+
+    def evaluate(self, variables: dict = None, time_budget: float = DEFAULT_TIME_BUDGET):
+        """
+        Evaluates the expression.
+
+        Args:
+            variables (dict, optional): Values of the names used in the expression. A list
+                value makes the evaluation vectorized: the result is a list with one value
+                per element, scalars being broadcast. Lists must have the same length.
+            time_budget (float, optional): Seconds of CPU time the evaluation may use.
+
+        Returns:
+            The result, a number or a list of numbers.
+
+        Raises:
+            ValueError: The expression cannot be evaluated safely or fails.
+        """
+        values = dict(CONSTANTS)
+        values.update(variables or {})
+        missing = self.names - values.keys()
+        if missing:
+            raise ValueError(f"Unknown names: {', '.join(sorted(missing))}")
+        values = {name: values[name] for name in self.names}
+
+        lengths = {len(value) for value in values.values() if isinstance(value, (list, tuple))}
+        if len(lengths) > 1:
+            raise ValueError("Lists of values must have the same length")
+        for value in values.values():
+            for item in value if isinstance(value, (list, tuple)) else [value]:
+                if type(item) not in (int, float):
+                    raise ValueError(f"Variables must be numbers or lists of numbers, got {item!r}")
+
+        _budget.deadline = None if time_budget is None else time.thread_time() + time_budget
+        try:
+            if not lengths:
+                return self._run(_SCALAR_NAMESPACE, values)
+            length = lengths.pop()
+            if length > MAX_VECTOR_LENGTH:
+                raise ValueError(f"Lists are limited to {MAX_VECTOR_LENGTH} values")
+            if np is not None and self.functions <= NUMPY_FUNCTIONS.keys():
+                return self._run_vectorized(values)
+            return [
+                self._run(_SCALAR_NAMESPACE, {
+                    name: value[i] if isinstance(value, (list, tuple)) else value
+                    for name, value in values.items()
+                })
+                for i in range(length)
+            ]
+        finally:
+            _budget.deadline = None
+
+    def _run(self, functions: dict, values: dict):
+        namespace = {"__builtins__": {}, "__pow": _pow, "__mul": _mul}
+        namespace.update(functions)
+        namespace.update(values)
+        try:
+            result = eval(self.code, namespace)
+        except ValueError:
+            raise
+        except (ArithmeticError, TypeError) as e:
+            raise ValueError(str(e) or type(e).__name__)
+        if isinstance(result, complex):
+            raise ValueError("Result is a complex number")
+        if type(result) not in (int, float) and not _is_vector(result) and not (np is not None and isinstance(result, np.number)):
+            raise ValueError(f"Result is not a number: {result!r}")
+        return result
+
+    def _run_vectorized(self, values: dict) -> list:
+        arrays = {
+            name: np.asarray(value, dtype=float) if isinstance(value, (list, tuple)) else value
+            for name, value in values.items()
+        }
+        with np.errstate(all="ignore"):
+            result = self._run(_VECTOR_NAMESPACE, arrays)
+        result = np.broadcast_to(result, np.broadcast_shapes(*(np.shape(a) for a in arrays.values())))
+        if not np.all(np.isfinite(result)):
+            raise ValueError("Calculation produced a non-finite value (e.g. a division by zero)")
+        return result.tolist()
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> CompiledExpression:
+    """
+    Returns the compiled form of an expression. Compilations are cached, so repeated
+    expressions are parsed and checked only once.
+
+    Raises:
+        ValueError: The expression is invalid or uses anything outside the whitelist.
+    """
+    return CompiledExpression(expression)
@@ -0,0 +1,91 @@
+import json
+import threading
+
+from utils.cache import LRUCache
+
+
+class ToolResultCache:
+    """
+    Memoizes the results of tools declared cacheable, keyed on the tool name and its
+    canonicalized parameters.
+
+    Each tool gets its own LRU cache sized by its cache_max_entries and cache_ttl. Errors are
+    never cached. The module-level tool_result_cache instance is shared by every agent in the
+    process, so tools with the same name share results.
+    """
+    _MISS = object()
+
+    def __init__(self):
+        self._caches = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(parameters: dict):
+        """
+        Returns the canonical form of the parameters, or None if they are not JSON serializable.
+        """
+        try:
+            return json.dumps(parameters, sort_keys=True, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return None
+
+    def _cache_for(self, tool) -> LRUCache:
+        with self._lock:
+            cache = self._caches.get(tool.name)
+            if cache is None:
+                cache = LRUCache(max_entries=tool.cache_max_entries, ttl=tool.cache_ttl)
+                self._caches[tool.name] = cache
+                self._stats[tool.name] = {"hits": 0, "misses": 0}
+            return cache
+
+    def lookup(self, tool, parameters: dict):
+        """
+        Returns (True, result) if a cached result exists for the call, else (False, None).
+        """
+        if not tool.cacheable:
+            return False, None
+        key = self._key(parameters)
+        if key is None:
+            return False, None
+        result = self._cache_for(tool).get(key, self._MISS)
+        hit = result is not self._MISS
+        with self._lock:
+            self._stats[tool.name]["hits" if hit else "misses"] += 1
+        return (True, result) if hit else (False, None)
+
+    def store(self, tool, parameters: dict, result):
+        """
+        Caches the result of a call if the tool is cacheable.
+        """
+        if not tool.cacheable:
+            return
+        key = self._key(parameters)
+        if key is not None:
+            self._cache_for(tool).set(key, result)
+
+    def call(self, tool, parameters: dict, execute):
+        """
+        Returns the cached result for the call, or runs execute(**parameters) and caches it.
+        """
+        hit, result = self.lookup(tool, parameters)
+        if hit:
+            return result
+        result = execute(**parameters)
+        self.store(tool, parameters, result)
+        return result
+
+    def stats(self) -> dict:
+        """
+        Returns hit and miss counters per tool name.
+        """
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
+
+    def clear(self):
+        with self._lock:
+            self._caches.clear()
+            self._stats.clear()
+
+
+tool_result_cache = ToolResultCache()
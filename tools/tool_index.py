@@ -0,0 +1,141 @@
+import heapq
+import itertools
+import math
+import re
+import threading
+from collections import Counter
+
+
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+# Times the words of a tool's name count in its document, names being the strongest signal
+NAME_WEIGHT = 3
+
+
+def tokenize(text: str) -> list:
+    """
+    Splits text into lowercase words, breaking CamelCase and snake_case names apart.
+    Numbers are left out: they are about the question's data, not about which tool to use.
+    """
+    return [
+        word.lower() for word in _WORD_RE.findall(_CAMEL_RE.sub(" ", text))
+        if len(word) > 1 and not word.isdigit()
+    ]
+
+
+def tool_terms(tool) -> Counter:
+    """
+    Returns the term frequencies of a tool's document: its name, description, parameters
+    and output fields.
+    """
+    terms = Counter()
+    for _ in range(NAME_WEIGHT):
+        terms.update(tokenize(tool.name))
+    terms.update(tokenize(tool.description))
+    for param in tool.input_params:
+        terms.update(tokenize(param))
+    for field in tool.output_format:
+        terms.update(tokenize(field))
+    return terms
+
+
+class ToolIndex:
+    """
+    BM25 index over tool names, descriptions and parameters, to pick the tools relevant to
+    a question from a large catalog without any network call.
+
+    Tools can be added and removed at any time; only the postings of the changed tool are
+    updated. Searching scores just the tools sharing a word with the question.
+    """
+    def __init__(self, tools=(), k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            tools: Tools to index.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self._tools = {}
+        # Position of each tool in the catalog, to break score ties
+        self._order = {}
+        self._counter = itertools.count()
+        self._lengths = {}
+        self._total_length = 0
+        # term -> {tool name: frequency}
+        self._postings = {}
+        # Incremented on every change, so callers can cache selections
+        self.version = 0
+        self._lock = threading.Lock()
+        for tool in tools:
+            self.add(tool)
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def add(self, tool):
+        """
+        Indexes a tool, replacing any tool of the same name.
+        """
+        terms = tool_terms(tool)
+        with self._lock:
+            self._remove(tool.name)
+            self._tools[tool.name] = tool
+            self._order.setdefault(tool.name, next(self._counter))
+            self._lengths[tool.name] = sum(terms.values())
+            self._total_length += self._lengths[tool.name]
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[tool.name] = frequency
+            self.version += 1
+
+    def remove(self, name: str):
+        with self._lock:
+            self._remove(name)
+            self._order.pop(name, None)
+            self.version += 1
+
+    def _remove(self, name: str):
+        tool = self._tools.pop(name, None)
+        if tool is None:
+            return
+        self._total_length -= self._lengths.pop(name)
+        for term in tool_terms(tool):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(name, None)
+                if not postings:
+                    del self._postings[term]
+
+    def scores(self, question: str) -> dict:
+        """
+        Returns the BM25 score of every tool sharing a word with the question.
+        """
+        with self._lock:
+            count = len(self._tools)
+            if not count:
+                return {}
+            average_length = self._total_length / count
+            scores = {}
+            for term in set(tokenize(question)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for name, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[name] / average_length)
+                    scores[name] = scores.get(name, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+            return scores
+
+    def search(self, question: str, k: int) -> list:
+        """
+        Returns up to k tools relevant to the question, best first. Tools sharing no word
+        with the question are never returned.
+        """
+        scores = self.scores(question)
+        with self._lock:
+            best = heapq.nsmallest(k, scores, key=lambda name: (-scores[name], self._order.get(name, 0)))
+            return [self._tools[name] for name in best if name in self._tools]
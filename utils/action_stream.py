@@ -0,0 +1,110 @@
+import re
+
+# Shared with the one-shot parser, so streamed and complete responses are read the same way
+from utils.react_parser import _SECTION_RE, _decoder
+
+
+_ACTION_RE = re.compile(r'[ \t]*Action:[ \t]*')
+
+
+class ActionStreamParser:
+    """
+    Incremental parser for executor responses that arrive as a stream of chunks.
+
+    Reports every `Action: {...}` as soon as its JSON object is complete, without waiting
+    for the end of the line or of the response, and flags when the model has written
+    PAUSE so the caller can stop reading. Like parse_react_response, the JSON of an Action
+    may span several lines; JSON that is still invalid when the next section starts is
+    reported as written, so the caller fails on it as it would on the complete response.
+    """
+    def __init__(self):
+        self.paused = False
+        self._text = ""
+        # Offset of the first line not parsed yet
+        self._pos = 0
+        # Whether _pos is after an Action on the same line rather than at a line start
+        self._mid_line = False
+        # Offset of the JSON of an Action that is not complete yet
+        self._action_start = None
+
+    @property
+    def text(self) -> str:
+        """
+        The response text read so far, up to and including the PAUSE line once paused.
+        """
+        return self._text
+
+    def feed(self, chunk: str) -> list:
+        """
+        Adds a chunk of the response.
+
+        Args:
+            chunk (str): The next piece of streamed text.
+
+        Returns:
+            list: The JSON strings of Actions completed by this chunk, in order.
+        """
+        if self.paused:
+            return []
+        actions = []
+        self._text += chunk
+        while True:
+            if self._action_start is not None:
+                action_json = self._complete_action()
+                if action_json is None:
+                    break
+                actions.append(action_json)
+                continue
+
+            newline = self._text.find("\n", self._pos)
+            line_end = newline if newline != -1 else len(self._text)
+            if not self._mid_line:
+                line = self._text[self._pos:line_end]
+                if line.strip() == "PAUSE":
+                    self._text = self._text[:line_end]
+                    self.paused = True
+                    break
+                match = _ACTION_RE.match(line)
+                if match is not None and line.startswith("{", match.end()):
+                    self._action_start = self._pos + match.end()
+                    continue
+            if newline == -1:
+                break
+            self._pos = newline + 1
+            self._mid_line = False
+        return actions
+
+    def _complete_action(self):
+        """
+        Returns the JSON of the pending Action once it is complete, or its line once a new
+        section shows it is invalid. Returns None while more text is needed.
+        """
+        start = self._action_start
+        try:
+            _, end = _decoder.raw_decode(self._text, start)
+        except ValueError:
+            # JSON strings cannot hold a newline, so a section line ends the JSON for sure
+            section = _SECTION_RE.search(self._text, start)
+            if section is None:
+                return None
+            line_end = self._text.find("\n", start)
+            self._action_start = None
+            self._pos = section.start() + 1
+            self._mid_line = False
+            return self._text[start:line_end].strip()
+        self._action_start = None
+        self._pos = end
+        self._mid_line = True
+        return self._text[start:end]
+
+    def finish(self) -> list:
+        """
+        Ends the response. Returns the text of an Action whose JSON never completed, if
+        any, so the caller reports it like any other invalid Action.
+        """
+        if self._action_start is None:
+            return []
+        line_end = self._text.find("\n", self._action_start)
+        raw = self._text[self._action_start:line_end if line_end != -1 else len(self._text)].strip()
+        self._action_start = None
+        return [raw]
@@ -0,0 +1,163 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with optional TTL and size-based eviction.
+    """
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, max_size_bytes: Optional[int] = None):
+        """
+        Args:
+            max_entries (int): Maximum number of entries kept.
+            ttl (float, optional): Seconds an entry stays valid. None keeps entries until evicted.
+            max_size_bytes (int, optional): Approximate memory limit for the stored values.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_size_bytes = max_size_bytes
+        self._entries = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                self._size_bytes -= size
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        size = sys.getsizeof(value)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._size_bytes -= self._entries.pop(key)[2]
+            self._entries[key] = (value, expires_at, size)
+            self._size_bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_size_bytes is not None and self._size_bytes > self.max_size_bytes)
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._size_bytes -= evicted_size
+
+    def delete(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size_bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Persistent cache stored in a SQLite file. Several processes can share the same file.
+
+    Values must be JSON serializable.
+    """
+    def __init__(self, path: str, max_entries: int = 100000, ttl: Optional[float] = None):
+        """
+        Args:
+            path (str): Path of the SQLite database file, created if missing.
+            max_entries (int): Maximum number of entries kept, least recently used are evicted first.
+            ttl (float, optional): Seconds an entry stays valid. None keeps entries until evicted.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return default
+            value, created = row
+            if self.ttl is not None and created + self.ttl < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return default
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+def create_cache(backend: str = "memory", max_entries: int = 1024, ttl: Optional[float] = None,
+                 max_size_bytes: Optional[int] = None, path: Optional[str] = None):
+    """
+    Creates a cache backend by name.
+
+    Args:
+        backend (str): "memory" for LRUCache or "sqlite" for SQLiteCache.
+        max_entries (int): Maximum number of entries kept.
+        ttl (float, optional): Seconds an entry stays valid.
+        max_size_bytes (int, optional): Memory limit, only used by the memory backend.
+        path (str, optional): Database file, required by the sqlite backend.
+
+    Returns:
+        LRUCache or SQLiteCache: The cache instance.
+    """
+    if backend == "memory":
+        return LRUCache(max_entries=max_entries, ttl=ttl, max_size_bytes=max_size_bytes)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite cache backend requires a path.")
+        return SQLiteCache(path, max_entries=max_entries, ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -1,6 +1,3 @@
-import re
-
-
 def extract_xml(text: str, tag: str) -> str:
     """
     Extracts the content of the specified XML tag from the given text. Used for parsing structured responses 
@@ -12,5 +9,10 @@ def extract_xml(text: str, tag: str) -> str:
     Returns:
         str: The content of the specified XML tag, or an empty string if the tag is not found.
     """
-    match = re.search(f'<{tag}>(.*?)</{tag}>', text, re.DOTALL)
-    return match.group(1) if match else ""
\ No newline at end of file
+    # Plain substring search: no pattern to build per call, and no backtracking on long texts
+    start = text.find(f"<{tag}>")
+    if start == -1:
+        return ""
+    start += len(tag) + 2
+    end = text.find(f"</{tag}>", start)
+    return text[start:end] if end != -1 else ""
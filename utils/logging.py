@@ -1,39 +1,154 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from config.config import Config
+from utils.payload import truncate_payload
+
+
+_setup_lock = threading.Lock()
+_listener = None
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields):
+    """
+    Logs a structured event. Nothing is built unless the logger is enabled for level, and
+    payloads are truncated to logging.max_payload_chars before the record is queued.
+    DEBUG events are kept at the logging.sample_rate.
+
+    Args:
+        logger (logging.Logger): Logger to write to.
+        level (int): Logging level, e.g. logging.DEBUG.
+        event (str): Event name, used as the message.
+        **fields: Event data.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    max_chars, sample_rate = getattr(logger, "_agent_payload_limits", (2000, 1.0))
+    if level <= logging.DEBUG and sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+    fields = {name: truncate_payload(value, max_chars) for name, value in fields.items()}
+    logger.log(level, event, extra={"fields": fields})
+
+
+class TextFormatter(logging.Formatter):
+    """
+    The classic text format, with event fields appended as JSON.
+    """
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text = f"{text} {json.dumps(fields, default=str)}"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message and the event fields.
+    """
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records when the queue is full instead of blocking the caller.
+    """
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
 
 def setup_logging(config: Config) -> logging.Logger:
     """
     Setup logging configuration based on the provided config
-    
+
+    Records are put on a queue and written by a background thread, so the request path
+    never waits on the console or the debug file. The debug file rotates by size.
+
     Args:
         config (Config): Application configuration object
-    
+
     Returns:
         logging.Logger: Configured logger instance
     """
+    global _listener
+    log_level = getattr(logging, config.log_level.upper(), logging.INFO)
+    log_config = config.logging
+    settings = (log_level, config.debug, repr(log_config))
+
     # Create logger
     logger = logging.getLogger('agent')
-    
-    # Set log level from config
-    log_level = getattr(logging, config.log_level.upper(), logging.INFO)
-    logger.setLevel(log_level)
-    
-    # Create console handler with formatting
-    console_handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    console_handler.setFormatter(formatter)
-    
-    # Add handler to logger
-    logger.addHandler(console_handler)
-    
-    # Add debug handler if debug mode is enabled
-    if config.debug:
-        debug_handler = logging.FileHandler('debug.log')
-        debug_handler.setLevel(logging.DEBUG)
-        debug_handler.setFormatter(formatter)
-        logger.addHandler(debug_handler)
-    
-    return logger 
\ No newline at end of file
+
+    with _setup_lock:
+        # Every agent calls this on construction; only reconfigure when the settings change
+        if getattr(logger, "_agent_settings", None) == settings:
+            return logger
+
+        # Drop the handlers added by a previous setup with other settings
+        for handler in list(logger.handlers):
+            if getattr(handler, "_agent_handler", False):
+                logger.removeHandler(handler)
+                handler.close()
+        _stop_listener()
+
+        # Set log level from config
+        logger.setLevel(log_level)
+        logger._agent_payload_limits = (log_config.max_payload_chars, log_config.sample_rate)
+
+        formatter = JsonFormatter() if log_config.format == "json" else TextFormatter(TEXT_FORMAT)
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        handlers = [console_handler]
+
+        # Add debug handler if debug mode is enabled
+        if config.debug and log_config.file:
+            debug_handler = RotatingFileHandler(
+                log_config.file,
+                maxBytes=log_config.max_bytes,
+                backupCount=log_config.backup_count
+            )
+            debug_handler.setLevel(logging.DEBUG)
+            debug_handler.setFormatter(formatter)
+            handlers.append(debug_handler)
+
+        queue_handler = DroppingQueueHandler(queue.Queue(log_config.queue_size))
+        queue_handler._agent_handler = True
+        logger.addHandler(queue_handler)
+        _listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+        logger._agent_settings = settings
+    return logger
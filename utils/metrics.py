@@ -0,0 +1,290 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+_current_stage = contextvars.ContextVar("metrics_stage", default=None)
+_current_turn = contextvars.ContextVar("metrics_turn", default=None)
+_current_request = contextvars.ContextVar("metrics_request", default=None)
+
+
+@dataclass
+class CallRecord:
+    """
+    Usage and timing of a single LLM call.
+    """
+    stage: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float
+    turn: Optional[int] = None
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+class RequestMetrics:
+    """
+    The call records of one agent request.
+    """
+    def __init__(self):
+        self.records = []
+        self.started = time.monotonic()
+        self.elapsed = None
+
+    def totals(self) -> dict:
+        """
+        Returns call count, tokens and LLM time for the request, overall and per stage.
+        """
+        by_stage = {}
+        for record in self.records:
+            stage = by_stage.setdefault(record.stage, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency": 0.0})
+            stage["calls"] += 1
+            stage["prompt_tokens"] += record.prompt_tokens
+            stage["completion_tokens"] += record.completion_tokens
+            stage["latency"] += record.latency
+        return {
+            "calls": len(self.records),
+            "prompt_tokens": sum(record.prompt_tokens for record in self.records),
+            "completion_tokens": sum(record.completion_tokens for record in self.records),
+            "llm_latency": sum(record.latency for record in self.records),
+            "elapsed": self.elapsed,
+            "by_stage": by_stage,
+        }
+
+
+class MetricsRegistry:
+    """
+    Process-wide aggregation of LLM call records into counters and latency histograms,
+    labelled by stage and model, and fan-out of every record to the registered sinks.
+    """
+    def __init__(self):
+        self._series = {}
+        self._sinks = []
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink):
+        """
+        Registers a sink. Sinks implement emit(record: CallRecord).
+        """
+        with self._lock:
+            self._sinks.append(sink)
+
+    def remove_sink(self, sink):
+        with self._lock:
+            self._sinks.remove(sink)
+
+    def sinks(self) -> list:
+        with self._lock:
+            return list(self._sinks)
+
+    def record(self, record: CallRecord):
+        with self._lock:
+            series = self._series.get((record.stage, record.model))
+            if series is None:
+                series = {
+                    "calls": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "latency_sum": 0.0,
+                    "latency_buckets": [0] * len(LATENCY_BUCKETS),
+                }
+                self._series[(record.stage, record.model)] = series
+            series["calls"] += 1
+            series["prompt_tokens"] += record.prompt_tokens
+            series["completion_tokens"] += record.completion_tokens
+            series["latency_sum"] += record.latency
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if record.latency <= bound:
+                    series["latency_buckets"][i] += 1
+                    break
+            sinks = list(self._sinks)
+        for sink in sinks:
+            sink.emit(record)
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of the aggregated series, keyed by (stage, model).
+        """
+        with self._lock:
+            return {
+                key: dict(series, latency_buckets=list(series["latency_buckets"]))
+                for key, series in self._series.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class InMemorySink:
+    """
+    Keeps the most recent call records in memory.
+    """
+    def __init__(self, max_records: int = 10000):
+        self.records = deque(maxlen=max_records)
+
+    def emit(self, record: CallRecord):
+        self.records.append(record)
+
+
+class JSONLinesSink:
+    """
+    Appends every call record as a JSON line to a file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, record: CallRecord):
+        line = json.dumps(asdict(record))
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+class PrometheusTextExporter:
+    """
+    Renders a registry in the Prometheus text exposition format.
+    """
+    def __init__(self, registry: MetricsRegistry = None, prefix: str = "agent_llm"):
+        self.registry = registry or metrics_registry
+        self.prefix = prefix
+
+    @staticmethod
+    def _escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def _labels(self, stage: str, model: str, **extra) -> str:
+        labels = {"stage": stage, "model": model, **extra}
+        rendered = ",".join(f'{name}="{self._escape(value)}"' for name, value in labels.items())
+        return "{" + rendered + "}"
+
+    def render(self) -> str:
+        snapshot = sorted(self.registry.snapshot().items())
+        lines = []
+        for name, field_name in (
+            ("calls_total", "calls"),
+            ("prompt_tokens_total", "prompt_tokens"),
+            ("completion_tokens_total", "completion_tokens"),
+        ):
+            lines.append(f"# TYPE {self.prefix}_{name} counter")
+            for (stage, model), series in snapshot:
+                lines.append(f"{self.prefix}_{name}{self._labels(stage, model)} {series[field_name]}")
+
+        lines.append(f"# TYPE {self.prefix}_latency_seconds histogram")
+        for (stage, model), series in snapshot:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, series["latency_buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.prefix}_latency_seconds_bucket{self._labels(stage, model, le=le)} {cumulative}")
+            lines.append(f"{self.prefix}_latency_seconds_sum{self._labels(stage, model)} {series['latency_sum']}")
+            lines.append(f"{self.prefix}_latency_seconds_count{self._labels(stage, model)} {series['calls']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        Atomically writes the rendered metrics to a file, e.g. for the node exporter textfile collector.
+        """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+metrics_registry = MetricsRegistry()
+
+
+def _reset(var: contextvars.ContextVar, token: contextvars.Token):
+    """
+    Restores a context variable. A generator closed from another context (e.g. by the
+    garbage collector) cannot use its token, so the old value is set directly instead.
+    """
+    try:
+        var.reset(token)
+    except ValueError:
+        var.set(None if token.old_value is contextvars.Token.MISSING else token.old_value)
+
+
+@contextmanager
+def stage(name: str, turn: Optional[int] = None):
+    """
+    Labels the LLM calls made inside the block with a pipeline stage (and executor turn).
+    """
+    stage_token = _current_stage.set(name)
+    turn_token = _current_turn.set(turn)
+    try:
+        yield
+    finally:
+        _reset(_current_turn, turn_token)
+        _reset(_current_stage, stage_token)
+
+
+def current_stage() -> Optional[str]:
+    """
+    Returns the stage set by the innermost stage() block, or None outside of one.
+    """
+    return _current_stage.get()
+
+
+@contextmanager
+def collect():
+    """
+    Collects the records of the LLM calls made inside the block.
+
+    Yields:
+        RequestMetrics: The collector, with elapsed set when the block exits.
+    """
+    request = RequestMetrics()
+    token = _current_request.set(request)
+    try:
+        yield request
+    finally:
+        request.elapsed = time.monotonic() - request.started
+        _reset(_current_request, token)
+
+
+def record_llm_call(model: str, prompt_tokens: int, completion_tokens: int, latency: float) -> CallRecord:
+    """
+    Records an LLM call under the current stage, in the current request collector if any
+    and in the process-wide registry. Called by providers after every call.
+    """
+    record = CallRecord(
+        stage=_current_stage.get() or "unknown",
+        turn=_current_turn.get(),
+        model=model or "unknown",
+        prompt_tokens=prompt_tokens or 0,
+        completion_tokens=completion_tokens or 0,
+        latency=latency,
+    )
+    request = _current_request.get()
+    if request is not None:
+        request.records.append(record)
+    metrics_registry.record(record)
+    return record
+
+
+def configure(metrics_config):
+    """
+    Registers the sinks described by a MetricsConfig. Safe to call once per agent: a JSON
+    lines file is only registered once per process.
+    """
+    if metrics_config.jsonl_path:
+        registered = [
+            sink.path for sink in metrics_registry.sinks() if isinstance(sink, JSONLinesSink)
+        ]
+        if metrics_config.jsonl_path not in registered:
+            metrics_registry.add_sink(JSONLinesSink(metrics_config.jsonl_path))
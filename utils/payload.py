@@ -0,0 +1,45 @@
+# Nesting below this depth is kept as a truncated repr
+MAX_PAYLOAD_DEPTH = 8
+
+
+def truncate_payload(value, max_chars: int):
+    """
+    Returns a JSON-ready copy of value holding about max_chars characters at most.
+
+    Long strings are cut and long lists and dicts stop with a count of the items left out,
+    so the cost depends on max_chars rather than on the size of value.
+    """
+    budget = [max_chars]
+
+    def walk(item, depth):
+        if isinstance(item, str):
+            if len(item) > budget[0]:
+                cut = item[:max(budget[0], 0)]
+                budget[0] = 0
+                return f"{cut}... ({len(item)} chars)"
+            budget[0] -= len(item)
+            return item
+        if item is None or isinstance(item, (bool, int, float)):
+            budget[0] -= 8
+            return item
+        if depth >= MAX_PAYLOAD_DEPTH:
+            return walk(repr(item)[:max_chars], depth)
+        if isinstance(item, dict):
+            result = {}
+            for i, (key, child) in enumerate(item.items()):
+                if budget[0] <= 0:
+                    result["..."] = f"{len(item) - i} more"
+                    break
+                result[str(key)] = walk(child, depth + 1)
+            return result
+        if isinstance(item, (list, tuple, set, frozenset)):
+            result = []
+            for i, child in enumerate(item):
+                if budget[0] <= 0:
+                    result.append(f"... {len(item) - i} more")
+                    break
+                result.append(walk(child, depth + 1))
+            return result
+        return walk(repr(item)[:max_chars + 1], depth)
+
+    return walk(value, 0)
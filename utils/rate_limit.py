@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers reserve tokens up front and wait for their turn, so
+    waiting callers are served in order and the long-run rate never exceeds the limit.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float, optional): Maximum burst size. Defaults to one second of tokens.
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """
+        Takes tokens from the bucket, possibly going into debt, and returns how long the
+        caller has to wait before using them.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1):
+        wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+
+    async def async_acquire(self, tokens: float = 1):
+        wait = self._reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str, requests_per_minute: Optional[float]) -> Optional[TokenBucket]:
+    """
+    Returns the process-wide request limiter for a model, or None if requests_per_minute is not set.
+    """
+    if not requests_per_minute:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get((model, requests_per_minute))
+        if limiter is None:
+            limiter = TokenBucket(rate=requests_per_minute / 60.0)
+            _limiters[(model, requests_per_minute)] = limiter
+        return limiter
@@ -0,0 +1,100 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+# A line starting a section. Starting the pattern with a literal newline lets the regex
+# engine jump between lines instead of trying every position.
+_SECTION_RE = re.compile(r'\n[ \t]*(?:(Thought|Action|Answer):|PAUSE[ \t]*\r?(?:\n|$))')
+_WHITESPACE_RE = re.compile(r'\s*')
+_decoder = json.JSONDecoder()
+
+
+@dataclass
+class ReActAction:
+    """
+    An Action of an executor response.
+
+    tool and parameters come from the parsed JSON. When the JSON is invalid they are None
+    and error says why; raw always holds the text the JSON was read from.
+    """
+    raw: str
+    tool: Optional[str] = None
+    parameters: Optional[dict] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ReActResponse:
+    """
+    An executor response split into its Thought, Action, PAUSE and Answer parts.
+    """
+    thoughts: list = field(default_factory=list)
+    actions: list = field(default_factory=list)
+    pause: bool = False
+    answer: Optional[str] = None
+
+
+def parse_react_response(text: str) -> ReActResponse:
+    """
+    Parses an executor response in a single pass.
+
+    Sections start with "Thought:", "Action:" or "Answer:" at the beginning of a line, or
+    a line that is just PAUSE, and run until the next one. The JSON of an Action may span
+    several lines. Everything after PAUSE is ignored, since the model should stop there
+    and wait for the observation.
+
+    Args:
+        text (str): The executor response.
+
+    Returns:
+        ReActResponse: The thoughts, actions, pause flag and final answer found.
+    """
+    result = ReActResponse()
+    # The leading newline lets the first line match like the others; offsets are into text
+    text = "\n" + text
+    thought_start = None
+    # Keywords before this offset are inside the JSON of a multi-line Action
+    consumed = 0
+    for match in _SECTION_RE.finditer(text):
+        if match.start() < consumed:
+            continue
+        if thought_start is not None:
+            result.thoughts.append(text[thought_start:match.start()].strip())
+            thought_start = None
+
+        keyword = match.group(1)
+        if keyword is None:
+            result.pause = True
+            return result
+        if keyword == "Thought":
+            thought_start = match.end()
+        elif keyword == "Answer":
+            result.answer = text[match.end():].strip()
+            return result
+        else:
+            action_start = _WHITESPACE_RE.match(text, match.end()).end()
+            if not text.startswith("{", action_start):
+                # Not a JSON action, such as a tool name written as plain text
+                continue
+            try:
+                action_data, consumed = _decoder.raw_decode(text, action_start)
+            except ValueError as e:
+                line_end = text.find("\n", action_start)
+                raw = text[action_start:line_end if line_end != -1 else len(text)].strip()
+                result.actions.append(ReActAction(raw=raw, error=str(e)))
+                continue
+            raw = text[action_start:consumed]
+            if not isinstance(action_data, dict):
+                result.actions.append(ReActAction(raw=raw, error="Action is not a JSON object"))
+                continue
+            result.actions.append(ReActAction(
+                raw=raw,
+                tool=action_data.get("tool"),
+                parameters=action_data.get("parameters", {})
+            ))
+
+    if thought_start is not None:
+        result.thoughts.append(text[thought_start:].strip())
+    return result
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+
+logger = logging.getLogger('agent')
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter. A Retry-After hint from the server takes precedence
+    over the computed delay, up to backoff_max.
+    """
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 20.0):
+        """
+        Args:
+            max_retries (int): Retries after the first attempt. 0 disables retrying.
+            backoff_base (float): Upper bound, in seconds, of the first delay. Doubles every attempt.
+            backoff_max (float): Cap, in seconds, of any delay, Retry-After hints included.
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Returns the seconds to wait before retry number attempt (starting at 0).
+        """
+        if retry_after is not None:
+            # A hint of an hour must not block the caller for an hour
+            return min(self.backoff_max, max(0.0, retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header, given either in seconds or as an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(
+    fn: Callable,
+    policy: RetryPolicy,
+    is_retryable: Callable[[Exception], bool],
+    retry_after: Callable[[Exception], Optional[float]] = lambda e: None,
+):
+    """
+    Calls fn() and retries it on retryable errors according to the policy.
+
+    Args:
+        fn (callable): The call to make, without arguments.
+        policy (RetryPolicy): How many times and how long to wait between attempts.
+        is_retryable (callable): Returns True for errors worth retrying.
+        retry_after (callable, optional): Returns the server's Retry-After hint for an error.
+
+    Returns:
+        The result of fn(). The last error is raised once retries are exhausted.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= policy.max_retries or not is_retryable(e):
+                raise
+            delay = policy.delay(attempt, retry_after(e))
+            logger.warning(f"Retrying after {type(e).__name__} in {delay:.2f}s (attempt {attempt + 1} of {policy.max_retries})")
+            time.sleep(delay)
+            attempt += 1
+
+
+async def async_call_with_retry(
+    fn: Callable,
+    policy: RetryPolicy,
+    is_retryable: Callable[[Exception], bool],
+    retry_after: Callable[[Exception], Optional[float]] = lambda e: None,
+):
+    """
+    Async version of call_with_retry. fn() must return an awaitable.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt >= policy.max_retries or not is_retryable(e):
+                raise
+            delay = policy.delay(attempt, retry_after(e))
+            logger.warning(f"Retrying after {type(e).__name__} in {delay:.2f}s (attempt {attempt + 1} of {policy.max_retries})")
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,63 @@
+import functools
+from string import Formatter
+
+
+class CompiledTemplate:
+    """
+    A str.format template parsed once into literal text and field names.
+
+    Rendering joins the pieces instead of re-parsing the template on every call, and partial
+    bakes values that never change (such as the tool list) into the literal text up front.
+    Only plain {field} placeholders are supported, {{ and }} escapes work as with str.format.
+    """
+    def __init__(self, template: str):
+        self.template = template
+        # Even positions are literal text, odd positions are field names
+        self._pieces = [""]
+        for literal, field_name, format_spec, conversion in Formatter().parse(template):
+            self._pieces[-1] += literal
+            if field_name is None:
+                continue
+            if not field_name or format_spec or conversion:
+                raise ValueError(f"Unsupported placeholder in template: {{{field_name}}}")
+            self._pieces.extend([field_name, ""])
+
+    @property
+    def fields(self) -> set:
+        """
+        The names of the placeholders still to be filled.
+        """
+        return set(self._pieces[1::2])
+
+    def render(self, **values) -> str:
+        pieces = self._pieces
+        if len(pieces) == 1:
+            return pieces[0]
+        rendered = [pieces[0]]
+        for i in range(1, len(pieces), 2):
+            rendered.append(str(values[pieces[i]]))
+            rendered.append(pieces[i + 1])
+        return "".join(rendered)
+
+    def partial(self, **values) -> 'CompiledTemplate':
+        """
+        Returns a template with the given fields filled in and the others left as placeholders.
+        """
+        compiled = CompiledTemplate.__new__(CompiledTemplate)
+        compiled.template = self.template
+        compiled._pieces = [self._pieces[0]]
+        for i in range(1, len(self._pieces), 2):
+            field_name, literal = self._pieces[i], self._pieces[i + 1]
+            if field_name in values:
+                compiled._pieces[-1] += str(values[field_name]) + literal
+            else:
+                compiled._pieces.extend([field_name, literal])
+        return compiled
+
+
+@functools.lru_cache(maxsize=128)
+def compile_template(template: str) -> CompiledTemplate:
+    """
+    Returns the compiled form of a template, parsing each distinct template only once.
+    """
+    return CompiledTemplate(template)
@@ -0,0 +1,34 @@
+import json
+
+
+# Rough average for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens in a text without loading a tokenizer.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_messages_tokens(messages: list) -> int:
+    """
+    Estimates the number of prompt tokens of a chat message list, including a small
+    per-message overhead for the role and separators.
+    """
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        if not isinstance(content, str):
+            content = json.dumps(content)
+        total += estimate_tokens(content) + 4
+    return total